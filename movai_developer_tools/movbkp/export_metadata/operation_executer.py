@@ -1,5 +1,6 @@
 from movai_developer_tools.utils import logger
 from movai_developer_tools.utils.backup_helper import BackupHelper
+from movai_developer_tools.utils.container_tools import selection_kwargs
 from argparse import Namespace
 
 
@@ -17,10 +18,37 @@ class Exporter(BackupHelper):
 
         """
         # Call superclass init
-        super().__init__(dry_run=args.dry)
-        # Execute
-        self.iterative_backup_action(command=args.command, work_dir=args.dir)
+        super().__init__(
+            dry_run=args.dry,
+            session=args.session,
+            objects=args.objects,
+            index_file=args.index,
+            **selection_kwargs(args),
+        )
+        # The exec session, if any, is closed once the action ends
+        with self:
+            # Execute, reading Redis directly or only writing changed files if requested
+            if args.fast:
+                self.fast_action(args.command, args.dir, verify=not args.fast_no_verify)
+            elif args.diff:
+                self.diff_export_action(work_dir=args.dir)
+            else:
+                self.iterative_backup_action(
+                    command=args.command,
+                    work_dir=args.dir,
+                    report_file=args.report,
+                    stats_file=args.stats,
+                    profile_dir=args.profile,
+                    profile_top=args.profile_top,
+                    shard=args.shard,
+                    history_file=args.history,
+                )
 
     @staticmethod
     def add_expected_arguments(parser):
         """Method exposed for the handle to append our executer arguments."""
+        parser.add_argument(
+            "--diff",
+            help="Export to a staging area and only write metadata files whose content changed (export only)",
+            action="store_true",
+        )
@@ -0,0 +1,82 @@
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.metadata_index import MetadataIndex, parse_object
+from argparse import Namespace
+import os
+import pathlib
+import sys
+
+
+class Find:
+    """Main class to find the packages defining and listing metadata objects, and the objects referring to them."""
+
+    def __init__(self) -> None:
+        logger.debug("Find Init")
+
+    def execute(self, args: Namespace) -> None:
+        """Execute the find behaviour.
+
+        Only the host is used, through the metadata index, no container is needed.
+
+        Args:
+            args: A set of parsed args.
+
+        """
+        if not args.objects:
+            logger.error("find needs at least one TYPE:NAME object, e.g. Node:my_node")
+            sys.exit(1)
+        try:
+            entries = [parse_object(text) for text in args.objects]
+        except ValueError as e:
+            logger.error(str(e))
+            sys.exit(1)
+        root = str(pathlib.Path(args.dir or os.getcwd()).resolve())
+        index = MetadataIndex(args.index)
+        index.update(root)
+        found = False
+        for entry in entries:
+            found = self.show(index, entry, root) or found
+        index.close()
+        if not found:
+            sys.exit(1)
+
+    @staticmethod
+    def show(index: MetadataIndex, entry, root: str) -> bool:
+        """Print where an object is defined and listed, and what refers to it.
+
+        Args:
+            index: Updated metadata index.
+            entry: ManifestEntry of the object, the name may be a glob pattern.
+            root: Directory searched.
+
+        Returns:
+            True if the object is known under root.
+
+        """
+        objects = index.find(entry, root)
+        manifests = index.manifests([entry], root)
+        if not objects and not manifests:
+            logger.warning(f"{entry} was not found under {root}")
+            return False
+        logger.info(f"{entry}")
+        for obj in objects:
+            logger.info(f"  defined by {obj} in {os.path.relpath(obj.path, root)}")
+        for manifest in manifests:
+            logger.info(f"  listed in {os.path.relpath(manifest, root)}")
+        for obj in index.referenced_by(entry, root):
+            logger.info(f"  used by {obj} in {os.path.relpath(obj.path, root)}")
+        for reference in index.references(entry, root):
+            logger.info(f"  uses {reference}")
+        return True
+
+    @staticmethod
+    def add_expected_arguments(parser):
+        """Method exposed for the handle to append our executer arguments."""
+        parser.add_argument(
+            "objects",
+            help="Metadata objects TYPE:NAME, the name may be a glob pattern. Looked up by find, select the manifests listing them for import, export, remove, snapshot and status, not accepted by the other commands",
+            nargs="*",
+        )
+        parser.add_argument(
+            "--index",
+            help="Metadata index file, defaults to ~/.cache/movai-developer-tools/metadata-index.sqlite",
+        )
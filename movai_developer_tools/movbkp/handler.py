@@ -1,24 +1,50 @@
 "Recursively imports, exports, removes or re-installs all manifest.txt files found under the directory"
 import argparse
 import sys
+import time
 from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.container_tools import add_selection_arguments
+from movai_developer_tools.utils.fleet import add_fleet_arguments, execute_on_fleet
+from movai_developer_tools.utils.manifest_schedule import DurationHistory
 from movai_developer_tools.movbkp.import_metadata.operation_executer import Importer
 from movai_developer_tools.movbkp.export_metadata.operation_executer import Exporter
 from movai_developer_tools.movbkp.remove_metadata.operation_executer import Remover
 from movai_developer_tools.movbkp.reinstall_metadata.operation_executer import (
     ReInstaller,
 )
+from movai_developer_tools.movbkp.snapshot_metadata.operation_executer import (
+    Snapshotter,
+)
+from movai_developer_tools.movbkp.restore_metadata.operation_executer import (
+    Restorer,
+)
+from movai_developer_tools.movbkp.status_metadata.operation_executer import Status
+from movai_developer_tools.movbkp.find_metadata.operation_executer import Find
+from movai_developer_tools.movbkp.lint_metadata.operation_executer import Lint
 
 executors = {
     "import": Importer,
     "export": Exporter,
     "remove": Remover,
     "re-install": ReInstaller,
+    "snapshot": Snapshotter,
+    "restore": Restorer,
+    "status": Status,
+    "find": Find,
+    "lint": Lint,
 }
+# Commands using the positional TYPE:NAME objects
+object_commands = ("import", "export", "remove", "snapshot", "status", "find")
+# Modes replacing the iterative backup tool run, and the commands using them
+mode_commands = {"fast": ("import", "export"), "diff": ("export",), "bulk": ("remove",)}
+# Options of the iterative run, not used by the modes (except --report by --bulk)
+iterative_options = ("report", "stats", "profile", "shard", "history")
+# Arguments naming a file or snapshot written by the run, made per host or stack with --hosts or --all-matching
+per_target_args = ("report", "stats", "profile", "history", "snapshot")
 
 
-def handle():
-    """Entrypoint method of the package. It handles commands to the executers"""
+def make_parser() -> argparse.ArgumentParser:
+    """Return the parser of the handler arguments, also used to generate the shell completion."""
     parser = argparse.ArgumentParser(
         description=f"This component containes backup {', '.join(map(str, executors))} tools used on MOV.AI metadata files when developing with MOV.AI"
     )
@@ -36,11 +62,113 @@ def handle():
         "--dir",
         help="Directory to search manifests, defaults to CWD",
     )
+    parser.add_argument(
+        "--report",
+        help="Write a JSON report with the per-manifest and per-object outcomes to this file",
+    )
+    parser.add_argument(
+        "--stats",
+        help="Sample the docker stats of the spawner during the run, write them as CSV to this file and log the load of every manifest",
+    )
+    parser.add_argument(
+        "--session",
+        help="Run all the commands in the spawner through one persistent exec session, instead of one docker exec per command",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile",
+        help="Run the backup tool under cProfile and write the per-manifest and merged profiles to this directory",
+    )
+    parser.add_argument(
+        "--profile-top",
+        help="Number of functions shown in the profile hotspot report, defaults to 25",
+        type=int,
+        default=25,
+    )
+    parser.add_argument(
+        "--shard",
+        help="Only run the i-th of N shards of the manifests, dealt by path so that every job splits them the same way, e.g. 2/4 (import, export, remove, re-install)",
+    )
+    parser.add_argument(
+        "--history",
+        help="File with the recorded manifest durations used to run the longest manifests first, defaults to ~/.cache/movai-developer-tools/durations.json",
+    )
+    parser.add_argument(
+        "--fast",
+        help="Read the metadata files in the host and write or read the objects directly in the Redis of the platform, without the backup tool (import, export)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--fast-no-verify",
+        help="Do not compare the platform and the userspace with the backup tool after a --fast run",
+        action="store_true",
+    )
+    # docker daemon and container selection arguments
+    add_fleet_arguments(parser)
+    add_selection_arguments(parser)
+
     # executor arguments
     for executer in executors.values():
         executer.add_expected_arguments(parser)
 
-    args = parser.parse_args()
+    return parser
+
+
+def check_modes(args: argparse.Namespace) -> None:
+    """Reject the --fast, --diff and --bulk combinations that would be ignored, exit otherwise.
+
+    Args:
+        args: Parsed handler args.
+
+    """
+    modes = [mode for mode in mode_commands if getattr(args, mode, False)]
+    if len(modes) > 1:
+        logger.error(
+            f"{' and '.join('--' + mode for mode in modes)} cannot be used together"
+        )
+        sys.exit(1)
+    for mode in modes:
+        if args.command not in mode_commands[mode]:
+            logger.error(
+                f"--{mode} is only used by ({', '.join(mode_commands[mode])}), not by {args.command}"
+            )
+            sys.exit(1)
+        ignored = [
+            f"--{option}"
+            for option in iterative_options
+            if getattr(args, option, None) and (mode, option) != ("bulk", "report")
+        ]
+        if ignored:
+            logger.error(f"--{mode} does not use {', '.join(ignored)}")
+            sys.exit(1)
+
+
+def fleet_checks(args: argparse.Namespace) -> None:
+    """Reject the commands that cannot run on several hosts or stacks and fill the defaults made per target.
+
+    Args:
+        args: Parsed handler args, modified in place.
+
+    """
+    if args.command == "export":
+        logger.error(
+            "export writes the metadata files of --dir, it cannot run on several hosts or stacks"
+        )
+        sys.exit(1)
+    if args.command == "restore" and not args.snapshot:
+        logger.error(
+            "restore on several hosts or stacks needs --snapshot, each one restores <snapshot>.<host or stack>"
+        )
+        sys.exit(1)
+    # The defaults are shared, every host or stack gets its own history and snapshot name
+    args.history = args.history or DurationHistory.default_path()
+    if args.command == "snapshot":
+        args.snapshot = args.snapshot or time.strftime("%Y%m%d-%H%M%S")
+
+
+def handle():
+    """Entrypoint method of the package. It handles commands to the executers"""
+    args = make_parser().parse_args()
 
     try:
         executor = executors[args.command]()
@@ -53,6 +181,18 @@ def handle():
             + ")"
         )
         sys.exit(1)
+    if args.objects and args.command not in object_commands:
+        logger.error(
+            f"{args.command} does not take TYPE:NAME objects, only ({', '.join(object_commands)}) do: {' '.join(args.objects)}"
+        )
+        sys.exit(1)
+
+    check_modes(args)
+
+    # Run on every host of the inventory or every stack, one executor per host or stack
+    if args.hosts or args.all_matching:
+        fleet_checks(args)
+        sys.exit(execute_on_fleet(executors[args.command], args, per_target_args))
 
     executor.execute(args)
 
@@ -0,0 +1,56 @@
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.metadata_lint import LintCache, lint_metadata
+from argparse import Namespace
+import os
+import pathlib
+import sys
+import time
+
+
+class Lint:
+    """Main class to validate the metadata files of the userspace in the host, before they reach the platform."""
+
+    def __init__(self) -> None:
+        logger.debug("Lint Init")
+
+    def execute(self, args: Namespace) -> None:
+        """Execute the lint behaviour, exit with 1 if any error, or with --lint-strict any warning, is found.
+
+        Only the host is used, no container is needed.
+
+        Args:
+            args: A set of parsed args.
+
+        """
+        root = str(pathlib.Path(args.dir or os.getcwd()).resolve())
+        cache = None if args.lint_no_cache else LintCache(root=root)
+        start = time.monotonic()
+        problems, count = lint_metadata(root, args.lint_jobs, cache)
+        for problem in problems:
+            log = logger.error if problem.level == "error" else logger.warning
+            log(f"{os.path.relpath(problem.path, root)} {problem.message}")
+        errors = sum(problem.level == "error" for problem in problems)
+        logger.info(
+            f"Linted {count} metadata files in {time.monotonic() - start:.2f}s: {errors} errors, {len(problems) - errors} warnings"
+        )
+        if errors or (args.lint_strict and problems):
+            sys.exit(1)
+
+    @staticmethod
+    def add_expected_arguments(parser):
+        """Method exposed for the handle to append our executer arguments."""
+        parser.add_argument(
+            "--lint-jobs",
+            help="Number of processes validating the metadata files, defaults to the number of CPUs (lint only)",
+            type=int,
+        )
+        parser.add_argument(
+            "--lint-strict",
+            help="Fail on warnings too, e.g. references to objects missing from the userspace, for CI (lint only)",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--lint-no-cache",
+            help="Validate every file, ignoring the results cached by file content (lint only)",
+            action="store_true",
+        )
@@ -1,5 +1,6 @@
 from movai_developer_tools.utils import logger
 from movai_developer_tools.utils.backup_helper import BackupHelper
+from movai_developer_tools.utils.container_tools import selection_kwargs
 from argparse import Namespace
 
 
@@ -18,10 +19,29 @@ class ReInstaller(BackupHelper):
 
         """
         # Call superclass init
-        super().__init__(dry_run=args.dry)
-        # Execute
-        self.iterative_backup_action(command=args.command, work_dir=args.dir)
+        super().__init__(
+            dry_run=args.dry, session=args.session, **selection_kwargs(args)
+        )
+        # The exec session, if any, is closed once the action ends
+        with self:
+            # Execute
+            self.iterative_backup_action(
+                command=args.command,
+                work_dir=args.dir,
+                report_file=args.report,
+                stats_file=args.stats,
+                profile_dir=args.profile,
+                profile_top=args.profile_top,
+                shard=args.shard,
+                history_file=args.history,
+                reinstall_all=args.all,
+            )
 
     @staticmethod
     def add_expected_arguments(parser):
         """Method exposed for the handle to append our executer arguments."""
+        parser.add_argument(
+            "--all",
+            help="Re-install the metadata of every installed package, not only of the packages added or upgraded since the last re-install (re-install only)",
+            action="store_true",
+        )
@@ -1,5 +1,6 @@
 from movai_developer_tools.utils import logger
 from movai_developer_tools.utils.backup_helper import BackupHelper
+from movai_developer_tools.utils.container_tools import selection_kwargs
 from argparse import Namespace
 
 
@@ -18,10 +19,35 @@ class Remover(BackupHelper):
 
         """
         # Call superclass init
-        super().__init__(dry_run=args.dry)
-        # Execute
-        self.iterative_backup_action(command=args.command, work_dir=args.dir)
+        super().__init__(
+            dry_run=args.dry,
+            session=args.session,
+            objects=args.objects,
+            index_file=args.index,
+            **selection_kwargs(args),
+        )
+        # The exec session, if any, is closed once the action ends
+        with self:
+            # Execute, removing everything in one backup tool process if requested
+            if args.bulk:
+                self.bulk_remove_action(work_dir=args.dir, report_file=args.report)
+            else:
+                self.iterative_backup_action(
+                    command=args.command,
+                    work_dir=args.dir,
+                    report_file=args.report,
+                    stats_file=args.stats,
+                    profile_dir=args.profile,
+                    profile_top=args.profile_top,
+                    shard=args.shard,
+                    history_file=args.history,
+                )
 
     @staticmethod
     def add_expected_arguments(parser):
         """Method exposed for the handle to append our executer arguments."""
+        parser.add_argument(
+            "--bulk",
+            help="Merge and deduplicate the entries of all manifests and remove them in a single backup tool execution (remove only)",
+            action="store_true",
+        )
@@ -0,0 +1,39 @@
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.backup_helper import BackupHelper
+from movai_developer_tools.utils.container_tools import selection_kwargs
+from movai_developer_tools.utils.snapshot_store import SnapshotStore
+from argparse import Namespace
+
+
+class Restorer(BackupHelper):
+    """Main class to restore a metadata snapshot into the platform."""
+
+    def __init__(self) -> None:
+        """If your executor requires some initialization, use the class constructor for it."""
+        logger.debug("Restorer Init")
+
+    def execute(self, args: Namespace) -> None:
+        """Execute the restore behaviour.
+
+        Args:
+            args: A set of parsed args.
+
+        """
+        # Call superclass init
+        super().__init__(
+            dry_run=args.dry, session=args.session, **selection_kwargs(args)
+        )
+        # The exec session, if any, is closed once the action ends
+        with self:
+            # Execute
+            self.restore_action(
+                name=args.snapshot, store=SnapshotStore(args.snapshot_store)
+            )
+
+    @staticmethod
+    def add_expected_arguments(parser):
+        """Method exposed for the handle to append our executer arguments.
+
+        The --snapshot and --snapshot-store arguments are shared with the snapshot executer.
+
+        """
@@ -0,0 +1,49 @@
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.backup_helper import BackupHelper
+from movai_developer_tools.utils.container_tools import selection_kwargs
+from movai_developer_tools.utils.snapshot_store import SnapshotStore
+from argparse import Namespace
+
+
+class Snapshotter(BackupHelper):
+    """Main class to snapshot the platform metadata into a deduplicated store in the host."""
+
+    def __init__(self) -> None:
+        """If your executor requires some initialization, use the class constructor for it."""
+        logger.debug("Snapshotter Init")
+
+    def execute(self, args: Namespace) -> None:
+        """Execute the snapshot behaviour.
+
+        Args:
+            args: A set of parsed args.
+
+        """
+        # Call superclass init
+        super().__init__(
+            dry_run=args.dry,
+            session=args.session,
+            objects=args.objects,
+            index_file=args.index,
+            **selection_kwargs(args),
+        )
+        # The exec session, if any, is closed once the action ends
+        with self:
+            # Execute
+            self.snapshot_action(
+                work_dir=args.dir,
+                name=args.snapshot,
+                store=SnapshotStore(args.snapshot_store),
+            )
+
+    @staticmethod
+    def add_expected_arguments(parser):
+        """Method exposed for the handle to append our executer arguments."""
+        parser.add_argument(
+            "--snapshot",
+            help="Name of the snapshot to create or restore (snapshot and restore), defaults to the current date/latest snapshot",
+        )
+        parser.add_argument(
+            "--snapshot-store",
+            help="Directory of the snapshot store (snapshot and restore), defaults to ~/.local/share/movai-developer-tools/snapshots",
+        )
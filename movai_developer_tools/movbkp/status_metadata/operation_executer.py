@@ -0,0 +1,35 @@
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.backup_helper import BackupHelper
+from movai_developer_tools.utils.container_tools import selection_kwargs
+from argparse import Namespace
+
+
+class Status(BackupHelper):
+    """Main class to compare the metadata in the userspace with the metadata in the platform."""
+
+    def __init__(self) -> None:
+        logger.debug("Status Init")
+
+    def execute(self, args: Namespace) -> None:
+        """Execute the status behaviour.
+
+        Args:
+            args: A set of parsed args.
+
+        """
+        # Call superclass init
+        super().__init__(
+            dry_run=args.dry,
+            session=args.session,
+            objects=args.objects,
+            index_file=args.index,
+            **selection_kwargs(args),
+        )
+        # The exec session, if any, is closed once the action ends
+        with self:
+            # Execute
+            self.status_action(work_dir=args.dir)
+
+    @staticmethod
+    def add_expected_arguments(parser):
+        """Method exposed for the handle to append our executer arguments."""
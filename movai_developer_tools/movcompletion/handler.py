@@ -0,0 +1,53 @@
+"""Main package module. Contains the handler, executors and other modules inside.# noqa: E501"""
+import argparse
+import sys
+from movai_developer_tools.utils import logger
+from movai_developer_tools.movcompletion.script.operation_executer import Script
+from movai_developer_tools.movcompletion.refresh.operation_executer import Refresh
+
+executors = {
+    "bash": Script,
+    "zsh": Script,
+    "refresh": Refresh,
+}
+
+
+def make_parser() -> argparse.ArgumentParser:
+    """Return the parser of the handler arguments, also used to generate the shell completion."""
+    parser = argparse.ArgumentParser(
+        description="This component generates the bash and zsh completion of the MOV.AI developer tools. Add 'source <(movcompletion bash)' to ~/.bashrc"
+    )
+
+    parser.add_argument(
+        "command",
+        help=f"Command to be executed. Options are ({', '.join(executors.keys())})",
+    )
+
+    # executor arguments
+    for executer in set(executors.values()):
+        executer.add_expected_arguments(parser)
+
+    return parser
+
+
+def handle():
+    """Entrypoint method of the package. It handles commands to the executers"""
+    args = make_parser().parse_args()
+
+    try:
+        executor = executors[args.command]()
+    except KeyError:
+        logger.error(
+            "Invalid command: "
+            + args.command
+            + ". Supported commands are: ("
+            + " ".join(map(str, executors))
+            + ")"
+        )
+        sys.exit(1)
+
+    executor.execute(args)
+
+
+if __name__ == "__main__":
+    handle()
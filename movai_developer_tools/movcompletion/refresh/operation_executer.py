@@ -0,0 +1,27 @@
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.completion import cache_dir, refresh_cache
+from movai_developer_tools.movcontainer.handler import executors
+from argparse import Namespace
+
+
+class Refresh:
+    """Main class to refresh the cache of containers and manifest directories read by the shell completion."""
+
+    def __init__(self) -> None:
+        logger.debug("Refresh Init")
+
+    def execute(self, args: Namespace) -> None:
+        """Execute the refresh behaviour.
+
+        Args:
+            args: A set of parsed args.
+
+        """
+        # Names of the MOV.AI containers, as searched by the movcontainer executors
+        regexes = [executor().regex_container_name for executor in executors.values()]
+        refresh_cache(regexes)
+        logger.info(f"Completion cache written to {cache_dir()}")
+
+    @staticmethod
+    def add_expected_arguments(parser):
+        """Method exposed for the handle to append our executer arguments."""
@@ -0,0 +1,44 @@
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.completion import completion_script, tool_spec
+from movai_developer_tools.movbkp import handler as movbkp_handler
+from movai_developer_tools.movcontainer import handler as movcontainer_handler
+from movai_developer_tools.movros import handler as movros_handler
+from argparse import Namespace
+
+
+class Script:
+    """Main class to print the shell completion script of the MOV.AI developer tools."""
+
+    def __init__(self) -> None:
+        logger.debug("Script Init")
+
+    def execute(self, args: Namespace) -> None:
+        """Print the completion script of the shell given as command.
+
+        Args:
+            args: A set of parsed args.
+
+        """
+        specs = [
+            tool_spec(
+                "movbkp",
+                movbkp_handler.make_parser(),
+                [movbkp_handler.executors],
+            ),
+            tool_spec(
+                "movcontainer",
+                movcontainer_handler.make_parser(),
+                [movcontainer_handler.executors, movcontainer_handler.sub_commands],
+            ),
+            tool_spec(
+                "movros",
+                movros_handler.make_parser(),
+                [movros_handler.executors],
+            ),
+            tool_spec("movcompletion", None, [("bash", "zsh", "refresh")]),
+        ]
+        print(completion_script(specs, args.command))
+
+    @staticmethod
+    def add_expected_arguments(parser):
+        """Method exposed for the handle to append our executer arguments."""
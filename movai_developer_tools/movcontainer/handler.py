@@ -3,6 +3,12 @@ import argparse
 import sys
 
 from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.container_tools import add_selection_arguments
+from movai_developer_tools.utils.container_wait import add_wait_arguments
+from movai_developer_tools.utils.file_sync import add_sync_arguments
+from movai_developer_tools.utils.file_transfer import add_copy_arguments
+from movai_developer_tools.utils.fleet import add_fleet_arguments, execute_on_fleet
+from movai_developer_tools.utils.stats_sampler import add_stats_arguments
 from movai_developer_tools.movcontainer.spawner.operation_executer import (
     Spawner,
 )
@@ -11,10 +17,24 @@ from movai_developer_tools.movcontainer.ros_master.operation_executer import (
 )
 
 executors = {"spawner": Spawner, "ros-master": RosMaster}
+# Sub-commands shared by every executor
+sub_commands = (
+    "ip",
+    "id",
+    "name",
+    "gateway",
+    "restart",
+    "userspace-dir",
+    "logs",
+    "stats",
+    "cp",
+    "wait",
+    "sync",
+)
 
 
-def handle():
-    """Entrypoint method of the package. It handles commands to the executers"""
+def make_parser() -> argparse.ArgumentParser:
+    """Return the parser of the handler arguments, also used to generate the shell completion."""
     parser = argparse.ArgumentParser(
         description="This component helps to retrieve docker container information developing with MOV.AI."
     )
@@ -24,14 +44,28 @@ def handle():
     )
     parser.add_argument(
         "sub_command",
-        help="Property of the component to be fetched, options are (ip, id, name, gateway, userspace-dir, logs)",
+        help=f"Property of the component to be fetched, options are ({', '.join(sub_commands)})",
     )
 
+    # docker daemon and container selection arguments
+    add_fleet_arguments(parser)
+    add_selection_arguments(parser)
+    # sub-command arguments
+    add_stats_arguments(parser)
+    add_copy_arguments(parser)
+    add_wait_arguments(parser)
+    add_sync_arguments(parser)
+
     # executor arguments
     for executer in executors.values():
         executer.add_expected_arguments(parser)
 
-    args = parser.parse_args()
+    return parser
+
+
+def handle():
+    """Entrypoint method of the package. It handles commands to the executers"""
+    args = make_parser().parse_args()
 
     try:
         executor = executors[args.command]()
@@ -45,6 +79,10 @@ def handle():
         )
         sys.exit(1)
 
+    # Run on every host of the inventory or every stack, one executor per host or stack
+    if args.hosts or args.all_matching:
+        sys.exit(execute_on_fleet(executors[args.command], args))
+
     executor.execute(args)
 
 
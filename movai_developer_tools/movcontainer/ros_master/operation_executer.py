@@ -1,7 +1,14 @@
 import sys
 from argparse import Namespace
 from movai_developer_tools.utils import logger
-from movai_developer_tools.utils.container_tools import ContainerTools
+from movai_developer_tools.utils.file_sync import run_sync
+from movai_developer_tools.utils.file_transfer import run_copy
+from movai_developer_tools.utils.stats_sampler import run_stats
+from movai_developer_tools.utils.container_wait import run_wait
+from movai_developer_tools.utils.container_tools import (
+    ContainerTools,
+    selection_kwargs,
+)
 
 
 class RosMaster(ContainerTools):
@@ -9,6 +16,7 @@ class RosMaster(ContainerTools):
 
     Attributes:
         regex_container_name (str): Regular expression for finding the ros-master container by name.
+        service_name (str): Docker compose service of the ros-master container.
 
     """
 
@@ -16,7 +24,9 @@ class RosMaster(ContainerTools):
         """If your executor requires some initialization, use the class constructor for it"""
         logger.debug("RosMaster Init")
         # Reg expressions for finding the ros-master container
-        self.regex_container_name = "^ros-master-*"
+        self.regex_container_name = "^ros-master-.*"
+        # Docker compose service used when selecting the container by project
+        self.service_name = "ros-master"
 
     def get_ip(self) -> None:
         """Print container ip."""
@@ -46,7 +56,11 @@ class RosMaster(ContainerTools):
 
         """
         # Instanciate ContainerTools
-        super().__init__(self.regex_container_name)
+        super().__init__(
+            self.regex_container_name,
+            service=self.service_name,
+            **selection_kwargs(args),
+        )
 
         # Map sub command to the method
         prop_to_method = {
@@ -57,11 +71,15 @@ class RosMaster(ContainerTools):
             "restart": self.restart,
             "userspace-dir": self.get_userspace_dir,
             "logs": self.logs,
+            "stats": lambda: run_stats(self, args),
+            "cp": lambda: run_copy(self, args),
+            "wait": lambda: run_wait(self, args),
+            "sync": lambda: run_sync(self, args),
         }
 
-        # Try executing the sub-command, error and exit on invalid sub-commands
+        # Look up the sub-command, error and exit on invalid sub-commands
         try:
-            return prop_to_method[args.sub_command]()
+            method = prop_to_method[args.sub_command]
         except KeyError:
             logger.error(
                 "Invalid command: "
@@ -71,6 +89,8 @@ class RosMaster(ContainerTools):
                 + ")"
             )
             sys.exit(1)
+        # Called outside the lookup, so its own errors are not reported as invalid sub-commands
+        return method()
 
     @staticmethod
     def add_expected_arguments(parser):
@@ -85,7 +105,7 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "sub_command",
-        help="Property of the component to be fetched, options are (ip, id, name, gateway, userspace-dir, logs)",
+        help="Property of the component to be fetched, options are (ip, id, name, gateway, userspace-dir, logs, stats, cp, wait, sync)",
     )
     args = parser.parse_args()
     spawner = RosMaster()
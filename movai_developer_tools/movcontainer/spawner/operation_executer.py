@@ -1,7 +1,14 @@
 import sys
 from argparse import Namespace
 from movai_developer_tools.utils import logger
-from movai_developer_tools.utils.container_tools import ContainerTools
+from movai_developer_tools.utils.file_sync import run_sync
+from movai_developer_tools.utils.file_transfer import run_copy
+from movai_developer_tools.utils.stats_sampler import run_stats
+from movai_developer_tools.utils.container_wait import run_wait
+from movai_developer_tools.utils.container_tools import (
+    ContainerTools,
+    selection_kwargs,
+)
 
 
 class Spawner(ContainerTools):
@@ -9,6 +16,7 @@ class Spawner(ContainerTools):
 
     Attributes:
         regex_container_name (str): Regular expression for finding the spawner container by name.
+        service_name (str): Docker compose service of the spawner container.
 
     """
 
@@ -16,6 +24,8 @@ class Spawner(ContainerTools):
         logger.debug("Spawner Init")
         # Reg expression for finding the spawner container
         self.regex_container_name = "^spawner-.*"
+        # Docker compose service used when selecting the container by project
+        self.service_name = "spawner"
 
     def get_ip(self) -> None:
         """Print container ip."""
@@ -45,7 +55,11 @@ class Spawner(ContainerTools):
 
         """
         # Instanciate ContainerTools
-        super().__init__(self.regex_container_name)
+        super().__init__(
+            self.regex_container_name,
+            service=self.service_name,
+            **selection_kwargs(args),
+        )
 
         # Map sub command to the method
         prop_to_method = {
@@ -56,11 +70,15 @@ class Spawner(ContainerTools):
             "restart": self.restart,
             "userspace-dir": self.get_userspace_dir,
             "logs": self.logs,
+            "stats": lambda: run_stats(self, args),
+            "cp": lambda: run_copy(self, args),
+            "wait": lambda: run_wait(self, args),
+            "sync": lambda: run_sync(self, args),
         }
 
-        # Try executing the sub-command, error and exit on invalid sub-commands
+        # Look up the sub-command, error and exit on invalid sub-commands
         try:
-            return prop_to_method[args.sub_command]()
+            method = prop_to_method[args.sub_command]
         except KeyError:
             logger.error(
                 "Invalid command: "
@@ -70,6 +88,8 @@ class Spawner(ContainerTools):
                 + ")"
             )
             sys.exit(1)
+        # Called outside the lookup, so its own errors are not reported as invalid sub-commands
+        return method()
 
     @staticmethod
     def add_expected_arguments(parser):
@@ -84,7 +104,7 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "sub_command",
-        help="Property of the component to be fetched, options are (ip, id, name, gateway, userspace-dir, logs)",
+        help="Property of the component to be fetched, options are (ip, id, name, gateway, userspace-dir, logs, stats, cp, wait, sync)",
     )
     args = parser.parse_args()
     spawner = Spawner()
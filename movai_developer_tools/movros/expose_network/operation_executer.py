@@ -1,6 +1,12 @@
 from movai_developer_tools.utils import logger
-from movai_developer_tools.utils.container_tools import ContainerTools
+from movai_developer_tools.utils.container_wait import WaitError
+from movai_developer_tools.utils.container_tools import (
+    ContainerTools,
+    selection_kwargs,
+)
+from argparse import Namespace
 from pathlib import Path
+from typing import Optional
 import sys
 import tarfile
 from io import BytesIO
@@ -15,10 +21,8 @@ class ExposeNetwork:
         supported_ros_distros (set): Supported ROS distors.
         entrypoint_dir (str): Docker-entrypoint directory.
         entrypoint_filename (str): Docker-entrypoint filename.
-        temp_ep_tar (str): Temporary place to store the docker-entrypoint tar file.
         bashrc_dir (str): Bashrc directory.
         bashrc_filename (str): Bashrc filename.
-        temp_bashrc_tar (str): Temporary place to store the bashrc tar file.
         spawner (Spawner): Spawner class instance.
         ros_master (RosMaster): RosMaster class instance.
         ros_distro (str): ROS distro that is installed in the host.
@@ -36,28 +40,41 @@ class ExposeNetwork:
         self.entrypoint_dir = "/usr/local/bin"
         # Docker-entrypoint filename
         self.entrypoint_filename = "docker-entrypoint.sh"
-        # Temporary place to store the tar file
-        self.temp_ep_tar = "/tmp/docker-entrypoint.tar"
 
         # Bashrc dir
         self.bashrc_dir = "/opt/mov.ai"
         # Bashrc filename
         self.bashrc_filename = ".bashrc"
-        # Temporary place to store the tar file
-        self.temp_bashrc_tar = "/tmp/bashrc.tar"
+
+        # Spawner and ros-master container classes, set by find_containers
+        self.spawner = None
+        self.ros_master = None
+
+        # ROS distro in host
+        self.ros_distro = None
+
+    def find_containers(self, args: Optional[Namespace] = None) -> None:
+        """Find the spawner and ros-master containers of the same stack.
+
+        Args:
+            args: A set of parsed args, used to select the docker daemon and compose project.
+
+        """
+        kwargs = selection_kwargs(args) if args else {}
+        # Both containers are searched, a pinned container ID does not apply
+        kwargs.pop("container_id", None)
 
         # Reg expressions for finding the spawner container
         regex_spawner_name = "^spawner-.*"
         # Instanciate spawner container class
-        self.spawner = ContainerTools(regex_spawner_name)
+        self.spawner = ContainerTools(regex_spawner_name, service="spawner", **kwargs)
 
         # Reg expressions for finding the ros-master container
         regex_ros_master_name = "^ros-master-.*"
         # Instanciate ros-master container class
-        self.ros_master = ContainerTools(regex_ros_master_name)
-
-        # ROS distro in host
-        self.ros_distro = None
+        self.ros_master = ContainerTools(
+            regex_ros_master_name, service="ros-master", **kwargs
+        )
 
     def validate_ros_installation(self) -> bool:
         """Validate ROS LTS installation in the host.
@@ -104,25 +121,24 @@ class ExposeNetwork:
                     content = file.readlines()
         return content, stats
 
-    def write_file_to_tar(
-        self, tarname: str, tardata: bytes, tarinfo: tarfile.TarInfo
-    ) -> None:
-        """Write a tar file given a name, data and tarinfo.
+    def make_tar(self, tardata: bytes, tarinfo: tarfile.TarInfo) -> bytes:
+        """Build a tar archive in memory given data and tarinfo.
+
+        Nothing is written in the host, so concurrent runs against several stacks do not collide.
 
         Args:
-            tarname: Name of the tarfile.
             tardata: Data to be written into tarfile.
             tarinfo: Info file for tar objects.
 
+        Returns:
+            The tar archive.
+
         """
         with BytesIO() as f_bytesio:
             # Make tarfile with modified info
             with tarfile.open(fileobj=f_bytesio, mode="w:tar") as tar:
                 tar.addfile(tarinfo=tarinfo, fileobj=BytesIO(tardata))
-            f_bytesio.seek(0)
-            # Write tarfile
-            with open(tarname, "wb") as out:
-                out.write(f_bytesio.read())
+            return f_bytesio.getvalue()
 
     def yes_or_no(self, question: str) -> bool:
         """Accepts Y/n input from user.
@@ -162,8 +178,43 @@ class ExposeNetwork:
         tar_info.size = len(data)
         return tar_info
 
-    def execute(self) -> None:
-        """Execute the expose-network behaviour."""
+    def restart_spawner(self) -> None:
+        """Restart the spawner and return once it is ready, exit if it does not come back."""
+        # Continue once the spawner is back, instead of racing its start
+        try:
+            self.spawner.restart(wait=True)
+        except WaitError as e:
+            logger.error(f"{self.spawner.name()} is not ready after the restart: {e}")
+            sys.exit(1)
+
+    def request_restart(self, args: Optional[Namespace] = None) -> None:
+        """Restart the spawner if the user agrees, or as already answered for all the stacks.
+
+        Args:
+            args: A set of parsed args, its restart attribute is the answer if present.
+
+        """
+        spawner_name = self.spawner.name()
+        reply = getattr(args, "restart", None)
+        if reply is None:
+            reply = self.yes_or_no(
+                f"Container {spawner_name} needs to be restarted for changes to take effect. Do you want to restart {spawner_name} now?"
+            )
+        if reply:
+            self.restart_spawner()
+        else:
+            logger.info("Skipping restart!")
+
+    def execute(self, args: Optional[Namespace] = None) -> None:
+        """Execute the expose-network behaviour.
+
+        Args:
+            args: A set of parsed args. If it has a restart attribute, it answers whether to
+                restart the spawner instead of asking, as the handler does for --all-matching.
+
+        """
+        # Find the containers of the stack
+        self.find_containers(args)
         # Get spawner name
         spawner_name = self.spawner.name()
         # Get ip of the spawner and ros-master containers
@@ -220,21 +271,12 @@ class ExposeNetwork:
                 self.entrypoint_filename, modified_content, stats["mode"]
             )
 
-            # Save
-            self.write_file_to_tar(self.temp_ep_tar, modified_content, tar_info)
-
             # Copy modified file to docker
-            data = open(self.temp_ep_tar, "rb").read()
+            data = self.make_tar(modified_content, tar_info)
             self.spawner.put_archive(self.entrypoint_dir, data)
 
             # Request restart
-            reply = self.yes_or_no(
-                f"Container {spawner_name} needs to be restarted for changes to take effect. Do you want to restart {spawner_name} now?"
-            )
-            if reply:
-                self.spawner.restart()
-            else:
-                logger.info("Skipping restart!")
+            self.request_restart(args)
 
         # Check if export is in spawner's bashrc
         # Get bash.rc file
@@ -264,11 +306,8 @@ class ExposeNetwork:
                 self.bashrc_filename, modified_content, stats["mode"]
             )
 
-            # Save
-            self.write_file_to_tar(self.temp_bashrc_tar, modified_content, tar_info)
-
             # Copy modified file to docker
-            data = open(self.temp_bashrc_tar, "rb").read()
+            data = self.make_tar(modified_content, tar_info)
             self.spawner.put_archive(self.bashrc_dir, data)
 
         # Print user actions
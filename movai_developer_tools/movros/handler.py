@@ -2,28 +2,47 @@
 import argparse
 import sys
 from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.container_tools import add_selection_arguments
+from movai_developer_tools.utils.fleet import add_fleet_arguments, execute_on_fleet
 from movai_developer_tools.movros.expose_network.operation_executer import (
     ExposeNetwork,
 )
+from movai_developer_tools.movros.probe.operation_executer import Probe
+from movai_developer_tools.movros.relay.operation_executer import Relay
+from movai_developer_tools.movros.topic_stats.operation_executer import (
+    TopicStatistics,
+)
 
 executors = {
     "expose-network": ExposeNetwork,
+    "probe": Probe,
+    "relay": Relay,
+    "topic-stats": TopicStatistics,
 }
 
 
-def handle():
-    """Entrypoint method of the package. It handles commands to the executers"""
+def make_parser() -> argparse.ArgumentParser:
+    """Return the parser of the handler arguments, also used to generate the shell completion."""
     parser = argparse.ArgumentParser(
         description="This component helps in bridging the gap to ROS when developing with MOV.AI."
     )
 
     parser.add_argument("command", help="Command to be executed.")
 
+    # stack and container selection arguments
+    add_fleet_arguments(parser, hosts=False)
+    add_selection_arguments(parser, container_id=False)
+
     # executor arguments
     for executer in executors.values():
         executer.add_expected_arguments(parser)
 
-    args = parser.parse_args()
+    return parser
+
+
+def handle():
+    """Entrypoint method of the package. It handles commands to the executers"""
+    args = make_parser().parse_args()
 
     try:
         executor = executors[args.command]()
@@ -37,7 +56,19 @@ def handle():
         )
         sys.exit(1)
 
-    executor.execute()
+    # Run on every stack of the docker daemon, one executor per stack
+    if args.all_matching:
+        if args.command == "relay":
+            logger.error("relay serves a single stack, select it with --project")
+            sys.exit(1)
+        if args.command == "expose-network":
+            # The stacks run in worker threads with their output captured, ask once here
+            args.restart = executor.yes_or_no(
+                "Spawners whose docker-entrypoint is changed need to be restarted. Do you want to restart them now?"
+            )
+        sys.exit(execute_on_fleet(executors[args.command], args))
+
+    executor.execute(args)
 
 
 if __name__ == "__main__":
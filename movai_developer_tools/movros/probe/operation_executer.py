@@ -0,0 +1,94 @@
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.container_tools import (
+    ContainerTools,
+    selection_kwargs,
+)
+from movai_developer_tools.utils.ros_network import RosApiError, probe_network
+from argparse import Namespace
+import sys
+
+
+class Probe:
+    """Main class to measure the latency and connectivity from the host to the ROS network of MOV.AI.
+
+    Attributes:
+        ros_master_port (int): Port of the ROS master XML-RPC API.
+        slow_threshold (float): Median latency in milliseconds above which an endpoint is reported as slow.
+
+    """
+
+    def __init__(self) -> None:
+        logger.debug("Probe Init")
+        # ROS master port
+        self.ros_master_port = 11311
+        # Median latency considered slow
+        self.slow_threshold = 50.0
+
+    def execute(self, args: Namespace) -> None:
+        """Execute the probe behaviour.
+
+        Args:
+            args: A set of parsed args.
+
+        """
+        # Find the ros-master container, a pinned container ID does not apply
+        kwargs = selection_kwargs(args)
+        kwargs.pop("container_id", None)
+        ros_master = ContainerTools("^ros-master-.*", service="ros-master", **kwargs)
+        master_uri = f"http://{ros_master.ip()}:{self.ros_master_port}/"
+        logger.info(f"Probing ROS network of {master_uri}")
+
+        try:
+            results = probe_network(master_uri, args.samples, args.timeout)
+        except OSError as e:
+            logger.error(f"ROS master {master_uri} is not reachable from the host: {e}")
+            sys.exit(1)
+        except RosApiError as e:
+            logger.error(str(e))
+            sys.exit(1)
+
+        problems = 0
+        for result in results:
+            histogram = result.histogram
+            print(
+                f"{result.kind:>6} {result.name} ({result.endpoint}): {histogram.summary()}"
+            )
+            if args.histogram and histogram.samples:
+                print(histogram.render())
+            if not histogram.samples:
+                problems += 1
+                logger.error(
+                    f"{result.kind} {result.name} is not reachable: {histogram.errors[-1]}"
+                )
+            elif histogram.percentile(50) > self.slow_threshold:
+                problems += 1
+                logger.warning(
+                    f"{result.kind} {result.name} is slow: median {histogram.percentile(50):.1f}ms"
+                )
+            elif histogram.errors:
+                logger.warning(
+                    f"{result.kind} {result.name} failed {len(histogram.errors)} times: {histogram.errors[-1]}"
+                )
+        if problems:
+            sys.exit(1)
+
+    @staticmethod
+    def add_expected_arguments(parser):
+        """Method exposed for the handle to append our executer arguments."""
+        parser.add_argument(
+            "--samples",
+            help="Number of round trips measured per endpoint (probe), defaults to 20",
+            type=int,
+            default=20,
+        )
+        parser.add_argument(
+            "--timeout",
+            help="Network timeout in seconds (probe, topic-stats), defaults to 2",
+            type=float,
+            default=2.0,
+        )
+        parser.add_argument(
+            "--histogram",
+            help="Print the latency histogram of every endpoint (probe)",
+            action="store_true",
+        )
@@ -0,0 +1,67 @@
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.container_tools import (
+    ContainerTools,
+    selection_kwargs,
+)
+from movai_developer_tools.utils.ros_relay import (
+    RosRelay,
+    network_host_map,
+    run_relay,
+)
+from argparse import Namespace
+
+
+class Relay:
+    """Main class to reach the ROS network of MOV.AI from the host through a userspace relay.
+
+    Unlike expose-network, nothing changes in the containers and no container restarts.
+
+    Attributes:
+        ros_master_port (int): Port of the ROS master XML-RPC API.
+
+    """
+
+    def __init__(self) -> None:
+        logger.debug("Relay Init")
+        # ROS master port
+        self.ros_master_port = 11311
+
+    def execute(self, args: Namespace) -> None:
+        """Execute the relay behaviour.
+
+        Args:
+            args: A set of parsed args.
+
+        """
+        # Find the ros-master container, a pinned container ID does not apply
+        kwargs = selection_kwargs(args)
+        kwargs.pop("container_id", None)
+        ros_master = ContainerTools("^ros-master-.*", service="ros-master", **kwargs)
+        relay = RosRelay(
+            (ros_master.ip(), self.ros_master_port),
+            listen_host=args.relay_host,
+            master_port=args.relay_port,
+            host_map=network_host_map(ros_master.container),
+        )
+        logger.info(
+            f"Relaying ROS master {ros_master.ip()}:{self.ros_master_port}, in the host run:"
+        )
+        print(f"export ROS_MASTER_URI=http://{args.relay_host}:{args.relay_port}/")
+        # Containers reach host nodes through the gateway of their network
+        print(f"export ROS_IP={ros_master.gateway()}")
+        run_relay(relay)
+
+    @staticmethod
+    def add_expected_arguments(parser):
+        """Method exposed for the handle to append our executer arguments."""
+        parser.add_argument(
+            "--relay-host",
+            help="Address the relay listens on (relay), defaults to 127.0.0.1",
+            default="127.0.0.1",
+        )
+        parser.add_argument(
+            "--relay-port",
+            help="Port of the relayed ROS master (relay), defaults to 11311",
+            type=int,
+            default=11311,
+        )
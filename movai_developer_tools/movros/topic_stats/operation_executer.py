@@ -0,0 +1,79 @@
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.container_tools import (
+    ContainerTools,
+    selection_kwargs,
+)
+from movai_developer_tools.utils.ros_network import RosApiError
+from movai_developer_tools.utils.topic_stats import monitor_topics
+from argparse import Namespace
+import sys
+
+
+class TopicStatistics:
+    """Main class to measure the rate, bandwidth and jitter of the ROS topics of MOV.AI from the host.
+
+    Attributes:
+        ros_master_port (int): Port of the ROS master XML-RPC API.
+
+    """
+
+    def __init__(self) -> None:
+        logger.debug("TopicStatistics Init")
+        # ROS master port
+        self.ros_master_port = 11311
+
+    def execute(self, args: Namespace) -> None:
+        """Execute the topic-stats behaviour, exit with 1 if a topic given with --topic received no messages.
+
+        Args:
+            args: A set of parsed args.
+
+        """
+        # Find the ros-master container, a pinned container ID does not apply
+        kwargs = selection_kwargs(args)
+        kwargs.pop("container_id", None)
+        ros_master = ContainerTools("^ros-master-.*", service="ros-master", **kwargs)
+        master_uri = f"http://{ros_master.ip()}:{self.ros_master_port}/"
+        logger.info(
+            f"Measuring {', '.join(args.topic) if args.topic else 'every topic'} of {master_uri} for {args.duration:g}s"
+        )
+
+        try:
+            results = monitor_topics(
+                master_uri, args.topic, args.duration, args.timeout
+            )
+        except OSError as e:
+            logger.error(f"ROS master {master_uri} is not reachable from the host: {e}")
+            sys.exit(1)
+        except RosApiError as e:
+            logger.error(str(e))
+            sys.exit(1)
+
+        silent = 0
+        for stats in results:
+            print(f"{stats.topic} [{stats.topic_type}]: {stats.summary(args.duration)}")
+            for error in stats.errors:
+                logger.warning(f"{stats.topic} {error}")
+            if not stats.messages:
+                silent += 1
+        # Every published topic includes latched and on-demand ones, only the requested topics must publish
+        if silent and args.topic:
+            logger.error(f"{silent} topics received no messages")
+            sys.exit(1)
+        if silent:
+            logger.info(f"{silent} topics received no messages")
+
+    @staticmethod
+    def add_expected_arguments(parser):
+        """Method exposed for the handle to append our executer arguments."""
+        parser.add_argument(
+            "--topic",
+            help="Topic to measure, may be repeated, defaults to every published topic (topic-stats)",
+            action="append",
+        )
+        parser.add_argument(
+            "--duration",
+            help="Measurement duration in seconds (topic-stats), defaults to 5",
+            type=float,
+            default=5.0,
+        )
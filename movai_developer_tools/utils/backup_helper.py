@@ -1,10 +1,63 @@
 """Module that contains a set of functions to ease interacting with the MOV.AI backup tool"""
 from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.backup_report import ManifestOutcome, RunReport
 from movai_developer_tools.utils.container_tools import ContainerTools
+from movai_developer_tools.utils.fast_backup import (
+    export_manifests,
+    import_manifests,
+    layout_differences,
+    manifest_objects,
+    object_keys,
+)
+from movai_developer_tools.utils.manifest_index import ManifestIndex
+from movai_developer_tools.utils.manifest_schedule import (
+    DurationHistory,
+    longest_first,
+    parse_shard,
+    shards,
+)
+from movai_developer_tools.utils.metadata_index import MetadataIndex, parse_object
+from movai_developer_tools.utils.metadata_status import (
+    HASH_SCRIPT,
+    ObjectStatus,
+    compare,
+    disk_digests,
+    log_statuses,
+)
+from movai_developer_tools.utils.package_state import (
+    InstalledManifests,
+    parse_query,
+    query_command,
+    save_command,
+)
+from movai_developer_tools.utils.profile_report import (
+    RUNNER,
+    collapsed_stacks,
+    extract_profiles,
+    hotspots,
+    merge_profiles,
+    write_collapsed,
+)
+from movai_developer_tools.utils.redis_client import RedisClient, RedisError
+from movai_developer_tools.utils.snapshot_store import SnapshotStore
+from movai_developer_tools.utils.stats_sampler import StatsSampler
+from movai_developer_tools.utils.tree_diff import ChunkStream, apply_tar_stream
+import io
+import json
+import os
 import pathlib
+import re
 import sys
+import tarfile
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
+# Marks the exit code of every backup tool run of run_staged_backup in the exec output
+EXIT_MARKER = "movbkp-exit:"
+EXIT_REGEX = re.compile(rf"^{EXIT_MARKER}(\d+):(-?\d+)$", re.MULTILINE)
+
 
 class BackupHelper:
     """Set of functions to help export/import of metadata objects when developing with MOV.AI platform.
@@ -14,16 +67,29 @@ class BackupHelper:
         metadata_install_dir: Metadata install location inside the spawner container.
         manifest_regex: Manifest file name used for listing metadata type and name (Flow:my_flow).
         dry_run: If True, the actions taken by the backup tool are not destructive.
+        docker_host: URL of the docker daemon running the spawner. Defaults to the environment.
+            The manifests are read in this host, so the userspace of a remote spawner must be
+            mounted here at the same path.
+        container_id: ID of the spawner container, instead of searching it by name.
+        project: Docker compose project of the spawner container, instead of searching it by name.
+        session: If True, the commands run in the spawner go through a persistent exec session,
+            open while the helper is used as a context manager.
+        objects: TYPE:NAME objects, if given only the manifests listing them are used.
+        index_file: Metadata index used to find the manifests listing the objects.
 
     Attributes:
         userspace_bind_dir (str): The directory where the userspace is mounted. Defaults to ``"/opt/mov.ai/user"``.
         metadata_install_dir (str): Metadata install location inside the spawner container.
         manifest_regex (str): Manifest file name used for listing metadata type and name (Flow:my_flow).
         regex_spawner_name (str): Regular expression for finding the spawner container.
+        manifest_index (ManifestIndex): Manifests parsed in the host, set by get_manifest_index.
         spawner_cls (ContainerTools): Container object of the spawner container.
         userspace_dir (str): Userspace directory in the host which is mounted inside the spawner container.
         valid_commands (set): A set of accepted commands by backup tool.
         dry_run (bool): If True, the actions taken by the backup tool are not destructive.
+        redis_port (int): Port of the Redis of the platform, used by fast_action.
+        docker_host (str): URL of the docker daemon running the spawner, None for the environment.
+        session (bool): If True, entering the helper starts a persistent exec session in the spawner.
 
     """
 
@@ -33,6 +99,12 @@ class BackupHelper:
         userspace_bind_dir: str = "/opt/mov.ai/user",
         metadata_install_dir: str = "/opt/ros/${ROS_DISTRO}/share",
         manifest_regex: str = "manifest.txt",
+        docker_host: Optional[str] = None,
+        container_id: Optional[str] = None,
+        project: Optional[str] = None,
+        session: bool = False,
+        objects: Optional[list] = None,
+        index_file: Optional[str] = None,
     ) -> None:
         # Container userspace bind location
         self.userspace_bind_dir = userspace_bind_dir
@@ -44,31 +116,108 @@ class BackupHelper:
         # Reg expressions for finding the spawner container
         regex_spawner_name = "^spawner-.*"
         # Instanciate spawner container class
-        self.spawner_cls = ContainerTools(regex_spawner_name)
+        self.spawner_cls = ContainerTools(
+            regex_spawner_name,
+            docker_host=docker_host,
+            container_id=container_id,
+            project=project,
+            service="spawner",
+        )
+        # One exec for all the commands of the run instead of one per command, see __enter__
+        self.session = session
         # Get userspace directory
         self.userspace_dir = self.spawner_cls.userspace_dir()
         # Set of accepted commands
         self.valid_commands = {"import", "export", "remove", "re-install"}
         # Dry run parameter
         self.dry_run = dry_run
+        self.docker_host = docker_host
+        # The redis-master container of the stack is found like the spawner
+        self.redis_port = 6379
+        self._redis_selection = {"docker_host": docker_host, "project": project}
+        # Objects selecting the manifests instead of the directory alone
+        self.objects = objects or []
+        self.index_file = index_file
+        # Manifests parsed in the host, shared by every action of this instance
+        self.manifest_index = None
+        self._manifest_index_dir = None
+        # If PYTHONPATH is not set, scenes fail to export
+        self.backup_env = {
+            "PYTHONPATH": "/opt/mov.ai/app:/opt/ros/melodic/lib/python3/dist-packages:/opt/ros/noetic/lib/python3/dist-packages"
+        }
+
+    def __enter__(self) -> "BackupHelper":
+        if self.session:
+            self.spawner_cls.start_session()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        # Also on sys.exit, so the worker exec and its socket do not outlive the action
+        self.spawner_cls.close_session()
+
+    def get_installed_manifests(self) -> InstalledManifests:
+        """Return the manifests installed by packages in the container, with their owning package and version.
+
+        A single exec runs one dpkg -S for all the manifests and one dpkg-query for the versions.
+
+        Returns:
+            An InstalledManifests, with the package versions imported by the last re-install.
+
+        """
+        cmd = query_command(self.metadata_install_dir, self.manifest_regex)
+        _, (stdout, _) = self.spawner_cls.exec_run(cmd=cmd, demux=True)
+        try:
+            return parse_query((stdout or b"").decode())
+        except ValueError as e:
+            logger.error(f"Could not list the installed packages: {e}")
+            sys.exit(1)
 
-    def get_installed_manifest_files(self) -> map:
-        """Return a map object of paths of manifest files that are already installed by packages in the container.
+    def get_installed_manifest_files(
+        self, installed: InstalledManifests, reinstall_all: bool = False
+    ) -> list:
+        """Return the paths of installed manifest files to re-install.
+
+        Args:
+            installed: Installed manifests, see get_installed_manifests.
+            reinstall_all: If True, every installed manifest. Otherwise only the manifests of
+                packages added or upgraded since the last re-install.
 
         Returns:
-            A map of paths inside the spawner container.
+            A list of quoted paths inside the spawner container.
 
         """
-        # Make required args for exec_run method
-        cmd = f"find {self.metadata_install_dir} -name {self.manifest_regex}"
-        # Execute command with exec_run command
-        _, manifest_files_in_spawner = self.spawner_cls.exec_run(cmd=cmd)
+        manifests = sorted(installed.owners) if reinstall_all else installed.changed()
+        logger.info(
+            f"Re-installing {len(manifests)} of {len(installed.owners)} installed manifests"
+            + (
+                ""
+                if reinstall_all
+                else ", from packages added or upgraded since the last re-install"
+            )
+        )
         # Add fix for: !---Thenameofthepackage.--: No such file or directory error
         # Quote every manifest paths
-        manifest_files_in_spawner = list(
-            map(lambda x: "'" + x + "'", manifest_files_in_spawner.decode().split())
-        )
-        return manifest_files_in_spawner
+        return list(map(lambda x: "'" + x + "'", manifests))
+
+    def save_imported_packages(
+        self, installed: Optional[InstalledManifests], report: RunReport
+    ) -> None:
+        """Record in the spawner the versions of the packages whose manifests were all re-installed.
+
+        Args:
+            installed: Installed manifests, see get_installed_manifests. Nothing is done if None.
+            report: Report of the re-install run.
+
+        """
+        if installed is None or self.dry_run:
+            return
+        run = [outcome.manifest.strip("'") for outcome in report.manifests]
+        failed = {
+            outcome.manifest.strip("'")
+            for outcome in report.manifests
+            if outcome.failed
+        }
+        self.spawner_cls.exec_run(cmd=save_command(installed.updated(run, failed)))
 
     def get_manifest_files_in_host(self, dir: pathlib.PosixPath) -> map:
         """Return a map object of manifest files found in the host.
@@ -80,6 +229,14 @@ class BackupHelper:
             A map object of manifest file paths found in recursive search from dir.
 
         """
+        # The manifests are read in this host, the userspace of a spawner on another
+        # docker daemon must be shared at the same path (e.g. NFS)
+        if not os.path.isdir(self.userspace_dir):
+            logger.error(
+                f"The userspace({self.userspace_dir}) of the spawner{' on ' + self.docker_host if self.docker_host else ''} "
+                "is not in this host. The manifests are read in the host, mount the userspace at the same path or run movbkp on the host of the spawner."
+            )
+            sys.exit(1)
         # Get all manifest files recursively in the host
         # Validate if the working directory is inside the userspace_dir
         work_dir = str(dir)
@@ -89,12 +246,97 @@ class BackupHelper:
             )
             sys.exit(1)
 
+        # Look the manifests listing the objects up in the index of the working directory
+        if self.objects:
+            try:
+                entries = [parse_object(text) for text in self.objects]
+            except ValueError as e:
+                logger.error(str(e))
+                sys.exit(1)
+            index = MetadataIndex(self.index_file)
+            index.update(work_dir)
+            manifests = index.manifests(entries, work_dir)
+            index.close()
+            logger.info(
+                f"{len(manifests)} manifests list {', '.join(self.objects)} in {work_dir}"
+            )
+            return iter(manifests)
+
         # Search for manifest files in working_directory
         manifest_files_in_host = map(
             lambda x: str(x.absolute()), dir.rglob(self.manifest_regex)
         )
         return manifest_files_in_host
 
+    def working_directory(self, work_dir: Optional[str] = None) -> pathlib.Path:
+        """Return the resolved directory used to search for manifests.
+
+        Args:
+            work_dir: Directory given by the user, CWD is used if not provided.
+
+        Returns:
+            A resolved Path object.
+
+        """
+        # If user provides directory arg use that as root dir, else use CWD
+        if work_dir:
+            return pathlib.Path(work_dir).resolve()
+        return pathlib.Path.cwd().resolve()
+
+    def to_spawner_path(self, host_path: str) -> str:
+        """Map a path inside the host userspace to the path where it is mounted in the spawner.
+
+        Args:
+            host_path: Path in the host.
+
+        Returns:
+            The path inside the spawner container.
+
+        """
+        return host_path.replace(self.userspace_dir, self.userspace_bind_dir)
+
+    def get_manifest_index(self, work_dir: Optional[str] = None) -> ManifestIndex:
+        """Parse every manifest found in the working directory, once per directory.
+
+        Args:
+            work_dir: Working directory.
+
+        Returns:
+            The ManifestIndex of the working directory.
+
+        """
+        working_directory = self.working_directory(work_dir)
+        if self.manifest_index is None or self._manifest_index_dir != working_directory:
+            self.manifest_index = ManifestIndex(
+                self.get_manifest_files_in_host(working_directory)
+            )
+            self._manifest_index_dir = working_directory
+        return self.manifest_index
+
+    def get_validated_manifests(
+        self, command: str, work_dir: Optional[str] = None
+    ) -> list:
+        """Return the manifests of the working directory that can be used for a command, exit if any is invalid.
+
+        Malformed manifests, and for import missing metadata directories, abort before anything
+        is executed in the spawner. Empty manifests and entries without a metadata file are warned about.
+
+        Args:
+            command: Backup tool action.
+            work_dir: Working directory.
+
+        Returns:
+            A list of Manifest objects.
+
+        """
+        manifest_index = self.get_manifest_index(work_dir)
+        if not manifest_index.validate(command):
+            logger.error(
+                "Invalid manifests found, nothing was executed in the spawner."
+            )
+            sys.exit(1)
+        return manifest_index.usable()
+
     def get_manifest_files_in_spawner(self, work_dir: pathlib.PosixPath) -> map:
         """Get a list of manifest file locations inside the spawner container given working directory.
 
@@ -107,20 +349,39 @@ class BackupHelper:
         """
         manifest_files_in_host = self.get_manifest_files_in_host(work_dir)
         # Map paths from host to the ones mounted in the container
-        manifest_files_in_spawner = map(
-            lambda x: x.replace(self.userspace_dir, self.userspace_bind_dir),
-            manifest_files_in_host,
-        )
+        manifest_files_in_spawner = map(self.to_spawner_path, manifest_files_in_host)
         return manifest_files_in_spawner
 
     def iterative_backup_action(
-        self, command: str, work_dir: Optional[str] = None
+        self,
+        command: str,
+        work_dir: Optional[str] = None,
+        report_file: Optional[str] = None,
+        stats_file: Optional[str] = None,
+        profile_dir: Optional[str] = None,
+        profile_top: int = 25,
+        shard: Optional[str] = None,
+        history_file: Optional[str] = None,
+        reinstall_all: bool = False,
     ) -> None:
         """Iteratively import/export/remove/re-install mov.ai metadata mentioned in manifest.txt files.
 
+        The output of every backup tool execution is parsed into per-object outcomes,
+        failures are logged and the process exits with an error if any manifest failed.
+
         Args:
             command: Action to be taken. Options are in self.valid_commands.
             work_dir: Working directory.
+            report_file: If given, a JSON report of the run is written to this path.
+            stats_file: If given, the docker stats of the spawner are sampled during the run and written
+                to this path, and the load of every manifest is logged and added to the report.
+            profile_dir: If given, every backup tool execution runs under cProfile and the profiles
+                are written to this host directory, merged and reported, see collect_profiles.
+            profile_top: Number of functions shown in the hotspot report.
+            shard: ``i/N`` to only run the i-th of N shards, see manifest_schedule.shards.
+            history_file: Path of the duration history used to order the manifests, longest first.
+            reinstall_all: If True, re-install imports the manifests of every installed package,
+                not only of the packages added or upgraded since the last re-install.
 
         """
         # If command not valid, exit
@@ -128,22 +389,168 @@ class BackupHelper:
             logger.error(f"Command({command}) is not valid, exiting.")
             sys.exit(1)
 
-        # If command is re-install bypass getting manfiest files in work_dir or CWD
-        # In re-install get list inside the install location in spawner
+        manifest_files_in_spawner, installed = self.select_manifests(
+            command, work_dir, reinstall_all
+        )
+        # Re-install is not supported by the backup tool directly, it is actually import
         if command == "re-install":
-            manifest_files_in_spawner = self.get_installed_manifest_files()
-            # Re-install is not supported by the backup tool directly, it is actually import
             command = "import"
-        else:
-            # If user provides directory arg use that as root dir, else use CWD
-            if work_dir:
-                working_directory = pathlib.Path(work_dir).resolve()
+
+        # Longest manifests first, the duration of every run is recorded for the next ones
+        history = DurationHistory(history_file)
+        manifest_files_in_spawner = self.schedule_manifests(
+            manifest_files_in_spawner, history, shard
+        )
+
+        # Per-manifest outcomes of the run
+        report = RunReport(command)
+        sampler = self.start_stats(stats_file)
+        profile_staging_dir = (
+            self.start_profiling() if profile_dir and not self.dry_run else None
+        )
+
+        # Import metadata using each manifest
+        for i, manifest in enumerate(manifest_files_in_spawner):
+            # Log
+            logger.info(f"{command.upper()}ING metadata present in {manifest}")
+
+            # Exec command for the container
+            backup_tool = "python3 -m tools.backup"
+            if profile_staging_dir:
+                backup_tool = f"python3 {profile_staging_dir}/runner.py {profile_staging_dir}/{i}.prof tools.backup"
+            exec_cmd = self.backup_command(command, manifest, backup_tool)
+
+            # Execute if not dry run
+            if not self.dry_run:
+                start, wall_start = time.monotonic(), time.time()
+                exit_code, (stdout, stderr) = self.spawner_cls.exec_run(
+                    cmd=exec_cmd, environment=self.backup_env, demux=True
+                )
+                outcome = ManifestOutcome(
+                    manifest,
+                    command,
+                    exit_code,
+                    stdout,
+                    stderr,
+                    time.monotonic() - start,
+                )
+                self.record_load(sampler, outcome, wall_start)
+                report.add(outcome)
+                if not outcome.failed:
+                    history.record(manifest, outcome.duration)
             else:
-                working_directory = pathlib.Path.cwd().resolve()
-            # Get manifest files in the spawner using working_directory
-            manifest_files_in_spawner = self.get_manifest_files_in_spawner(
-                working_directory
+                logger.info("Dry run mode, please remove the dry run arg to execute")
+
+        if sampler:
+            sampler.stop()
+        if not self.dry_run:
+            history.save()
+        self.save_imported_packages(installed, report)
+        if profile_staging_dir:
+            self.collect_profiles(
+                profile_staging_dir, profile_dir, manifest_files_in_spawner, profile_top
             )
+        self.finish_report(report, report_file)
+
+    def select_manifests(
+        self,
+        command: str,
+        work_dir: Optional[str] = None,
+        reinstall_all: bool = False,
+    ) -> tuple:
+        """Return the manifests a backup command runs on.
+
+        Args:
+            command: Action to be taken. Options are in self.valid_commands.
+            work_dir: Working directory.
+            reinstall_all: If True, re-install every installed package, see get_installed_manifest_files.
+
+        Returns:
+            A tuple of (manifest paths in the spawner, InstalledManifests), the latter is None unless re-install.
+
+        """
+        # If command is re-install bypass getting manfiest files in work_dir or CWD
+        # In re-install get list inside the install location in spawner
+        if command == "re-install":
+            installed = self.get_installed_manifests()
+            return (
+                self.get_installed_manifest_files(installed, reinstall_all),
+                installed,
+            )
+        # Get validated manifest files in the spawner using working_directory
+        manifests = [
+            self.to_spawner_path(manifest.path)
+            for manifest in self.get_validated_manifests(command, work_dir)
+        ]
+        return manifests, None
+
+    def start_profiling(self) -> str:
+        """Create a staging directory in the spawner with the profiling runner of the backup tool.
+
+        Returns:
+            The path of the staging directory inside the spawner.
+
+        """
+        staging_dir = self.make_staging_dir("profile")
+        self.spawner_cls.put_files(staging_dir, {"runner.py": RUNNER.encode()})
+        return staging_dir
+
+    def collect_profiles(
+        self, staging_dir: str, profile_dir: str, manifests: list, top: int = 25
+    ) -> None:
+        """Pull the profiles of a run back to the host, merge them and report the hotspots.
+
+        The profile of manifest number ``i`` is written to ``<profile_dir>/<i>.prof``, listed in
+        ``profiles.json``. The merged profile is written to ``merged.prof`` (pstats, snakeviz) and
+        as collapsed stacks to ``merged.collapsed`` (speedscope, flamegraph.pl).
+
+        Args:
+            staging_dir: Staging directory inside the spawner, removed afterwards.
+            profile_dir: Directory in the host.
+            manifests: Manifest paths inside the spawner, in execution order.
+            top: Number of functions shown in the hotspot report.
+
+        """
+        profile_dir = pathlib.Path(profile_dir)
+        try:
+            bits, _ = self.spawner_cls.get_archive(staging_dir)
+            paths = extract_profiles(bits, profile_dir)
+        finally:
+            self.spawner_cls.exec_run(cmd=f"rm -rf {staging_dir}")
+        if not paths:
+            logger.warning("No profiles were written by the backup tool")
+            return
+        with open(profile_dir / "profiles.json", "w") as file:
+            json.dump(
+                {path.name: manifests[int(path.stem)] for path in paths},
+                file,
+                indent=1,
+            )
+        stats = merge_profiles(paths)
+        stats.dump_stats(str(profile_dir / "merged.prof"))
+        write_collapsed(collapsed_stacks(stats), profile_dir / "merged.collapsed")
+        print(hotspots(stats, top))
+        logger.info(
+            f"Profiles of {len(paths)} manifests written to {profile_dir}, merged into merged.prof and merged.collapsed"
+        )
+
+    def backup_command(
+        self, command: str, manifest: str, backup_tool: str = "python3 -m tools.backup"
+    ) -> str:
+        """Return the shell command that runs the backup tool over a manifest in the spawner.
+
+        Args:
+            command: Backup tool action.
+            manifest: Manifest path in the spawner.
+            backup_tool: Command that runs the backup tool module.
+
+        Returns:
+            The shell command.
+
+        """
+        # Get manifest file directory and metadata directory (project, -p arg on backup tool)
+        manifest_dir_in_spawner = manifest.replace("/manifest.txt", "")
+        metadata_dir = manifest_dir_in_spawner + "/metadata"
 
         # Backup options. -i for individual, -c for clearing existing metadata, -f for force (don't stop on error)
         backup_opts = "-i -c -f"
@@ -151,30 +558,579 @@ class BackupHelper:
         if command == "remove":
             backup_opts = backup_opts.replace(" -f", "")
 
-        # Import metadata using each manifest
-        for manifest in manifest_files_in_spawner:
-            # Log
-            logger.info(f"{command.upper()}ING metadata present in {manifest}")
-            # Get manifest file directory and metadata directory (project, -p arg on backup tool)
-            manifest_dir_in_spawner = manifest.replace("/manifest.txt", "")
-            metadata_dir = manifest_dir_in_spawner + "/metadata"
+        exec_cmd = (
+            f"{backup_tool} -p {metadata_dir} -a {command} -m {manifest} {backup_opts}"
+        )
+        # Bypass [Y/n/[A]ll/[K]eep all] command for export command
+        if command == "export":
+            exec_cmd = "echo 'A' | " + exec_cmd
+        return exec_cmd
 
-            # If PYTHONPATH is not set, scenes fail to export
-            env = {
-                "PYTHONPATH": "/opt/mov.ai/app:/opt/ros/melodic/lib/python3/dist-packages:/opt/ros/noetic/lib/python3/dist-packages"
-            }
+    def schedule_manifests(
+        self, manifests: list, history: DurationHistory, shard: Optional[str] = None
+    ) -> list:
+        """Order manifests longest first by their recorded durations, keeping only one shard if requested.
 
-            # Exec command for the container
-            exec_cmd = f"python3 -m tools.backup -p {metadata_dir} -a {command} -m {manifest} {backup_opts}"
+        Args:
+            manifests: Manifest paths in the spawner.
+            history: Duration history.
+            shard: ``i/N`` shard specification, see parse_shard.
+
+        Returns:
+            The manifests to run, in order.
+
+        """
+        if not shard:
+            return longest_first(manifests, history)
+        try:
+            index, count = parse_shard(shard)
+        except ValueError as e:
+            logger.error(f"Invalid --shard: {e}")
+            sys.exit(1)
+        selected = shards(manifests, history, count)[index - 1]
+        total = sum(map(history.estimate, manifests))
+        logger.info(
+            f"Shard {index}/{count}: {len(selected)} of {len(manifests)} manifests, "
+            f"estimated {sum(map(history.estimate, selected)):.0f}s of {total:.0f}s in total"
+        )
+        return selected
+
+    def start_stats(self, stats_file: Optional[str]) -> Optional[StatsSampler]:
+        """Start sampling the docker stats of the spawner if a stats file is given.
+
+        Args:
+            stats_file: Path where every sample is written, as CSV.
+
+        Returns:
+            The started StatsSampler, or None.
+
+        """
+        if not stats_file or self.dry_run:
+            return None
+        return StatsSampler(
+            {self.spawner_cls.name(): self.spawner_cls.container},
+            capacity=3600,
+            output=stats_file,
+        ).start()
+
+    def record_load(
+        self,
+        sampler: Optional[StatsSampler],
+        outcome: ManifestOutcome,
+        wall_start: float,
+    ) -> None:
+        """Attach the spawner load sampled during a backup tool execution to its outcome and log it.
+
+        Args:
+            sampler: The running StatsSampler, nothing is done if None.
+            outcome: Outcome of the execution.
+            wall_start: Unix timestamp of the start of the execution.
+
+        """
+        if sampler is None:
+            return
+        outcome.load = sampler.window(
+            self.spawner_cls.name(), wall_start, wall_start + outcome.duration
+        )
+        logger.info(
+            f"{outcome.manifest} took {outcome.duration:.1f}s, spawner cpu% mean={outcome.load['cpu_mean']} "
+            f"max={outcome.load['cpu_max']}, mem max={outcome.load['mem_max_mb']} MiB ({outcome.load['samples']} samples)"
+        )
+
+    def finish_report(self, report: RunReport, report_file: Optional[str]) -> None:
+        """Log the summary of a run, write the report if requested and exit with an error if anything failed.
+
+        Args:
+            report: Report of the run.
+            report_file: If given, the report is written as JSON to this path.
+
+        """
+        if report.manifests:
+            logger.info(f"Summary: {report.summary()}")
+        if report_file:
+            report.write(report_file)
+        if report.failed:
+            sys.exit(1)
+
+    def bulk_remove_action(
+        self, work_dir: Optional[str] = None, report_file: Optional[str] = None
+    ) -> None:
+        """Remove the metadata of all manifests found in the working directory with a single backup tool execution.
+
+        The entries of every manifest are merged and deduplicated into one manifest that is
+        copied to the spawner, so the backup tool connects to the database once and removes
+        everything in one process instead of once per manifest.
+
+        Args:
+            work_dir: Working directory.
+            report_file: If given, a JSON report of the run is written to this path.
+
+        """
+        manifests = self.get_validated_manifests("remove", work_dir)
+        # Merged entries, in the order in which they were found
+        entries = list(map(str, self.manifest_index.entries()))
+
+        logger.info(
+            f"REMOVING {len(entries)} metadata objects from {len(manifests)} manifests"
+        )
+        if self.dry_run:
+            for entry in entries:
+                print(entry)
+            logger.info("Dry run mode, please remove the dry run arg to execute")
+            return
+        if not entries:
+            return
+
+        report = RunReport("remove")
+        staging_dir = self.make_staging_dir("remove")
+        try:
+            self.spawner_cls.put_files(
+                staging_dir, {"manifest.txt": "\n".join(entries).encode() + b"\n"}
+            )
+            exec_cmd = f"python3 -m tools.backup -p {staging_dir} -a remove -m {staging_dir}/manifest.txt -i -c"
+            start = time.monotonic()
+            exit_code, (stdout, stderr) = self.spawner_cls.exec_run(
+                cmd=exec_cmd, environment=self.backup_env, demux=True
+            )
+            report.add(
+                ManifestOutcome(
+                    f"{len(manifests)} merged manifests",
+                    "remove",
+                    exit_code,
+                    stdout,
+                    stderr,
+                    time.monotonic() - start,
+                )
+            )
+        finally:
+            self.spawner_cls.exec_run(cmd=f"rm -rf {staging_dir}")
+
+        self.finish_report(report, report_file)
+
+    def make_staging_dir(self, name: str) -> str:
+        """Create a temporary directory inside the spawner.
+
+        Args:
+            name: Name included in the directory name.
+
+        Returns:
+            The path of the directory inside the spawner.
+
+        """
+        _, staging_dir = self.spawner_cls.exec_run(
+            cmd=f"mktemp -d /tmp/movbkp-{name}-XXXXXX"
+        )
+        return staging_dir.decode().strip()
+
+    def run_staged_backup(
+        self, command: str, staging_dir: str, manifests_in_spawner: list
+    ) -> list:
+        """Run the backup tool over several manifests with a single exec, using a staging area as project directory.
+
+        Manifest number ``i`` uses ``<staging_dir>/<i>/metadata`` as project directory and logs to ``<staging_dir>/<i>.log``.
+
+        Args:
+            command: Backup tool action, import or export.
+            staging_dir: Staging directory inside the spawner.
+            manifests_in_spawner: Manifest paths inside the spawner.
+
+        Returns:
+            A list with an exit code per manifest, -1 for the manifests the backup tool did not complete.
+
+        """
+        backup_cmds = []
+        for i, manifest in enumerate(manifests_in_spawner):
+            backup_cmd = f"python3 -m tools.backup -p {staging_dir}/{i}/metadata -a {command} -m '{manifest}' -i -c -f > {staging_dir}/{i}.log 2>&1; echo {EXIT_MARKER}{i}:$?"
             # Bypass [Y/n/[A]ll/[K]eep all] command for export command
             if command == "export":
-                exec_cmd = "echo 'A' | " + exec_cmd
+                backup_cmd = "echo 'A' | " + backup_cmd
+            backup_cmds.append(backup_cmd)
+        _, (stdout, _) = self.spawner_cls.exec_run(
+            cmd="; ".join(backup_cmds), environment=self.backup_env, demux=True
+        )
+        # Only the marked lines are exit codes, anything else printed by the shell is ignored
+        found = {
+            int(match.group(1)): int(match.group(2))
+            for match in EXIT_REGEX.finditer((stdout or b"").decode(errors="replace"))
+        }
+        exit_codes = []
+        for i, manifest in enumerate(manifests_in_spawner):
+            if i not in found:
+                logger.error(f"Backup tool {command} of {manifest} did not complete")
+            exit_codes.append(found.get(i, -1))
+        # Show the end of the backup tool log of the failed manifests
+        for i, exit_code in enumerate(exit_codes):
+            if exit_code > 0:
+                _, log = self.spawner_cls.exec_run(
+                    cmd=f"tail -n 20 {staging_dir}/{i}.log"
+                )
+                logger.error(
+                    f"Backup tool {command} of {manifests_in_spawner[i]} exited with code {exit_code}:\n{log.decode()}"
+                )
+        return exit_codes
 
-            # Execute if not dry run
-            if not self.dry_run:
-                self.spawner_cls.exec_run(cmd=exec_cmd, environment=env)
+    def diff_export_action(self, work_dir: Optional[str] = None) -> None:
+        """Export metadata into a staging area in the spawner and only write the files whose content changed.
+
+        The staging area is streamed back as a tar archive and compared by hash against the
+        metadata directory next to each manifest. Changed files are replaced atomically and
+        files that are no longer exported are removed.
+
+        Args:
+            work_dir: Working directory.
+
+        """
+        for manifest in self.get_validated_manifests("export", work_dir):
+            manifest = manifest.path
+            logger.info(f"EXPORTING metadata present in {manifest}")
+            metadata_dir = pathlib.Path(manifest).parent / "metadata"
+            # Staging area inside the spawner, removed after being streamed back
+            staging_dir = self.make_staging_dir("export")
+            try:
+                exit_codes = self.run_staged_backup(
+                    "export", staging_dir, [self.to_spawner_path(manifest)]
+                )
+                if exit_codes != [0]:
+                    logger.error(f"Leaving {metadata_dir} untouched")
+                    continue
+                bits, _ = self.spawner_cls.get_archive(f"{staging_dir}/0/metadata")
+                changes = apply_tar_stream(bits, metadata_dir, dry_run=self.dry_run)
+            finally:
+                self.spawner_cls.exec_run(cmd=f"rm -rf {staging_dir}")
+            changes.log(str(metadata_dir))
+        if self.dry_run:
+            logger.info(
+                "Dry run mode, please remove the dry run arg to write the changes"
+            )
+
+    def status_action(
+        self, work_dir: Optional[str] = None, show_in_sync: bool = True
+    ) -> list:
+        """Print which objects of the manifests in the working directory differ between the userspace and the platform.
+
+        All manifests are exported into a staging area with a single exec, and the exported files
+        are hashed in the spawner, so only their digests are sent back. The metadata files in the
+        host are hashed meanwhile. Digests ignore JSON formatting and key order.
+        Manifests whose export failed are reported as export-failed and the process exits with an error.
+
+        Args:
+            work_dir: Working directory.
+            show_in_sync: If False, objects in sync are only counted.
+
+        Returns:
+            A list of ObjectStatus.
+
+        """
+        manifests = self.get_validated_manifests("export", work_dir)
+        if not manifests:
+            logger.info("No manifests found")
+            return []
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            # Hash the userspace while the platform is being exported
+            disk = pool.map(disk_digests, manifests)
+            staging_dir = self.make_staging_dir("status")
+            try:
+                exit_codes = self.run_staged_backup(
+                    "export",
+                    staging_dir,
+                    [self.to_spawner_path(manifest.path) for manifest in manifests],
+                )
+                self.spawner_cls.put_files(
+                    staging_dir, {"hash.py": HASH_SCRIPT.encode()}
+                )
+                exit_code, output = self.spawner_cls.exec_run(
+                    cmd=f"python3 {staging_dir}/hash.py {staging_dir}"
+                )
+            finally:
+                self.spawner_cls.exec_run(cmd=f"rm -rf {staging_dir}")
+            disk = list(disk)
+        if exit_code != 0:
+            logger.error(f"Hashing the platform metadata failed: {output.decode()}")
+            sys.exit(1)
+        platform = json.loads(output)
+
+        statuses = []
+        for i, manifest in enumerate(manifests):
+            # A partial export would report objects as missing on the platform
+            if exit_codes[i] != 0:
+                statuses.append(ObjectStatus(manifest.path, "*", "export-failed"))
+                continue
+            statuses.extend(compare(manifest.path, disk[i], platform.get(str(i), {})))
+        log_statuses(statuses, show_in_sync)
+        if any(status.status == "export-failed" for status in statuses):
+            logger.error("The export of some manifests failed, their status is unknown")
+            sys.exit(1)
+        return statuses
+
+    def redis_client(self) -> RedisClient:
+        """Connect to the Redis of the platform, in the redis-master container of the stack.
+
+        Returns:
+            A connected RedisClient.
+
+        """
+        redis = ContainerTools(
+            "^redis-master-.*", service="redis-master", **self._redis_selection
+        )
+        try:
+            return RedisClient(*redis.address(self.redis_port))
+        except (ValueError, RedisError) as e:
+            logger.error(
+                f"{e}. --fast needs the Redis of the platform reachable from this host, publish port {self.redis_port} of {redis.name()} or run without --fast"
+            )
+            sys.exit(1)
+
+    def check_fast_layout(
+        self, command: str, client: RedisClient, manifests: list
+    ) -> None:
+        """Check on one object that the backup tool stores objects with the keys --fast uses, exit if not.
+
+        The object is imported, or exported, by the backup tool itself and its keys are then
+        compared with the ones flatten gives for its file. Nothing is written by --fast before.
+
+        Args:
+            command: ``import`` or ``export``.
+            client: Redis client.
+            manifests: Manifests of the run.
+
+        """
+        sample = self.fast_layout_sample(command, client, manifests)
+        if sample is None:
+            return
+        type_name, name, path = sample
+        file_name = f"0/metadata/{type_name}/{name}.json"
+        files = {"0/manifest.txt": f"{type_name}:{name}\n".encode()}
+        if command == "import":
+            files[file_name] = pathlib.Path(path).read_bytes()
+        staging_dir = self.make_staging_dir("layout")
+        try:
+            self.spawner_cls.put_files(staging_dir, files)
+            exit_codes = self.run_staged_backup(
+                command, staging_dir, [f"{staging_dir}/0/manifest.txt"]
+            )
+            _, content = self.spawner_cls.exec_run(
+                cmd=f"cat '{staging_dir}/{file_name}'"
+            )
+        finally:
+            self.spawner_cls.exec_run(cmd=f"rm -rf {staging_dir}")
+        try:
+            if exit_codes != [0]:
+                raise ValueError("the backup tool failed")
+            data = json.loads(content)[type_name][name]
+            differences = layout_differences(
+                type_name, name, data, object_keys(client, type_name, name)
+            )
+        except (ValueError, KeyError, TypeError, RedisError) as e:
+            differences = [f"{type(e).__name__}: {e}"]
+        if differences:
+            logger.error(
+                f"The backup tool does not store {type_name}:{name} with the keys of --fast, nothing was written. Run it without --fast:\n  "
+                + "\n  ".join(differences[:10])
+            )
+            sys.exit(1)
+        logger.info(f"Key layout checked with the backup tool on {type_name}:{name}")
+
+    @staticmethod
+    def fast_layout_sample(
+        command: str, client: RedisClient, manifests: list
+    ) -> Optional[tuple]:
+        """Return the (type, name, path) of the object check_fast_layout uses, None if there is none.
+
+        Import uses the first metadata file of the manifests, export the first object of the
+        manifests found in the platform.
+
+        """
+        for manifest in manifests:
+            if command == "import":
+                for obj in manifest_objects(manifest):
+                    return obj
+                continue
+            for entry in manifest.entries:
+                keys = client.scan(f"{entry.type}:{entry.name},*")
+                if keys:
+                    name = keys[0].split(",", 1)[0].split(":", 1)[1]
+                    return entry.type, name, None
+        return None
+
+    def fast_action(
+        self, command: str, work_dir: Optional[str] = None, verify: bool = True
+    ) -> None:
+        """Import or export the manifests in the working directory by reading and writing Redis directly from the host.
+
+        The backup tool only runs on one object first, to check it stores objects with the same
+        keys, see check_fast_layout. Every object is then written or read with batched commands over a
+        few pipelines. Unless disabled, the result is checked against an export of the
+        backup tool, see status_action.
+
+        Args:
+            command: ``import`` or ``export``.
+            work_dir: Working directory.
+            verify: If True, compare the userspace and the platform with the backup tool afterwards.
+
+        """
+        if command not in {"import", "export"}:
+            logger.error(f"--fast only supports import and export, not {command}")
+            sys.exit(1)
+        manifests = self.get_validated_manifests(command, work_dir)
+        if not manifests:
+            logger.info("No manifests found")
+            return
+        if self.dry_run:
+            logger.info("Dry run mode, please remove the dry run arg to execute")
+            return
+        client = self.redis_client()
+        try:
+            self.check_fast_layout(command, client, manifests)
+            start = time.monotonic()
+            if command == "import":
+                count = import_manifests(client, manifests)
+                result = f"imported {count} objects"
             else:
-                logger.info("Dry run mode, please remove the dry run arg to execute")
+                result = (
+                    f"wrote {len(export_manifests(client, manifests))} changed files"
+                )
+        except (RedisError, ValueError, OSError) as e:
+            logger.error(f"Fast {command} failed: {e}")
+            sys.exit(1)
+        finally:
+            client.close()
+        logger.info(
+            f"Fast {command} of {len(manifests)} manifests {result} in {client.round_trips} round trips, {time.monotonic() - start:.1f}s"
+        )
+        if not verify:
+            return
+        statuses = self.status_action(work_dir, show_in_sync=False)
+        if any(status.status != "in-sync" for status in statuses):
+            logger.error(
+                f"The platform and the userspace differ after the fast {command}, run it without --fast"
+            )
+            sys.exit(1)
+
+    def snapshot_action(
+        self,
+        work_dir: Optional[str] = None,
+        name: Optional[str] = None,
+        store: Optional[SnapshotStore] = None,
+    ) -> None:
+        """Snapshot the platform metadata of all manifests in the working directory into a content-addressed store.
+
+        All manifests are exported into a staging area with a single exec and streamed back
+        as one tar archive. Only objects that are not in the store yet are written.
+
+        The backup tool exports by manifest, so the snapshot holds the objects listed by the
+        manifests of the working directory, not every object of the platform. Objects only
+        created in the platform, or of packages without a manifest there, are not saved.
+
+        Args:
+            work_dir: Working directory.
+            name: Name of the snapshot, defaults to the current date and time.
+            store: Snapshot store, defaults to the one in the user data directory.
+
+        """
+        store = store or SnapshotStore()
+        name = name or time.strftime("%Y%m%d-%H%M%S")
+        manifests = self.get_validated_manifests("export", work_dir)
+        logger.info(f"SNAPSHOTTING metadata of {len(manifests)} manifests as {name}")
+        if self.dry_run:
+            logger.info("Dry run mode, please remove the dry run arg to execute")
+            return
+
+        staging_dir = self.make_staging_dir("snapshot")
+        try:
+            exit_codes = self.run_staged_backup(
+                "export",
+                staging_dir,
+                [self.to_spawner_path(manifest.path) for manifest in manifests],
+            )
+            if any(exit_codes):
+                logger.error("Export failed, snapshot not saved.")
+                sys.exit(1)
+            entries = [{"files": {}} for _ in manifests]
+            stored_objects, stored_bytes = 0, 0
+            bits, _ = self.spawner_cls.get_archive(staging_dir)
+            with tarfile.open(fileobj=ChunkStream(bits), mode="r|") as tar:
+                for member in tar:
+                    # Members are <staging>/<i>/metadata/<type>/<file>
+                    parts = pathlib.PurePosixPath(member.name).parts
+                    if not member.isfile() or len(parts) < 4 or parts[2] != "metadata":
+                        continue
+                    digest, size = store.put(tar.extractfile(member).read())
+                    entries[int(parts[1])]["files"]["/".join(parts[3:])] = digest
+                    stored_objects += bool(size)
+                    stored_bytes += size
+        finally:
+            self.spawner_cls.exec_run(cmd=f"rm -rf {staging_dir}")
+
+        for manifest, entry in zip(manifests, entries):
+            entry["path"] = os.path.relpath(manifest.path, self.userspace_dir)
+            entry["manifest"], _ = store.put(pathlib.Path(manifest.path).read_bytes())
+        path = store.save_snapshot(name, entries)
+        total = sum(len(entry["files"]) for entry in entries)
+        logger.info(
+            f"Snapshot {name} saved in {path}: {total} objects, {stored_objects} new ({stored_bytes} bytes)"
+        )
+
+    def restore_action(
+        self, name: Optional[str] = None, store: Optional[SnapshotStore] = None
+    ) -> None:
+        """Restore a snapshot into the platform.
+
+        The objects of the snapshot are streamed into a staging area of the spawner with a
+        single archive upload and imported with a single exec.
+        Objects created in the platform after the snapshot are kept.
+
+        Args:
+            name: Name of the snapshot, the latest one if not given.
+            store: Snapshot store, defaults to the one in the user data directory.
+
+        """
+        store = store or SnapshotStore()
+        try:
+            snapshot = store.load_snapshot(name)
+        except FileNotFoundError as e:
+            logger.error(f"Snapshot not found: {e}")
+            sys.exit(1)
+        manifests = snapshot["manifests"]
+        total = sum(len(entry["files"]) for entry in manifests)
+        logger.info(
+            f"RESTORING snapshot {snapshot['name']}: {total} objects of {len(manifests)} manifests"
+        )
+        if self.dry_run:
+            for entry in manifests:
+                logger.info(f"{entry['path']}: {len(entry['files'])} objects")
+            logger.info("Dry run mode, please remove the dry run arg to execute")
+            return
+
+        staging_dir = self.make_staging_dir("restore")
+        try:
+            # Spool the archive to disk if it grows large, the upload is streamed from the file
+            with tempfile.SpooledTemporaryFile(max_size=64 << 20) as archive:
+                with tarfile.open(fileobj=archive, mode="w") as tar:
+                    for i, entry in enumerate(manifests):
+                        files = {"manifest.txt": entry["manifest"]}
+                        files.update(
+                            (f"metadata/{path}", digest)
+                            for path, digest in entry["files"].items()
+                        )
+                        for path, digest in files.items():
+                            data = store.get(digest)
+                            tar_info = tarfile.TarInfo(f"{i}/{path}")
+                            tar_info.size = len(data)
+                            tar_info.mode = 0o644
+                            tar_info.mtime = time.time()
+                            tar.addfile(tar_info, io.BytesIO(data))
+                archive.seek(0)
+                self.spawner_cls.put_archive(staging_dir, archive)
+            exit_codes = self.run_staged_backup(
+                "import",
+                staging_dir,
+                [f"{staging_dir}/{i}/manifest.txt" for i in range(len(manifests))],
+            )
+        finally:
+            self.spawner_cls.exec_run(cmd=f"rm -rf {staging_dir}")
+        if any(exit_codes):
+            sys.exit(1)
+        logger.info(f"Snapshot {snapshot['name']} restored")
 
 
 if __name__ == "__main__":
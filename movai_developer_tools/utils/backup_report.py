@@ -0,0 +1,219 @@
+"""Module that contains a parser for the MOV.AI backup tool output and a machine readable report of a movbkp run"""
+from movai_developer_tools.utils import logger
+import json
+import re
+import time
+import typing
+
+# Object reference as written by the backup tool and in manifests, e.g. Flow:my_flow
+OBJECT_REGEX = re.compile(r"\b([A-Z][A-Za-z]+):([\w.\-/*]+)")
+# Classify a line mentioning an object, checked in order on the line without its object references.
+# Failures are lines starting with a log level or an exception name (``Error importing ...``,
+# ``ERROR: ...``, ``KeyError: ...``) and ``failed to``/``could not``/``unable to`` phrases, so
+# counters such as ``0 errors`` or ``no failures`` are not failures.
+FAILED_REGEX = re.compile(
+    r"^\W*(?:error|critical|fatal|traceback)\b"
+    r"|^\W*\w*(?:error|exception)\s*:"
+    r"|\b(?:failed|unable|could not|cannot)\s+(?:to\s+)?[a-z]",
+    re.IGNORECASE,
+)
+SKIPPED_REGEX = re.compile(
+    r"\b(?:skipp(?:ing|ed)|already exists|unchanged|ignor(?:ing|ed))\b",
+    re.IGNORECASE,
+)
+# Status of the objects successfully processed by each backup tool action
+SUCCESS_STATUS = {"import": "imported", "export": "exported", "remove": "removed"}
+
+
+class ObjectOutcome(typing.NamedTuple):
+    """Outcome of a single metadata object.
+
+    Attributes:
+        type (str): Metadata type, e.g. Flow.
+        name (str): Metadata name.
+        status (str): imported/exported/removed, skipped or failed.
+        reason (str): Line of the backup tool output that explains the status.
+
+    """
+
+    type: str
+    name: str
+    status: str
+    reason: str = ""
+
+
+def parse_backup_output(
+    command: str, stdout: bytes, stderr: bytes
+) -> typing.List[ObjectOutcome]:
+    """Turn the backup tool output into per-object outcomes.
+
+    Every line mentioning a ``Type:name`` object is classified as failed, skipped
+    or successful by its log level and phrases, ignoring the object references so
+    that names never affect the status. The last line mentioning an object wins, so an
+    object that is logged as being processed and then as failed is reported as failed.
+
+    Args:
+        command: Backup tool action (import, export or remove).
+        stdout: Standard output of the backup tool.
+        stderr: Standard error of the backup tool.
+
+    Returns:
+        A list of outcomes, one per object, in order of first appearance.
+
+    """
+    outcomes = {}
+    text = (stdout or b"").decode(errors="replace") + "\n"
+    text += (stderr or b"").decode(errors="replace")
+    for line in text.splitlines():
+        line = line.strip()
+        match = OBJECT_REGEX.search(line)
+        if not match:
+            continue
+        text_only = OBJECT_REGEX.sub(" ", line)
+        if FAILED_REGEX.search(text_only):
+            status = "failed"
+        elif SKIPPED_REGEX.search(text_only):
+            status = "skipped"
+        else:
+            status = SUCCESS_STATUS.get(command, command)
+        key = match.groups()
+        # Do not let a later progress line hide a failure
+        if outcomes.get(key, ObjectOutcome(*key, "")).status == "failed":
+            continue
+        reason = line if status != SUCCESS_STATUS.get(command) else ""
+        outcomes[key] = ObjectOutcome(*key, status, reason)
+    return list(outcomes.values())
+
+
+class ManifestOutcome:
+    """Outcome of running the backup tool over one manifest.
+
+    Args:
+        manifest: Manifest path inside the spawner.
+        command: Backup tool action.
+        exit_code: Exit code of the backup tool.
+        stdout: Standard output of the backup tool.
+        stderr: Standard error of the backup tool.
+        duration: Duration of the execution in seconds.
+
+    Attributes:
+        manifest (str): Manifest path inside the spawner.
+        command (str): Backup tool action.
+        exit_code (int): Exit code of the backup tool.
+        duration (float): Duration of the execution in seconds.
+        objects (list): Per-object outcomes.
+        error (str): Tail of the error output if the backup tool exited with an error.
+        load (dict): Load of the spawner during the execution, set when sampling docker stats.
+
+    """
+
+    # Number of stderr lines kept when the backup tool fails
+    error_tail_lines = 20
+
+    def __init__(
+        self,
+        manifest: str,
+        command: str,
+        exit_code: int,
+        stdout: bytes,
+        stderr: bytes,
+        duration: float = 0.0,
+    ) -> None:
+        self.manifest = manifest
+        self.command = command
+        self.exit_code = exit_code
+        self.duration = duration
+        self.objects = parse_backup_output(command, stdout, stderr)
+        self.error = ""
+        self.load = None
+        if exit_code:
+            lines = (stderr or stdout or b"").decode(errors="replace").splitlines()
+            self.error = "\n".join(lines[-self.error_tail_lines :])
+
+    @property
+    def failed(self) -> bool:
+        """True if the backup tool exited with an error or any object failed."""
+        return bool(self.exit_code) or any(
+            obj.status == "failed" for obj in self.objects
+        )
+
+    def to_dict(self) -> dict:
+        """Return a JSON serializable representation."""
+        return {
+            "manifest": self.manifest,
+            "command": self.command,
+            "exit_code": self.exit_code,
+            "duration": round(self.duration, 3),
+            "failed": self.failed,
+            "error": self.error,
+            "load": self.load,
+            "objects": [obj._asdict() for obj in self.objects],
+        }
+
+
+class RunReport:
+    """Aggregation of the manifest outcomes of a movbkp run.
+
+    Attributes:
+        command (str): movbkp command.
+        started (float): Start time of the run as a unix timestamp.
+        manifests (list): A list of ManifestOutcome.
+
+    """
+
+    def __init__(self, command: str) -> None:
+        self.command = command
+        self.started = time.time()
+        self.manifests = []
+
+    def add(self, outcome: ManifestOutcome) -> None:
+        """Add a manifest outcome and log its failures.
+
+        Args:
+            outcome: Outcome of a manifest.
+
+        """
+        self.manifests.append(outcome)
+        for obj in outcome.objects:
+            if obj.status == "failed":
+                logger.error(f"{obj.type}:{obj.name} failed: {obj.reason}")
+        if outcome.exit_code:
+            logger.error(
+                f"Backup tool exited with code {outcome.exit_code} for {outcome.manifest}:\n{outcome.error}"
+            )
+
+    @property
+    def failed(self) -> bool:
+        """True if any manifest failed."""
+        return any(outcome.failed for outcome in self.manifests)
+
+    def summary(self) -> dict:
+        """Return the number of objects per status and the number of failed manifests."""
+        counts = {}
+        for outcome in self.manifests:
+            for obj in outcome.objects:
+                counts[obj.status] = counts.get(obj.status, 0) + 1
+        counts["failed_manifests"] = sum(outcome.failed for outcome in self.manifests)
+        return counts
+
+    def to_dict(self) -> dict:
+        """Return a JSON serializable representation."""
+        return {
+            "command": self.command,
+            "started": self.started,
+            "duration": round(time.time() - self.started, 3),
+            "failed": self.failed,
+            "summary": self.summary(),
+            "manifests": [outcome.to_dict() for outcome in self.manifests],
+        }
+
+    def write(self, path: str) -> None:
+        """Write the report as JSON.
+
+        Args:
+            path: Output file path.
+
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+        logger.info(f"Report written to {path}")
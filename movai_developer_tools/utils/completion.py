@@ -0,0 +1,246 @@
+"""Module that contains the bash/zsh completion script generator and the cache of container and manifest data it reads"""
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.container_tools import COMPOSE_PROJECT_LABEL
+from movai_developer_tools.utils.tree_diff import atomic_write
+from argparse import ArgumentParser
+import docker
+import os
+import pathlib
+import re
+import typing
+
+# Dynamic candidates, one cache file each, refreshed in the background by the completion script
+CACHED_COMPLETERS = {
+    "--dir": "dirs",
+    "--project": "projects",
+    "--container-id": "container-ids",
+    "--stats-also": "containers",
+}
+# Options completed with host files
+FILE_OPTIONS = {
+    "--report",
+    "--stats",
+    "--stats-file",
+    "--profile",
+    "--history",
+    "--hosts",
+    "--cp-dest",
+    "--sync-src",
+    "--snapshot-store",
+}
+# Minutes after which the cache is refreshed
+CACHE_MAX_AGE = 5
+# Manifests deeper than this below the userspace are not offered as --dir candidates
+MAX_MANIFEST_DEPTH = 6
+
+
+def cache_dir() -> pathlib.Path:
+    """Return the directory of the completion cache."""
+    cache_home = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return pathlib.Path(cache_home) / "movai-developer-tools" / "completion"
+
+
+class ToolSpec(typing.NamedTuple):
+    """What the completion of a tool offers.
+
+    Attributes:
+        name (str): Name of the console script.
+        positionals (list): Candidate words of every positional argument, in order.
+        flags (list): Options without value.
+        value_options (dict): Options with a value and how the value is completed,
+            ``cache:<file>``, ``files``, ``words:<w1> <w2>`` or None.
+
+    """
+
+    name: str
+    positionals: list
+    flags: list
+    value_options: dict
+
+
+def tool_spec(
+    name: str, parser: typing.Optional[ArgumentParser], positionals: list
+) -> ToolSpec:
+    """Describe the completion of a tool from its handler parser.
+
+    Args:
+        name: Name of the console script.
+        parser: Parser returned by the make_parser function of the handler, None if the tool has no options.
+        positionals: Candidate words of every positional argument, in order.
+
+    Returns:
+        A ToolSpec.
+
+    """
+    flags, value_options = [], {}
+    for action in parser._actions if parser else ():
+        for option in action.option_strings:
+            if not option.startswith("--"):
+                continue
+            if action.nargs == 0:
+                flags.append(option)
+            elif option in CACHED_COMPLETERS:
+                value_options[option] = "cache:" + CACHED_COMPLETERS[option]
+            elif action.choices:
+                value_options[option] = "words:" + " ".join(map(str, action.choices))
+            elif option in FILE_OPTIONS:
+                value_options[option] = "files"
+            else:
+                value_options[option] = None
+    return ToolSpec(name, [list(words) for words in positionals], flags, value_options)
+
+
+BASH_HEADER = f"""# bash completion of the MOV.AI developer tools, generated by movcompletion
+_movai_cache_dir="${{XDG_CACHE_HOME:-$HOME/.cache}}/movai-developer-tools/completion"
+
+_movai_cached() {{
+    local file="$_movai_cache_dir/$1" IFS=$'\\n'
+    # Answer from the current cache, refresh it in the background when missing or old
+    if [[ -z $(find "$file" -mmin -{CACHE_MAX_AGE} 2>/dev/null) ]]; then
+        touch "$file" 2>/dev/null
+        (movcompletion refresh >/dev/null 2>&1 &)
+    fi
+    [[ -r $file ]] && COMPREPLY=($(compgen -W "$(<"$file")" -- "$2"))
+}}
+"""
+
+
+def _bash_function(spec: ToolSpec) -> str:
+    """Return the bash completion function of a tool."""
+    function = "_movai_" + re.sub(r"\W", "_", spec.name)
+    lines = [
+        f"{function}() {{",
+        "    local cur=${COMP_WORDS[COMP_CWORD]} prev=${COMP_WORDS[COMP_CWORD-1]}",
+        "    case $prev in",
+    ]
+    groups = {}
+    for option, completer in spec.value_options.items():
+        groups.setdefault(completer, []).append(option)
+    for completer, options in groups.items():
+        if completer is None:
+            action = "return"
+        elif completer == "files":
+            action = 'COMPREPLY=($(compgen -f -- "$cur")); return'
+        elif completer.startswith("cache:"):
+            action = f'_movai_cached {completer[len("cache:"):]} "$cur"; return'
+        else:
+            action = f'COMPREPLY=($(compgen -W "{completer[len("words:"):]}" -- "$cur")); return'
+        lines.append(f"        {'|'.join(options)}) {action};;")
+    options = " ".join(spec.flags + list(spec.value_options))
+    lines += [
+        "    esac",
+        "    if [[ $cur == -* ]]; then",
+        f'        COMPREPLY=($(compgen -W "{options}" -- "$cur"))',
+        "        return",
+        "    fi",
+        "    local i n=0",
+        "    for ((i = 1; i < COMP_CWORD; i++)); do",
+        "        case ${COMP_WORDS[i]} in",
+    ]
+    if spec.value_options:
+        lines.append(f"            {'|'.join(spec.value_options)}) ((i++));;")
+    lines += [
+        "            -*) ;;",
+        "            *) ((n++));;",
+        "        esac",
+        "    done",
+        "    case $n in",
+    ]
+    for index, words in enumerate(spec.positionals):
+        lines.append(
+            f'        {index}) COMPREPLY=($(compgen -W "{" ".join(words)}" -- "$cur"));;'
+        )
+    lines += ["    esac", "}", f"complete -F {function} {spec.name}", ""]
+    return "\n".join(lines)
+
+
+def completion_script(specs: typing.Iterable[ToolSpec], shell: str = "bash") -> str:
+    """Return the completion script of tools.
+
+    The script never starts python to answer a completion, container and manifest candidates
+    are read from the cache files written by refresh_cache.
+
+    Args:
+        specs: A ToolSpec per tool.
+        shell: ``bash`` or ``zsh`` (through bashcompinit).
+
+    Returns:
+        The script, to be sourced by the shell.
+
+    """
+    script = BASH_HEADER + "\n" + "\n".join(map(_bash_function, specs))
+    if shell == "zsh":
+        script = "autoload -U +X bashcompinit && bashcompinit\n" + script
+    return script
+
+
+def manifest_dirs(root: str, manifest_name: str = "manifest.txt") -> set:
+    """Return the directories under root that contain manifests, directly or below them.
+
+    Args:
+        root: Directory to search, e.g. the userspace in the host.
+        manifest_name: Manifest file name.
+
+    Returns:
+        A set of directory paths, root included if any manifest was found.
+
+    """
+    dirs = set()
+    root = os.path.abspath(root)
+    base_depth = root.count(os.sep)
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Hidden directories (.git, .cache...) never hold packages
+        dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+        if dirpath.count(os.sep) - base_depth >= MAX_MANIFEST_DEPTH:
+            dirnames[:] = []
+        if manifest_name not in filenames:
+            continue
+        # Every ancestor up to root is a valid --dir as well
+        path = dirpath
+        while path not in dirs:
+            dirs.add(path)
+            if path == root:
+                break
+            path = os.path.dirname(path)
+    return dirs
+
+
+def refresh_cache(
+    regexes: typing.Iterable[str], userspace_bind_dir: str = "/opt/mov.ai/user"
+) -> None:
+    """Write the completion cache from the running containers whose name matches the known regexes.
+
+    Args:
+        regexes: Regular expressions of the MOV.AI container names.
+        userspace_bind_dir: The directory where the userspace is mounted in the containers.
+
+    """
+    try:
+        client = docker.from_env()
+        containers = client.containers.list(sparse=True)
+    except docker.errors.DockerException as e:
+        logger.warning(f"Could not list the containers, keeping the cache: {e}")
+        return
+    names, ids, projects, dirs = set(), set(), set(), set()
+    for container in containers:
+        name = container.attrs["Names"][0].lstrip("/")
+        if not any(re.search(regex, name) for regex in regexes):
+            continue
+        names.add(name)
+        ids.add(container.id[:12])
+        labels = container.attrs.get("Labels") or {}
+        if COMPOSE_PROJECT_LABEL in labels:
+            projects.add(labels[COMPOSE_PROJECT_LABEL])
+        for bind in (
+            client.containers.get(container.id).attrs["HostConfig"]["Binds"] or []
+        ):
+            host_dir, _, container_dir = bind.partition(":")
+            if container_dir.split(":")[0] == userspace_bind_dir:
+                dirs |= manifest_dirs(host_dir)
+    for file_name, candidates in (
+        ("containers", names),
+        ("container-ids", ids),
+        ("projects", projects),
+        ("dirs", dirs),
+    ):
+        atomic_write(cache_dir() / file_name, "\n".join(sorted(candidates)).encode())
@@ -1,11 +1,24 @@
 """Module that contains methods to ease interacting with the python docker module in the context of docker containers from MOV.AI."""
 from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.container_wait import ready_condition, wait_until
+from movai_developer_tools.utils.exec_session import ExecSession, ExecSessionError
 import docker
+import io
+import os
 import sys
+import tarfile
 import time
 import typing
+import urllib.parse
+from argparse import ArgumentParser, Namespace
 from docker.models.containers import ExecResult
 
+# Host addresses of a port published on every interface of the docker host
+ANY_ADDRESSES = {"", "0.0.0.0", "::"}
+# Labels set by docker compose on the containers of a stack
+COMPOSE_PROJECT_LABEL = "com.docker.compose.project"
+COMPOSE_SERVICE_LABEL = "com.docker.compose.service"
+
 
 class ContainerTools:
     """Wrapper over docker API functions that are useful when developing with MOV.AI platform.
@@ -13,10 +26,17 @@ class ContainerTools:
     Args:
         regex: The regular expression used to find the docker container object by name.
         userspace_bind_dir: The directory where the userspace is mounted. Defaults to ``"/opt/mov.ai/user"``.
+        docker_host: URL of the docker daemon, e.g. ``tcp://robot:2375``. Defaults to the environment (DOCKER_HOST or the local socket).
+        container_id: ID (or unique ID prefix) of the container, takes precedence over any other selection.
+        project: Docker compose project of the container, used instead of the regex.
+        service: Docker compose service of the container, only used together with project.
 
     Attributes:
         userspace_bind_dir (str): The directory where the userspace is mounted. Defaults to ``"/opt/mov.ai/user"``.
-        container (Container): The container object found using the regular expression.
+        docker_host (str): URL of the docker daemon, None for the local socket.
+        client (DockerClient): Client of the docker daemon.
+        container (Container): The container object found using the regular expression, labels or ID.
+        session (ExecSession): Persistent exec session used by exec_run, set by start_session.
 
     """
 
@@ -24,20 +44,54 @@ class ContainerTools:
         self,
         regex: str,
         userspace_bind_dir: str = "/opt/mov.ai/user",
+        docker_host: typing.Optional[str] = None,
+        container_id: typing.Optional[str] = None,
+        project: typing.Optional[str] = None,
+        service: typing.Optional[str] = None,
     ) -> None:
         # Container userspace bind location
         self.userspace_bind_dir = userspace_bind_dir
+        self.docker_host = docker_host or os.environ.get("DOCKER_HOST")
+
+        # Connect to the given docker daemon or the one from the environment, exit if not reachable
+        try:
+            if docker_host:
+                self.client = docker.DockerClient(base_url=docker_host)
+            else:
+                self.client = docker.from_env()
+        except docker.errors.DockerException as e:
+            logger.error(
+                f"Could not connect to the docker daemon {docker_host or ''}: {e}"
+            )
+            sys.exit(1)
 
-        # Get container object with regex search over name, exit if not found
-        client = docker.from_env()
-        containers = client.containers.list(filters={"name": regex})
-        if containers:
-            self.container = containers[0]
+        # Filter on the server side, by ID, compose labels or name regex
+        if container_id:
+            filters = {"id": container_id}
+        elif project:
+            filters = {"label": [f"{COMPOSE_PROJECT_LABEL}={project}"]}
+            if service:
+                filters["label"].append(f"{COMPOSE_SERVICE_LABEL}={service}")
+            else:
+                filters["name"] = regex
         else:
+            filters = {"name": regex}
+
+        # Sparse listing does not inspect every match, only the selected container is inspected
+        containers = self.client.containers.list(filters=filters, sparse=True)
+        if not containers:
+            logger.error(f"Did not find a runnning container with filters: {filters}")
+            sys.exit(1)
+        if len(containers) > 1:
+            names = ", ".join(
+                container.attrs["Names"][0].lstrip("/") for container in containers
+            )
             logger.error(
-                f"Did not find a runnning container with name search: Regex used {regex}"
+                f"Found {len(containers)} running containers with filters {filters}: {names}. Use --project or --container-id to select one."
             )
             sys.exit(1)
+        self.container = self.client.containers.get(containers[0].id)
+        self.session = None
 
     def ip(self) -> str:
         """Return a container ip given a regex string to compare against the name.
@@ -51,6 +105,44 @@ class ContainerTools:
         ip = networks[network]["IPAddress"]
         return ip
 
+    def address(self, port: int, protocol: str = "tcp") -> typing.Tuple[str, int]:
+        """Return the host and port where a port of the container is reachable from this host.
+
+        A published port is reached through the docker host. Otherwise the container IP is
+        used, which is only routable from the host of a local daemon running on Linux.
+
+        Args:
+            port: Port inside the container.
+            protocol: ``tcp`` or ``udp``.
+
+        Returns:
+            A tuple of (host, port).
+
+        Raises:
+            ValueError: If the port is not published and the daemon is remote.
+
+        """
+        url = urllib.parse.urlparse(self.docker_host or "")
+        remote = url.scheme in ("tcp", "ssh", "http", "https") and url.hostname not in (
+            "localhost",
+            "127.0.0.1",
+            "::1",
+        )
+        ports = self.container.attrs["NetworkSettings"].get("Ports") or {}
+        for binding in ports.get(f"{port}/{protocol}") or ():
+            host_ip = binding.get("HostIp", "")
+            if host_ip in ANY_ADDRESSES:
+                return (url.hostname if remote else "127.0.0.1"), int(
+                    binding["HostPort"]
+                )
+            if not remote or not host_ip.startswith("127."):
+                return host_ip, int(binding["HostPort"])
+        if remote:
+            raise ValueError(
+                f"Port {port} of {self.name()} is not published on {self.docker_host}, it cannot be reached from this host"
+            )
+        return self.ip(), port
+
     def id(self) -> str:
         """Get short id of a container found using regex of the name.
 
@@ -108,9 +200,64 @@ class ContainerTools:
         """
         return self.container.put_archive(path, data)
 
-    def restart(self) -> None:
-        """Wrapper over restart API."""
+    def put_files(self, path: str, files: dict, mode: int = 0o644) -> bool:
+        """Write files inside the container with a single in-memory tar archive.
+
+        Args:
+            path: Directory inside the container where the files are written. Must exist.
+            files: A dictionary of relative file names and their content (bytes).
+            mode: Permissions of the files.
+
+        Returns:
+            The return value. True for success, False otherwise.
+
+        """
+        with io.BytesIO() as buffer:
+            with tarfile.open(fileobj=buffer, mode="w") as tar:
+                for name, data in files.items():
+                    tar_info = tarfile.TarInfo(name)
+                    tar_info.size = len(data)
+                    tar_info.mode = mode
+                    tar_info.mtime = time.time()
+                    tar.addfile(tar_info, io.BytesIO(data))
+            return self.put_archive(path, buffer.getvalue())
+
+    def restart(self, wait: bool = False, timeout: float = 60.0) -> None:
+        """Wrapper over restart API.
+
+        Args:
+            wait: If True, return once the container is ready again, healthy if it has a healthcheck.
+            timeout: Seconds to wait for the container to be ready.
+
+        Raises:
+            WaitTimeout: If wait is True and the container is not ready before the timeout.
+
+        """
+        since = time.time()
         self.container.restart()
+        if wait:
+            self.wait(ready_condition(self.container), timeout=timeout, since=since)
+
+    def wait(
+        self,
+        condition: str = "running",
+        log_regex: typing.Optional[str] = None,
+        timeout: float = 60.0,
+        since: typing.Optional[float] = None,
+    ) -> float:
+        """Block until the container is running, healthy or logged a line, see container_wait.wait_until.
+
+        Args:
+            condition: ``running``, ``healthy`` or ``log``.
+            log_regex: Regular expression matched against every log line, for the ``log`` condition.
+            timeout: Seconds before giving up.
+            since: Epoch time from which the logs are matched. Defaults to the start of the running container.
+
+        Returns:
+            The seconds waited.
+
+        """
+        return wait_until(self.container, condition, log_regex, timeout, since)
 
     def userspace_dir(self) -> str:
         """Return userspace that is mounted in the container.
@@ -165,11 +312,31 @@ class ContainerTools:
             logger.info("Recieved keyboard interrupt, exiting.")
             sys.exit()
 
+    def start_session(self, user: str = "movai") -> ExecSession:
+        """Start a persistent exec session, exec_run calls of the same user go through it afterwards.
+
+        Args:
+            user: User to execute the commands as. Default: movai
+
+        Returns:
+            The started ExecSession.
+
+        """
+        self.session = ExecSession(self.container, user)
+        return self.session
+
+    def close_session(self) -> None:
+        """Close the persistent exec session, if any."""
+        if self.session:
+            self.session.close()
+            self.session = None
+
     def exec_run(
         self,
         cmd: str = "echo 'Hi there, I am an echo being executed in the container you have chosen. Please use [--cmd=EXEC_COMMAND] to specify the command you want to run'",
         user: str = "movai",
         environment: list = [],
+        demux: bool = False,
     ) -> ExecResult:
         """Wrapper over exec_run API.
 
@@ -178,6 +345,7 @@ class ContainerTools:
             user: User to execute command as. Default: movai
             environment: A dictionary or a list of strings in the following format
                         ``["PASSWORD=xxx"]`` or ``{"PASSWORD": "xxx"}``.
+            demux: Return stdout and stderr separately. Default: False
 
         Returns:
             A tuple of (exit_code, output)
@@ -191,14 +359,60 @@ class ContainerTools:
                     A bytestring containing response data otherwise.
 
         """
+        # Run in the persistent session if there is one, saving the exec create/start/inspect cycle
+        if self.session and self.session.user == user:
+            try:
+                exit_code, stdout, stderr = self.session.run(cmd, environment)
+            except ExecSessionError as e:
+                logger.error(str(e))
+                sys.exit(1)
+            return ExecResult(exit_code, (stdout, stderr) if demux else stdout + stderr)
+
         exec_result = self.container.exec_run(
             cmd=["bash", "-c", cmd],
             user=user,
             environment=environment,
+            demux=demux,
         )
         return exec_result
 
 
+def add_selection_arguments(parser: ArgumentParser, container_id: bool = True) -> None:
+    """Add the arguments to select containers by compose labels or ID to a handler parser.
+
+    Args:
+        parser: The handler parser.
+        container_id: If True, add the argument to pin a single container by ID.
+
+    """
+    parser.add_argument(
+        "--project",
+        help="Docker compose project of the MOV.AI stack, selects the containers by labels instead of by name",
+    )
+    if container_id:
+        parser.add_argument(
+            "--container-id",
+            help="ID of the container to use, instead of searching it by name",
+        )
+
+
+def selection_kwargs(args: Namespace) -> dict:
+    """Return the ContainerTools keyword arguments that select the docker daemon and container from parsed args.
+
+    Args:
+        args: Parsed handler args.
+
+    Returns:
+        A dictionary with docker_host, container_id and project.
+
+    """
+    return {
+        "docker_host": getattr(args, "docker_host", None),
+        "container_id": getattr(args, "container_id", None),
+        "project": getattr(args, "project", None),
+    }
+
+
 if __name__ == "__main__":
     # Regular expression against name to find the container
     regex = "^spawner-.*"
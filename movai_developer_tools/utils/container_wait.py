@@ -0,0 +1,218 @@
+"""Module that contains the event-driven wait for a container to be running, healthy or to log a line"""
+from movai_developer_tools.utils import logger
+from argparse import ArgumentParser, Namespace
+import datetime
+import re
+import sys
+import threading
+import time
+import typing
+
+CONDITIONS = ("running", "healthy", "log")
+
+
+class WaitError(Exception):
+    """Raised when a container condition cannot be waited for."""
+
+
+class WaitTimeout(WaitError):
+    """Raised when a container condition does not hold before the timeout."""
+
+
+def ready_condition(container) -> str:
+    """Return the condition of a ready container, healthy if it has a healthcheck, running otherwise."""
+    healthcheck = container.attrs["Config"].get("Healthcheck") or {}
+    if healthcheck.get("Test") and healthcheck["Test"] != ["NONE"]:
+        return "healthy"
+    return "running"
+
+
+def _holds(container, condition: str) -> bool:
+    """Return whether a running or healthy condition holds, from a fresh inspect of the container."""
+    container.reload()
+    state = container.attrs["State"]
+    if condition == "running":
+        return state.get("Running", False) and not state.get("Restarting", False)
+    if "Health" not in state:
+        raise WaitError(f"Container {container.name} has no healthcheck")
+    return state["Health"]["Status"] == "healthy"
+
+
+def started_at(container) -> float:
+    """Return the epoch time of the current start of a container, from its last inspect.
+
+    Falls back to now if docker does not report it.
+
+    """
+    started = container.attrs["State"].get("StartedAt") or ""
+    try:
+        # Docker reports nanoseconds, e.g. 2024-05-02T10:11:12.123456789Z
+        start = datetime.datetime.strptime(started[:19], "%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return time.time()
+    return start.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _close(stream) -> None:
+    """Close a docker stream, which may already be closed."""
+    try:
+        stream.close()
+    except OSError:
+        pass
+
+
+def _until(stream, deadline: float) -> typing.Iterator:
+    """Iterate a docker stream, closing it at the deadline.
+
+    Args:
+        stream: A docker CancellableStream, e.g. events or logs.
+        deadline: time.monotonic() at which the stream is closed.
+
+    Yields:
+        The items of the stream, until it ends or the deadline.
+
+    """
+    timer = threading.Timer(
+        max(0.0, deadline - time.monotonic()), _close, args=(stream,)
+    )
+    timer.daemon = True
+    timer.start()
+    try:
+        yield from stream
+    except Exception:
+        # Closing the stream from the timer interrupts the read with any error
+        if time.monotonic() < deadline:
+            raise
+    finally:
+        timer.cancel()
+        _close(stream)
+
+
+def _wait_state(container, condition: str, deadline: float) -> None:
+    """Block until a running or healthy condition holds, woken up by the container events."""
+    # Subscribe before inspecting, so no change between the two is missed
+    events = container.client.events(
+        decode=True, filters={"container": container.id, "type": "container"}
+    )
+    if _holds(container, condition):
+        _close(events)
+        return
+    for event in _until(events, deadline):
+        logger.debug(f"{container.name}: {event.get('status')}")
+        if _holds(container, condition):
+            return
+    raise WaitTimeout(f"Container {container.name} is not {condition}")
+
+
+def _wait_log(
+    container, log_regex: str, deadline: float, since: typing.Optional[float]
+) -> None:
+    """Block until the container logs a line matching a regular expression, since its current start by default."""
+    pattern = re.compile(log_regex)
+    while True:
+        # The log stream ends when the container stops, follow it again once it is back
+        _wait_state(container, "running", deadline)
+        # The state was just inspected, so this is the start of the running container
+        since = int(started_at(container) if since is None else since)
+        logs = container.logs(stream=True, follow=True, since=since)
+        pending = b""
+        for chunk in _until(logs, deadline):
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            if any(pattern.search(line.decode(errors="replace")) for line in lines):
+                return
+        if pattern.search(pending.decode(errors="replace")):
+            return
+        if time.monotonic() >= deadline:
+            raise WaitTimeout(
+                f"Container {container.name} did not log a line matching {log_regex}"
+            )
+        since = None
+
+
+def wait_until(
+    container,
+    condition: str = "running",
+    log_regex: typing.Optional[str] = None,
+    timeout: float = 60.0,
+    since: typing.Optional[float] = None,
+) -> float:
+    """Block until a condition holds for a container, returning as soon as the docker events or logs show it.
+
+    Args:
+        container: A docker container.
+        condition: ``running``, ``healthy`` or ``log``.
+        log_regex: Regular expression matched against every log line, for the ``log`` condition.
+        timeout: Seconds before giving up.
+        since: Epoch time from which the logs are matched, e.g. taken before a restart. Defaults to
+            the start of the running container, so lines logged since a restart by another process match.
+
+    Returns:
+        The seconds waited.
+
+    Raises:
+        WaitTimeout: If the condition does not hold before the timeout.
+        WaitError: If the condition cannot hold, e.g. healthy for a container without healthcheck.
+
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    if condition == "log":
+        _wait_log(container, log_regex, deadline, since)
+    elif condition in CONDITIONS:
+        _wait_state(container, condition, deadline)
+    else:
+        raise WaitError(f"Unknown condition {condition}, use one of {CONDITIONS}")
+    return time.monotonic() - start
+
+
+def add_wait_arguments(parser: ArgumentParser) -> None:
+    """Add the arguments of the wait sub-command to a handler parser.
+
+    Args:
+        parser: The handler parser.
+
+    """
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--running",
+        help="Wait until the container is running (wait), the default",
+        action="store_true",
+    )
+    group.add_argument(
+        "--healthy",
+        help="Wait until the healthcheck of the container passes (wait)",
+        action="store_true",
+    )
+    group.add_argument(
+        "--log-match",
+        help="Wait until the container logs a line matching this regular expression (wait)",
+    )
+    parser.add_argument(
+        "--timeout",
+        help="Seconds before giving up (wait), defaults to 60",
+        type=float,
+        default=60.0,
+    )
+
+
+def run_wait(container_tools, args: Namespace) -> None:
+    """Wait for the condition given in args, exit with an error on timeout.
+
+    Args:
+        container_tools: ContainerTools object of the selected container.
+        args: A set of parsed args.
+
+    """
+    if args.log_match:
+        condition = "log"
+    elif args.healthy:
+        condition = "healthy"
+    else:
+        condition = "running"
+    try:
+        seconds = container_tools.wait(condition, args.log_match, args.timeout)
+    except WaitError as e:
+        logger.error(f"{e} after {args.timeout}s" if isinstance(e, WaitTimeout) else e)
+        sys.exit(1)
+    logger.info(f"{container_tools.name()}: {condition} after {seconds:.2f}s")
@@ -0,0 +1,140 @@
+"""Module that contains a persistent exec session to run many commands in a container over a single exec socket"""
+from docker.utils.socket import STDOUT, frames_iter
+import json
+import struct
+import threading
+import typing
+
+# Worker run inside the container. Requests are a 4 byte big endian length followed by a
+# JSON object with the command and its environment, a zero length ends the session.
+# Responses are the exit code, stdout length and stderr length followed by both outputs.
+WORKER = """
+import json, os, struct, subprocess, sys
+stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+def read(n):
+    data = b""
+    while len(data) < n:
+        chunk = stdin.read(n - len(data))
+        if not chunk:
+            sys.exit(0)
+        data += chunk
+    return data
+while True:
+    size, = struct.unpack(">I", read(4))
+    if not size:
+        break
+    request = json.loads(read(size).decode())
+    env = dict(os.environ)
+    env.update(request["env"])
+    proc = subprocess.run(["bash", "-c", request["cmd"]], stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+    stdout.write(struct.pack(">iII", proc.returncode, len(proc.stdout), len(proc.stderr)) + proc.stdout + proc.stderr)
+    stdout.flush()
+"""
+REQUEST_HEADER = struct.Struct(">I")
+RESPONSE_HEADER = struct.Struct(">iII")
+
+
+class ExecSessionError(Exception):
+    """Raised when the session worker is gone or the exec socket is closed."""
+
+
+class ExecSession:
+    """A long-lived worker process in a container, commands are sent as framed requests over its exec socket.
+
+    A regular exec creates, starts and inspects a new exec instance through the docker API for every
+    command. A session does it once, then every command is a write and a read on the same socket.
+
+    Args:
+        container: The docker Container object.
+        user: User to execute the commands as.
+
+    Attributes:
+        user (str): User the commands are executed as.
+        worker_stderr (bytes): Error output of the worker itself, not of the commands.
+
+    """
+
+    def __init__(self, container, user: str = "movai") -> None:
+        self.user = user
+        self.worker_stderr = b""
+        exec_result = container.exec_run(
+            cmd=["python3", "-u", "-c", WORKER], user=user, stdin=True, socket=True
+        )
+        self._socket = exec_result.output
+        # docker-py returns a SocketIO wrapper for unix sockets, writes go to the raw socket
+        self._raw_socket = getattr(self._socket, "_sock", self._socket)
+        self._frames = frames_iter(self._socket, tty=False)
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self) -> "ExecSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _read(self, size: int) -> bytes:
+        """Read exactly size bytes of the worker stdout, demultiplexing the docker stream."""
+        while len(self._buffer) < size:
+            try:
+                stream, data = next(self._frames)
+            except StopIteration:
+                self._closed = True
+                raise ExecSessionError(
+                    "Exec session closed by the container: "
+                    + self.worker_stderr.decode(errors="replace").strip()
+                )
+            if stream == STDOUT:
+                self._buffer += data
+            else:
+                self.worker_stderr += data
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def run(
+        self, cmd: str, environment: typing.Union[dict, list, None] = None
+    ) -> typing.Tuple[int, bytes, bytes]:
+        """Run a command with ``bash -c`` in the session.
+
+        Args:
+            cmd: Command to be executed.
+            environment: A dictionary or a list of strings in the following format
+                        ``["PASSWORD=xxx"]`` or ``{"PASSWORD": "xxx"}``.
+
+        Returns:
+            A tuple of (exit_code, stdout, stderr).
+
+        Raises:
+            ExecSessionError: If the session is closed.
+
+        """
+        if isinstance(environment, list):
+            environment = dict(item.split("=", 1) for item in environment)
+        request = json.dumps({"cmd": cmd, "env": environment or {}}).encode()
+        with self._lock:
+            if self._closed:
+                raise ExecSessionError("Exec session is closed")
+            try:
+                self._raw_socket.sendall(REQUEST_HEADER.pack(len(request)) + request)
+                exit_code, stdout_size, stderr_size = RESPONSE_HEADER.unpack(
+                    self._read(RESPONSE_HEADER.size)
+                )
+                stdout = self._read(stdout_size)
+                stderr = self._read(stderr_size)
+            except OSError as e:
+                self._closed = True
+                raise ExecSessionError(f"Exec session failed: {e}")
+        return exit_code, stdout, stderr
+
+    def close(self) -> None:
+        """Ask the worker to exit and close the socket."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                try:
+                    self._raw_socket.sendall(REQUEST_HEADER.pack(0))
+                except OSError:
+                    pass
+            self._socket.close()
@@ -0,0 +1,303 @@
+"""Module that contains the fast import and export of manifests, reading and writing the MOV.AI Redis directly from the host"""
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.manifest_index import Manifest
+from movai_developer_tools.utils.metadata_status import canonical_digest
+from movai_developer_tools.utils.redis_client import RedisClient, RedisError
+from movai_developer_tools.utils.tree_diff import atomic_write
+import fnmatch
+import json
+import os
+import pathlib
+import re
+import typing
+
+# Keys or values sent per MSET, MGET and DEL command
+BATCH_SIZE = 1000
+# Commands sent per pipeline
+PIPELINE_SIZE = 100
+
+
+def flatten(type_name: str, name: str, data: dict) -> dict:
+    """Flatten a metadata object into the keys of the MOV.AI database.
+
+    Every leaf attribute is a key made of the ``Attr:key`` pairs of its path, scalar attributes
+    having an empty key, e.g. ``Flow:my_flow,Container:c1,ContainerFlow:``. Values are JSON.
+
+    Args:
+        type_name: Metadata type, e.g. Flow.
+        name: Metadata name.
+        data: Attributes of the object, as in ``metadata/<Type>/<name>.json`` under type and name.
+
+    Returns:
+        A dictionary of key to encoded value.
+
+    Raises:
+        ValueError: If a name contains a key separator.
+
+    """
+    keys = {}
+
+    def walk(prefix: str, attributes: dict) -> None:
+        for attribute, value in attributes.items():
+            if not attribute or "," in attribute or ":" in attribute:
+                raise ValueError(f"attribute {attribute!r} of {prefix} cannot be a key")
+            if isinstance(value, dict) and value:
+                for key, child in value.items():
+                    if not key or "," in key or ":" in key:
+                        raise ValueError(
+                            f"key {key!r} of {prefix}{attribute} cannot be a key"
+                        )
+                    if isinstance(child, dict) and child:
+                        walk(f"{prefix}{attribute}:{key},", child)
+                    else:
+                        keys[f"{prefix}{attribute}:{key}"] = json.dumps(child)
+            else:
+                keys[f"{prefix}{attribute}:"] = json.dumps(value)
+
+    if "," in name or ":" in name:
+        raise ValueError(f"name {type_name}:{name} cannot be a key")
+    walk(f"{type_name}:{name},", data)
+    return keys
+
+
+def unflatten(items: typing.Iterable[tuple]) -> dict:
+    """Rebuild metadata objects from the keys of the MOV.AI database, the inverse of flatten.
+
+    Args:
+        items: Tuples of (key, encoded value).
+
+    Returns:
+        A dictionary of type to name to attributes.
+
+    """
+    objects = {}
+    for key, value in items:
+        segments = [segment.split(":", 1) for segment in key.split(",")]
+        node = objects
+        for attribute, name in segments[:-1]:
+            node = node.setdefault(attribute, {}).setdefault(name, {})
+        attribute, name = segments[-1]
+        decoded = json.loads(value)
+        if name:
+            node.setdefault(attribute, {})[name] = decoded
+        else:
+            node[attribute] = decoded
+    return objects
+
+
+def manifest_objects(manifest: Manifest) -> list:
+    """Return the metadata files of a manifest, resolving glob entries against the metadata directory.
+
+    Args:
+        manifest: The manifest.
+
+    Returns:
+        A list of (type, name, path) of the existing files.
+
+    """
+    names = manifest.metadata_names() if os.path.isdir(manifest.metadata_dir) else {}
+    objects = []
+    for entry in manifest.entries:
+        for name in sorted(fnmatch.filter(names.get(entry.type, ()), entry.name)):
+            path = os.path.join(manifest.metadata_dir, entry.type, name + ".json")
+            objects.append((entry.type, name, path))
+    return objects
+
+
+def _batches(items: list, size: int) -> typing.Iterator[list]:
+    """Yield consecutive slices of items."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _send(client: RedisClient, commands: list) -> list:
+    """Send commands in pipelines of PIPELINE_SIZE and return their replies."""
+    replies = []
+    for batch in _batches(commands, PIPELINE_SIZE):
+        replies.extend(client.pipeline(batch))
+    return replies
+
+
+def _transaction(client: RedisClient, commands: list) -> None:
+    """Run commands in a MULTI/EXEC transaction, readers never see a part of them applied.
+
+    Raises:
+        RedisError: If the transaction or any of its commands failed.
+
+    """
+    replies = _send(client, [("MULTI",), *commands, ("EXEC",)])
+    failed = [reply for reply in replies[-1] or () if isinstance(reply, RedisError)]
+    if replies[-1] is None or failed:
+        raise RedisError(f"Transaction failed: {failed[0] if failed else 'aborted'}")
+
+
+def _escape(text: str) -> str:
+    """Escape the glob characters of a key pattern."""
+    return re.sub(r"([*?\[\]\\])", r"\\\1", text)
+
+
+def object_keys(client: RedisClient, type_name: str, name: str) -> dict:
+    """Return the keys of an object and their values.
+
+    Args:
+        client: Redis client.
+        type_name: Metadata type.
+        name: Metadata name.
+
+    Returns:
+        A dictionary of key to value, as bytes.
+
+    """
+    keys = client.scan(f"{_escape(type_name)}:{_escape(name)},*")
+    if not keys:
+        return {}
+    return dict(zip(keys, client.execute("MGET", *keys)))
+
+
+def layout_differences(type_name: str, name: str, data: dict, stored: dict) -> list:
+    """Compare the keys flatten gives for an object with the keys the backup tool stored for it.
+
+    Args:
+        type_name: Metadata type.
+        name: Metadata name.
+        data: Attributes of the object, as in its metadata file.
+        stored: Keys and values of the object in the database, see object_keys.
+
+    Returns:
+        A sorted list of descriptions of the keys that differ, empty if the layouts agree.
+
+    """
+    expected = flatten(type_name, name, data)
+    differences = []
+    for key in sorted(expected.keys() | stored.keys()):
+        if key not in stored:
+            differences.append(f"{key} is not stored by the backup tool")
+        elif key not in expected:
+            differences.append(f"{key} is stored by the backup tool only")
+        else:
+            try:
+                same = json.loads(stored[key]) == json.loads(expected[key])
+            except ValueError:
+                same = False
+            if not same:
+                differences.append(
+                    f"{key} is {stored[key]!r} instead of {expected[key]!r}"
+                )
+    return differences
+
+
+def _object_name(key: str) -> str:
+    """Return the name of the object a key belongs to."""
+    return key.split(",", 1)[0].split(":", 1)[1]
+
+
+def existing_keys(client: RedisClient, type_names: typing.Iterable[str]) -> dict:
+    """Return the keys of the objects of some types, grouped by (type, name).
+
+    Args:
+        client: Redis client.
+        type_names: Metadata types.
+
+    Returns:
+        A dictionary of (type, name) to a list of keys.
+
+    """
+    objects = {}
+    for type_name in sorted(set(type_names)):
+        for key in client.scan(f"{type_name}:*"):
+            objects.setdefault((type_name, _object_name(key)), []).append(key)
+    return objects
+
+
+def import_manifests(client: RedisClient, manifests: typing.Iterable[Manifest]) -> int:
+    """Write the metadata objects of manifests to the MOV.AI database, replacing the existing ones.
+
+    All the keys of the imported objects are deleted and written back with batched DEL and MSET
+    commands, in a few pipelines instead of round trips per object. They run in one transaction,
+    so readers see either the previous objects or the imported ones.
+
+    Args:
+        client: Redis client.
+        manifests: Manifests with their metadata files in the host.
+
+    Returns:
+        The number of imported objects.
+
+    Raises:
+        ValueError: If a metadata file cannot be read or flattened.
+        RedisError: If Redis fails.
+
+    """
+    objects = {}
+    for manifest in manifests:
+        for type_name, name, path in manifest_objects(manifest):
+            with open(path) as file:
+                content = json.load(file)
+            # The file holds {"<Type>": {"<name>": {attributes}}}
+            data = content.get(type_name, {}).get(name)
+            if not isinstance(data, dict):
+                raise ValueError(f"{path} does not describe {type_name}:{name}")
+            objects[(type_name, name)] = flatten(type_name, name, data)
+    existing = existing_keys(client, (type_name for type_name, _ in objects))
+    stale = [key for obj in objects for key in existing.get(obj, ())]
+    commands = [("DEL", *keys) for keys in _batches(stale, BATCH_SIZE)]
+    pairs = [
+        item for keys in objects.values() for pair in keys.items() for item in pair
+    ]
+    commands += [("MSET", *batch) for batch in _batches(pairs, 2 * BATCH_SIZE)]
+    if commands:
+        _transaction(client, commands)
+    return len(objects)
+
+
+def export_manifests(client: RedisClient, manifests: typing.Iterable[Manifest]) -> list:
+    """Write the metadata objects of manifests from the MOV.AI database to their metadata directories.
+
+    Files whose content did not change, ignoring the JSON formatting, are not rewritten.
+
+    Args:
+        client: Redis client.
+        manifests: Manifests in the host.
+
+    Returns:
+        The list of written file paths.
+
+    Raises:
+        RedisError: If Redis fails.
+
+    """
+    manifests = list(manifests)
+    existing = existing_keys(
+        client, (entry.type for manifest in manifests for entry in manifest.entries)
+    )
+    selected = {}
+    for manifest in manifests:
+        for entry in manifest.entries:
+            for type_name, name in existing:
+                if type_name == entry.type and fnmatch.fnmatchcase(name, entry.name):
+                    selected[(type_name, name)] = manifest.metadata_dir
+    keys = [key for obj in sorted(selected) for key in existing[obj]]
+    values = []
+    for batch in _batches(keys, BATCH_SIZE * PIPELINE_SIZE):
+        for reply in client.pipeline(
+            [("MGET", *chunk) for chunk in _batches(batch, BATCH_SIZE)]
+        ):
+            values.extend(reply)
+    objects = unflatten(
+        (key, value) for key, value in zip(keys, values) if value is not None
+    )
+    written = []
+    for (type_name, name), metadata_dir in sorted(selected.items()):
+        data = {type_name: {name: objects.get(type_name, {}).get(name, {})}}
+        path = pathlib.Path(metadata_dir, type_name, name + ".json")
+        content = json.dumps(data, indent=4).encode()
+        if path.exists() and canonical_digest(path.read_bytes()) == canonical_digest(
+            content
+        ):
+            continue
+        atomic_write(path, content)
+        written.append(str(path))
+    logger.debug(
+        f"Exported {len(selected)} objects in {client.round_trips} round trips"
+    )
+    return written
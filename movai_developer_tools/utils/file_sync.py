@@ -0,0 +1,391 @@
+"""Module that contains the delta sync of a host directory into a container, without a bind mount"""
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.file_transfer import TransferError, exec_output
+from movai_developer_tools.utils.tree_diff import TreeChanges, tree_files
+from argparse import ArgumentParser, Namespace
+import hashlib
+import io
+import json
+import pathlib
+import shlex
+import stat
+import sys
+import tarfile
+import time
+import typing
+
+# Size of the blocks compared between the host and the container
+BLOCK_SIZE = 1 << 16
+# A changed file is sent whole when more than this fraction of its blocks changed
+MAX_PATCH_RATIO = 0.5
+
+# Run in the container over the destination. Lists every regular file with its size and mtime
+# and, only for the files the host has with another size or mtime, the sha256 and block digests.
+SIGNATURE_SCRIPT = """import hashlib, json, os, stat, sys
+dest, host_file, block_size = sys.argv[1], sys.argv[2], int(sys.argv[3])
+with open(host_file) as file:
+    host = json.load(file)
+result = {}
+for root, dirs, files in os.walk(dest):
+    for name in files:
+        path = os.path.join(root, name)
+        rel_path = os.path.relpath(path, dest)
+        info = os.lstat(path)
+        if not stat.S_ISREG(info.st_mode):
+            continue
+        entry = result[rel_path] = {"size": info.st_size, "mtime": int(info.st_mtime)}
+        if rel_path not in host or host[rel_path] == [entry["size"], entry["mtime"]]:
+            continue
+        digest, blocks = hashlib.sha256(), []
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(block_size), b""):
+                digest.update(block)
+                blocks.append(hashlib.sha1(block).hexdigest())
+        entry["sha256"], entry["blocks"] = digest.hexdigest(), blocks
+print(json.dumps(result))
+"""
+
+# Run in the container over the staging directory holding plan.json, the whole files (w<i>)
+# and the changed blocks of the patched files (p<i>). Files are written by the exec user.
+APPLY_SCRIPT = """import json, os, shutil, sys
+dest, staging, block_size = sys.argv[1], sys.argv[2], int(sys.argv[3])
+with open(os.path.join(staging, "plan.json")) as file:
+    plan = json.load(file)
+
+def target(rel_path):
+    path = os.path.join(dest, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def finish(path, mtime, mode):
+    os.chmod(path, mode)
+    os.utime(path, (mtime, mtime))
+
+for index, (rel_path, size, mtime, mode) in enumerate(plan["whole"]):
+    path = target(rel_path)
+    tmp_path = os.path.join(os.path.dirname(path), ".movai-sync." + os.path.basename(path))
+    shutil.copyfile(os.path.join(staging, "w%d" % index), tmp_path)
+    finish(tmp_path, mtime, mode)
+    os.replace(tmp_path, path)
+for index, (rel_path, size, mtime, mode, blocks) in enumerate(plan["patches"]):
+    path = target(rel_path)
+    with open(os.path.join(staging, "p%d" % index), "rb") as patch, open(path, "r+b") as file:
+        for block in blocks:
+            file.seek(block * block_size)
+            file.write(patch.read(min(block_size, size - block * block_size)))
+        file.truncate(size)
+    finish(path, mtime, mode)
+for rel_path, mtime in plan["touched"]:
+    os.utime(os.path.join(dest, rel_path), (mtime, mtime))
+for rel_path in plan["removed"]:
+    os.remove(os.path.join(dest, rel_path))
+"""
+
+
+class SyncPlan(typing.NamedTuple):
+    """What a sync sends to the container.
+
+    Attributes:
+        whole (list): [path, size, mtime, mode] of the files sent whole.
+        patches (list): [path, size, mtime, mode, changed block indexes] of the files patched in place.
+        touched (list): [path, mtime] of the files with the same content but another mtime.
+        removed (list): Paths of the files removed from the container.
+        added (set): Paths of the files that did not exist in the container.
+
+    """
+
+    whole: list
+    patches: list
+    touched: list
+    removed: list
+    added: set
+
+    def is_empty(self) -> bool:
+        """Return True if the container is already in sync."""
+        return not (self.whole or self.patches or self.touched or self.removed)
+
+    def payload_size(self, block_size: int = BLOCK_SIZE) -> int:
+        """Return the number of bytes of file content sent."""
+        size = sum(entry[1] for entry in self.whole)
+        for _, file_size, _, _, blocks in self.patches:
+            size += sum(
+                min(block_size, file_size - block * block_size) for block in blocks
+            )
+        return size
+
+    def changes(self) -> TreeChanges:
+        """Return the changes made in the container."""
+        modified = [entry[0] for entry in self.whole if entry[0] not in self.added]
+        modified += [entry[0] for entry in self.patches]
+        return TreeChanges(sorted(self.added), sorted(modified), self.removed)
+
+
+def local_signature(path: pathlib.Path, block_size: int = BLOCK_SIZE) -> tuple:
+    """Return the sha256 and the sha1 of every block of a file, like the signature script."""
+    digest, blocks = hashlib.sha256(), []
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+            blocks.append(hashlib.sha1(block).hexdigest())
+    return digest.hexdigest(), blocks
+
+
+def plan_sync(
+    src: pathlib.Path, remote: dict, block_size: int = BLOCK_SIZE
+) -> SyncPlan:
+    """Compare the files of a host directory with the signature of the destination in the container.
+
+    Files with the same size and mtime are skipped without reading them, like rsync.
+
+    Args:
+        src: Directory in the host.
+        remote: Output of the signature script.
+        block_size: Size of the compared blocks.
+
+    Returns:
+        A SyncPlan.
+
+    """
+    whole, patches, touched = [], [], []
+    local = sorted(tree_files(src))
+    for rel_path in local:
+        info = (src / rel_path).stat()
+        size, mtime, mode = info.st_size, int(info.st_mtime), stat.S_IMODE(info.st_mode)
+        entry = remote.get(rel_path)
+        if entry is not None and (entry["size"], entry["mtime"]) == (size, mtime):
+            continue
+        if entry is None or "sha256" not in entry:
+            whole.append([rel_path, size, mtime, mode])
+            continue
+        digest, blocks = local_signature(src / rel_path, block_size)
+        if digest == entry["sha256"]:
+            touched.append([rel_path, mtime])
+            continue
+        changed = [
+            index
+            for index, block in enumerate(blocks)
+            if index >= len(entry["blocks"]) or entry["blocks"][index] != block
+        ]
+        if len(changed) > MAX_PATCH_RATIO * len(blocks):
+            whole.append([rel_path, size, mtime, mode])
+        else:
+            patches.append([rel_path, size, mtime, mode, changed])
+    removed = sorted(set(remote) - set(local))
+    return SyncPlan(whole, patches, touched, removed, set(local) - set(remote))
+
+
+def _tar_member(name: str, size: int) -> bytes:
+    """Return the tar header of a regular file."""
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mode = 0o644
+    info.mtime = time.time()
+    return info.tobuf(tarfile.PAX_FORMAT)
+
+
+def _tar_data(chunks: typing.Iterable[bytes], size: int) -> typing.Iterator[bytes]:
+    """Yield exactly size bytes of chunks, zero padded, followed by the tar block padding."""
+    sent = 0
+    for chunk in chunks:
+        chunk = chunk[: size - sent]
+        sent += len(chunk)
+        yield chunk
+    if sent < size:
+        yield bytes(size - sent)
+    yield bytes(-size % tarfile.BLOCKSIZE)
+
+
+def _read_blocks(
+    path: pathlib.Path, blocks: list, block_size: int
+) -> typing.Iterator[bytes]:
+    """Yield the given blocks of a file."""
+    with open(path, "rb") as file:
+        for block in blocks:
+            file.seek(block * block_size)
+            yield file.read(block_size)
+
+
+def _read_file(path: pathlib.Path, chunk_size: int = 1 << 20) -> typing.Iterator[bytes]:
+    """Yield the content of a file by chunks."""
+    with open(path, "rb") as file:
+        yield from iter(lambda: file.read(chunk_size), b"")
+
+
+def tar_stream(
+    src: pathlib.Path, plan: SyncPlan, block_size: int = BLOCK_SIZE
+) -> typing.Iterator[bytes]:
+    """Yield the tar archive of a sync, built while it is sent so no file is held in memory.
+
+    Args:
+        src: Directory in the host.
+        plan: The plan of the sync.
+        block_size: Size of the compared blocks.
+
+    Yields:
+        Chunks of the archive, see APPLY_SCRIPT for its content.
+
+    """
+    plan_data = json.dumps(
+        {
+            "whole": plan.whole,
+            "patches": plan.patches,
+            "touched": plan.touched,
+            "removed": plan.removed,
+        }
+    ).encode()
+    yield _tar_member("plan.json", len(plan_data))
+    yield from _tar_data([plan_data], len(plan_data))
+    for index, (rel_path, size, _, _) in enumerate(plan.whole):
+        yield _tar_member(f"w{index}", size)
+        yield from _tar_data(_read_file(src / rel_path), size)
+    for index, (rel_path, size, _, _, blocks) in enumerate(plan.patches):
+        patch_size = sum(min(block_size, size - block * block_size) for block in blocks)
+        yield _tar_member(f"p{index}", patch_size)
+        yield from _tar_data(
+            _read_blocks(src / rel_path, blocks, block_size), patch_size
+        )
+    yield bytes(2 * tarfile.BLOCKSIZE)
+
+
+def _put_scripts(container, staging: str, host: dict) -> None:
+    """Write the sync scripts and the host file list in the staging directory."""
+    files = {
+        "signature.py": SIGNATURE_SCRIPT.encode(),
+        "apply.py": APPLY_SCRIPT.encode(),
+        "host.json": json.dumps(host).encode(),
+    }
+    with io.BytesIO() as buffer:
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            for name, data in files.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(data))
+        if not container.put_archive(staging, buffer.getvalue()):
+            raise TransferError(f"Could not write the sync scripts to {staging}")
+
+
+def sync_to_container(
+    container,
+    src: typing.Union[str, pathlib.Path],
+    dest: str,
+    block_size: int = BLOCK_SIZE,
+    dry_run: bool = False,
+    user: str = "",
+) -> SyncPlan:
+    """Make a directory in a container mirror a host directory, sending only the changed files or blocks.
+
+    The container computes the signature of the destination in one exec, the changes are sent
+    as a single streamed tar archive and applied in one more exec.
+
+    Args:
+        container: The docker Container object.
+        src: Directory in the host.
+        dest: Directory in the container, created if needed.
+        block_size: Size of the compared blocks.
+        dry_run: If True, only compute the changes.
+        user: User to execute the commands as, owner of the written files. The user of the
+            container if empty.
+
+    Returns:
+        The SyncPlan that was applied.
+
+    Raises:
+        TransferError: If a command fails in the container.
+
+    """
+    src = pathlib.Path(src)
+    if not src.is_dir():
+        raise TransferError(f"{src} is not a directory")
+    host = {}
+    for rel_path in tree_files(src):
+        info = (src / rel_path).stat()
+        host[rel_path] = [info.st_size, int(info.st_mtime)]
+    staging = exec_output(container, "mktemp -d /tmp/movai-sync.XXXXXX", user).strip()
+    quoted_dest = shlex.quote(dest)
+    try:
+        _put_scripts(container, staging, host)
+        remote = json.loads(
+            exec_output(
+                container,
+                f"python3 {staging}/signature.py {quoted_dest} {staging}/host.json {block_size}",
+                user,
+            )
+        )
+        plan = plan_sync(src, remote, block_size)
+        if dry_run or plan.is_empty():
+            return plan
+        if not container.put_archive(staging, tar_stream(src, plan, block_size)):
+            raise TransferError(f"Could not send the changes to {staging}")
+        exec_output(
+            container,
+            f"mkdir -p {quoted_dest} && python3 {staging}/apply.py {quoted_dest} {staging} {block_size}",
+            user,
+        )
+        return plan
+    finally:
+        exec_output(container, f"rm -rf {staging}", user)
+
+
+def add_sync_arguments(parser: ArgumentParser) -> None:
+    """Add the arguments of the sync sub-command to a handler parser.
+
+    Args:
+        parser: The handler parser.
+
+    """
+    parser.add_argument(
+        "--sync-src",
+        help="Directory in the host to sync into the container (sync)",
+    )
+    parser.add_argument(
+        "--sync-dest",
+        help="Directory in the container mirrored from --sync-src (sync), files not in --sync-src are removed",
+    )
+    parser.add_argument(
+        "--sync-block-size",
+        help=f"Size in bytes of the blocks compared to send only the changed parts of a file (sync), defaults to {BLOCK_SIZE}",
+        type=int,
+        default=BLOCK_SIZE,
+    )
+    parser.add_argument(
+        "--sync-dry",
+        help="Only print the changes (sync)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--sync-user",
+        help="User writing the files in the container (sync), defaults to the user the container runs as",
+        default="",
+    )
+
+
+def run_sync(container_tools, args: Namespace) -> None:
+    """Sync --sync-src into --sync-dest of the selected container.
+
+    Args:
+        container_tools: ContainerTools object of the selected container.
+        args: A set of parsed args.
+
+    """
+    if not args.sync_src or not args.sync_dest:
+        logger.error("The sync sub-command requires --sync-src and --sync-dest")
+        sys.exit(1)
+    try:
+        plan = sync_to_container(
+            container_tools.container,
+            args.sync_src,
+            args.sync_dest,
+            args.sync_block_size,
+            args.sync_dry,
+            args.sync_user,
+        )
+    except TransferError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    plan.changes().log(f"{args.sync_src} -> {container_tools.name()}:{args.sync_dest}")
+    if not args.sync_dry:
+        logger.info(
+            f"Sent {plan.payload_size(args.sync_block_size)} bytes: {len(plan.whole)} whole files, "
+            f"{len(plan.patches)} patched, {len(plan.touched)} with only a new mtime"
+        )
@@ -0,0 +1,340 @@
+"""Module that contains a streaming, resumable copy of files from containers to the host"""
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.tree_diff import file_digest
+from argparse import ArgumentParser, Namespace
+import docker
+import json
+import os
+import pathlib
+import requests
+import shlex
+import sys
+import time
+import typing
+import zlib
+
+# Bytes read per dd block in the container
+BLOCK_SIZE = 1 << 20
+# Progress is logged every time this fraction of the file is written
+PROGRESS_STEP = 0.1
+
+
+class TransferError(Exception):
+    """Raised when a copy fails and cannot be resumed."""
+
+
+class RemoteFile(typing.NamedTuple):
+    """File inside a container.
+
+    Attributes:
+        path (str): Absolute path in the container.
+        size (int): Size in bytes.
+        mtime (int): Modification time, used to detect a partial download of another version.
+
+    """
+
+    path: str
+    size: int
+    mtime: int
+
+
+def exec_stream(container, cmd: str, user: str = "") -> typing.Iterator[bytes]:
+    """Run a command in a container and yield its standard output as it arrives.
+
+    Unlike exec_run, the output is never held in memory as a whole.
+
+    Args:
+        container: The docker Container object.
+        cmd: Command run with ``bash -c``.
+        user: User to execute the command as, the user of the container if empty.
+
+    Yields:
+        Chunks of the standard output.
+
+    Raises:
+        TransferError: If the command exits with an error, after its output was consumed.
+
+    """
+    api = container.client.api
+    exec_id = api.exec_create(container.id, ["bash", "-c", cmd], user=user)["Id"]
+    stderr = b""
+    for stdout, error in api.exec_start(exec_id, stream=True, demux=True):
+        if error:
+            stderr += error
+        if stdout:
+            yield stdout
+    exit_code = api.exec_inspect(exec_id)["ExitCode"]
+    if exit_code:
+        raise TransferError(
+            f"'{cmd}' exited with {exit_code}: {stderr.decode(errors='replace').strip()}"
+        )
+
+
+def exec_output(container, cmd: str, user: str = "") -> str:
+    """Run a command in a container and return its decoded standard output."""
+    return b"".join(exec_stream(container, cmd, user)).decode()
+
+
+def list_remote_files(container, path: str, user: str = "") -> list:
+    """List the regular files of a path in a container, a file or a directory tree.
+
+    Args:
+        container: The docker Container object.
+        path: Path in the container.
+        user: User to execute the commands as, the user of the container if empty.
+
+    Returns:
+        A list of RemoteFile, sorted by path.
+
+    """
+    output = exec_output(
+        container,
+        f"find -L {shlex.quote(path)} -type f -printf '%s %T@ %p\\0'",
+        user,
+    )
+    files = []
+    for entry in filter(None, output.split("\0")):
+        size, mtime, file_path = entry.split(" ", 2)
+        files.append(RemoteFile(file_path, int(size), int(float(mtime))))
+    return sorted(files)
+
+
+def read_range(
+    container,
+    remote: RemoteFile,
+    part: pathlib.Path,
+    offset: int,
+    compress: bool = False,
+    user: str = "",
+) -> None:
+    """Append the bytes of a remote file from offset to its end to a partial file.
+
+    Args:
+        container: The docker Container object.
+        remote: The file to copy.
+        part: Partial file in the host, offset bytes long.
+        offset: First byte to read.
+        compress: If True, the data is gzip compressed in the container and decompressed on the fly.
+        user: User to execute the commands as, the user of the container if empty.
+
+    """
+    # Ranged reader, only the bytes that are still missing
+    cmd = (
+        f"dd if={shlex.quote(remote.path)} bs={BLOCK_SIZE} iflag=skip_bytes,count_bytes "
+        f"skip={offset} count={remote.size - offset} status=none"
+    )
+    if compress:
+        cmd += " | gzip -1"
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if compress else None
+    next_progress = offset / remote.size + PROGRESS_STEP
+    with open(part, "ab") as file:
+        for chunk in exec_stream(container, cmd, user):
+            if decompressor:
+                chunk = decompressor.decompress(chunk)
+            file.write(chunk)
+            offset += len(chunk)
+            if offset / remote.size >= next_progress:
+                logger.info(
+                    f"{remote.path}: {offset * 100 // remote.size}% of {remote.size} bytes"
+                )
+                next_progress += PROGRESS_STEP
+
+
+def _resume_offset(part: pathlib.Path, state_file: pathlib.Path, state: dict) -> int:
+    """Return the size of a partial file left by a previous run, if it is of the same version of the file."""
+    if part.exists() and state_file.exists():
+        with open(state_file) as file:
+            if json.load(file) == state:
+                return min(part.stat().st_size, state["size"])
+    return 0
+
+
+def download_file(
+    container,
+    remote: RemoteFile,
+    dest: typing.Union[str, pathlib.Path],
+    compress: bool = False,
+    retries: int = 5,
+    user: str = "",
+) -> str:
+    """Stream a file out of a container into dest, resuming interrupted transfers.
+
+    Data is appended to ``dest.part`` as it arrives. When the stream breaks, the copy resumes
+    from the size of the partial file using a ranged ``dd`` in the container, and a partial file
+    left by a previous run is resumed the same way if the remote file did not change. The
+    sha256 of the copy is compared with the one computed in the container before renaming it to dest.
+
+    Args:
+        container: The docker Container object.
+        remote: The file to copy, see list_remote_files.
+        dest: Path of the copy in the host.
+        compress: If True, the data is gzip compressed in the container and decompressed on the fly.
+        retries: Number of consecutive failed attempts before giving up.
+        user: User to execute the commands as, the user of the container if empty.
+
+    Returns:
+        The sha256 hex digest of the file.
+
+    Raises:
+        TransferError: If the copy failed after all retries or the checksums differ.
+
+    """
+    dest = pathlib.Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part = dest.with_name(dest.name + ".part")
+    state_file = dest.with_name(dest.name + ".part.json")
+    state = {"path": remote.path, "size": remote.size, "mtime": remote.mtime}
+
+    offset = _resume_offset(part, state_file, state)
+    if offset:
+        logger.info(f"Resuming {remote.path} at {offset} of {remote.size} bytes")
+    with open(part, "r+b" if offset else "wb") as file:
+        file.truncate(offset)
+    with open(state_file, "w") as file:
+        json.dump(state, file)
+
+    failures = 0
+    while offset < remote.size:
+        try:
+            read_range(container, remote, part, offset, compress, user)
+        except (
+            TransferError,
+            OSError,
+            zlib.error,
+            requests.exceptions.RequestException,
+            docker.errors.APIError,
+        ) as e:
+            failures += 1
+            if failures > retries:
+                raise TransferError(
+                    f"Copy of {remote.path} failed after {retries} retries, run again to resume: {e}"
+                )
+            # Only what reached the disk counts, the next attempt reads a new range from there
+            offset = part.stat().st_size
+            delay = min(2 ** (failures - 1), 30)
+            logger.warning(
+                f"Copy of {remote.path} interrupted at {offset} bytes ({e}), resuming in {delay}s"
+            )
+            time.sleep(delay)
+            continue
+        offset = part.stat().st_size
+        if offset < remote.size:
+            raise TransferError(
+                f"{remote.path} was truncated in the container while being copied"
+            )
+        failures = 0
+
+    # Checksum of the same byte range in the container, the file may still be growing
+    remote_digest = exec_output(
+        container, f"head -c {remote.size} {shlex.quote(remote.path)} | sha256sum", user
+    ).split()[0]
+    digest = file_digest(part, chunk_size=BLOCK_SIZE)
+    if digest != remote_digest:
+        part.unlink()
+        state_file.unlink()
+        raise TransferError(
+            f"Checksum of {remote.path} does not match ({digest} != {remote_digest}), the partial copy was discarded"
+        )
+    os.replace(part, dest)
+    state_file.unlink()
+    return digest
+
+
+def copy_from_container(
+    container,
+    src: str,
+    dest: typing.Union[str, pathlib.Path],
+    compress: bool = False,
+    retries: int = 5,
+    user: str = "",
+) -> list:
+    """Copy a file or a directory tree out of a container, file by file, like ``docker cp``.
+
+    Args:
+        container: The docker Container object.
+        src: Path in the container.
+        dest: Path in the host. If it is an existing directory, the copy is created inside it.
+        compress: If True, the data is gzip compressed in the container.
+        retries: Number of consecutive failed attempts per file before giving up.
+        user: User to execute the commands as, the user of the container if empty.
+
+    Returns:
+        A list of (host path, sha256 digest) of the copied files.
+
+    """
+    dest = pathlib.Path(dest)
+    src = src.rstrip("/") or "/"
+    if dest.is_dir():
+        dest = dest / os.path.basename(src)
+    copied = []
+    for remote in list_remote_files(container, src, user):
+        rel_path = os.path.relpath(remote.path, src)
+        path = dest if rel_path == "." else dest / rel_path
+        copied.append(
+            (path, download_file(container, remote, path, compress, retries, user))
+        )
+    return copied
+
+
+def add_copy_arguments(parser: ArgumentParser) -> None:
+    """Add the arguments of the cp sub-command to a handler parser.
+
+    Args:
+        parser: The handler parser.
+
+    """
+    parser.add_argument(
+        "--cp-src",
+        help="File or directory in the container to copy (cp)",
+    )
+    parser.add_argument(
+        "--cp-dest",
+        help="Destination in the host (cp), defaults to CWD",
+        default=".",
+    )
+    parser.add_argument(
+        "--cp-compress",
+        help="Compress the data in the container while copying (cp), useful over slow links",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--cp-user",
+        help="User reading the files in the container (cp), defaults to the user the container runs as",
+        default="",
+    )
+    parser.add_argument(
+        "--cp-retries",
+        help="Number of times an interrupted copy is resumed before giving up (cp), defaults to 5",
+        type=int,
+        default=5,
+    )
+
+
+def run_copy(container_tools, args: Namespace) -> None:
+    """Copy the --cp-src path of the selected container to --cp-dest.
+
+    Args:
+        container_tools: ContainerTools object of the selected container.
+        args: A set of parsed args.
+
+    """
+    if not args.cp_src:
+        logger.error("The cp sub-command requires --cp-src")
+        sys.exit(1)
+    try:
+        copied = copy_from_container(
+            container_tools.container,
+            args.cp_src,
+            args.cp_dest,
+            args.cp_compress,
+            args.cp_retries,
+            args.cp_user,
+        )
+    except TransferError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    if not copied:
+        logger.error(f"No files found at {args.cp_src}")
+        sys.exit(1)
+    for path, digest in copied:
+        logger.info(f"{path} sha256:{digest}")
@@ -0,0 +1,325 @@
+"""Module that contains functions to run the same operation against many docker daemons and MOV.AI stacks concurrently and aggregate the results per host."""
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.container_tools import COMPOSE_PROJECT_LABEL
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
+import docker
+import io
+import logging
+import os
+import re
+import sys
+import threading
+import typing
+
+# Name of the containers of a MOV.AI stack that --all-matching looks for
+STACK_REGEX = "^(spawner|ros-master)-.*"
+
+
+class Target(typing.NamedTuple):
+    """A docker daemon, or a MOV.AI stack in it, an operation runs against.
+
+    Attributes:
+        name (str): Name used to group the output, e.g. the robot name.
+        docker_host (str): Docker daemon URL, e.g. ``unix:///var/run/docker.sock``
+            or ``tcp://robot-1:2375``. None for the daemon of the environment.
+        project (str): Docker compose project of the stack, None to select the containers by name.
+
+    """
+
+    name: str
+    docker_host: typing.Optional[str]
+    project: typing.Optional[str] = None
+
+
+class TargetResult(typing.NamedTuple):
+    """Result of an operation on a target.
+
+    Attributes:
+        target (Target): The target.
+        exit_code (int): 0 on success, the exit code of the operation otherwise.
+        output (str): Everything logged and printed by the operation.
+        value: Return value of the operation.
+
+    """
+
+    target: Target
+    exit_code: int
+    output: str
+    value: typing.Any = None
+
+
+def read_inventory(path: str) -> list:
+    """Read a host inventory file.
+
+    Every non empty line that is not a comment holds a docker daemon URL,
+    optionally preceded by a name: ``robot-1 tcp://10.0.0.11:2375``.
+
+    Args:
+        path: Path of the inventory file.
+
+    Returns:
+        A list of Target.
+
+    """
+    targets = []
+    with open(path) as file:
+        for line in file:
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            name, docker_host = (fields[0], fields[-1])
+            targets.append(Target(name, docker_host))
+    return targets
+
+
+class _ThreadOutput:
+    """Route logging records and stdout writes of registered threads to per-thread buffers.
+
+    Threads started by a registered thread, e.g. the stats sampler or the exec session readers
+    of an operation, write to the buffer of the thread that started them.
+    """
+
+    def __init__(self) -> None:
+        self.buffers = {}
+        self.stdout = sys.stdout
+        self.root_handlers = []
+        self.thread_start = threading.Thread.start
+
+    def register(self) -> io.StringIO:
+        buffer = io.StringIO()
+        self.buffers[threading.get_ident()] = buffer
+        return buffer
+
+    def _buffer(self):
+        buffer = self.buffers.get(threading.get_ident())
+        if buffer is None:
+            buffer = getattr(threading.current_thread(), "fleet_output", None)
+        return buffer
+
+    def _start(self, thread: threading.Thread) -> None:
+        """Start a thread, inheriting the buffer of the thread starting it."""
+        buffer = self._buffer()
+        if buffer is not None:
+            thread.fleet_output = buffer
+        self.thread_start(thread)
+
+    def write(self, data: str) -> int:
+        buffer = self._buffer()
+        return (buffer or self.stdout).write(data)
+
+    def flush(self) -> None:
+        if self._buffer() is None:
+            self.stdout.flush()
+
+    def __enter__(self) -> "_ThreadOutput":
+        root = logging.getLogger()
+        self.root_handlers = root.handlers
+        handler = logging.StreamHandler(self)
+        if self.root_handlers:
+            handler.setFormatter(self.root_handlers[0].formatter)
+        root.handlers = [handler]
+        sys.stdout = self
+        output = self
+        threading.Thread.start = lambda thread: output._start(thread)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        threading.Thread.start = self.thread_start
+        sys.stdout = self.stdout
+        logging.getLogger().handlers = self.root_handlers
+
+
+def discover_stacks(
+    targets: typing.Sequence[Target], regex: str = STACK_REGEX
+) -> tuple:
+    """Return a target per MOV.AI stack found on the docker daemons of targets.
+
+    The spawner and ros-master of a stack are paired by their docker compose project. Containers
+    without compose labels cannot be paired and are skipped with a warning.
+
+    Args:
+        targets: Docker daemons to search.
+        regex: Regular expression of the names of the stack containers.
+
+    Returns:
+        A tuple of the list of Target, one per stack, and the names of the targets without any stack.
+
+    """
+    stacks, missing = [], []
+    for target in targets:
+        try:
+            if target.docker_host:
+                client = docker.DockerClient(base_url=target.docker_host)
+            else:
+                client = docker.from_env()
+            containers = client.containers.list(filters={"name": regex}, sparse=True)
+        except docker.errors.DockerException as e:
+            logger.error(f"Could not list the containers of {target.name}: {e}")
+            missing.append(target.name)
+            continue
+        projects = set()
+        for container in containers:
+            labels = container.attrs.get("Labels") or {}
+            if COMPOSE_PROJECT_LABEL in labels:
+                projects.add(labels[COMPOSE_PROJECT_LABEL])
+            else:
+                logger.warning(
+                    f"{container.attrs['Names'][0].lstrip('/')} on {target.name} is not part of a compose project, skipped"
+                )
+        if not projects:
+            logger.error(f"No MOV.AI stack found on {target.name}")
+            missing.append(target.name)
+        for project in sorted(projects):
+            name = project if len(targets) == 1 else f"{target.name}/{project}"
+            stacks.append(Target(name, target.docker_host, project))
+    return stacks, missing
+
+
+def run_on_targets(
+    targets: typing.Sequence[Target],
+    operation: typing.Callable[[Target], typing.Any],
+    jobs: int = 8,
+) -> list:
+    """Run an operation against every target, at most jobs at a time.
+
+    The output of each operation is captured so that it can be shown grouped per target.
+    Exits (sys.exit) and exceptions of an operation only fail its own target.
+
+    Args:
+        targets: Targets to run against.
+        operation: Callable receiving a Target.
+        jobs: Maximum number of concurrent operations.
+
+    Returns:
+        A list of TargetResult, in the same order as targets.
+
+    """
+
+    def run(target: Target) -> TargetResult:
+        buffer = capture.register()
+        exit_code, value = 0, None
+        try:
+            value = operation(target)
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else int(bool(e.code))
+        except Exception:
+            logger.exception(f"Operation failed on {target.name}")
+            exit_code = 1
+        return TargetResult(target, exit_code, buffer.getvalue(), value)
+
+    with _ThreadOutput() as capture:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            return list(pool.map(run, targets))
+
+
+def report_results(results: typing.Sequence[TargetResult]) -> int:
+    """Print the output of every target grouped and return the aggregated exit code.
+
+    Args:
+        results: Results of run_on_targets.
+
+    Returns:
+        0 if every target succeeded, 1 otherwise.
+
+    """
+    for result in results:
+        status = "OK" if result.exit_code == 0 else f"FAILED ({result.exit_code})"
+        print(
+            f"=== {result.target.name} [{result.target.docker_host or 'local'}] {status}"
+        )
+        if result.output:
+            print(result.output.rstrip("\n"))
+    failed = [result.target.name for result in results if result.exit_code]
+    if failed:
+        logger.error(f"{len(failed)}/{len(results)} failed: {', '.join(failed)}")
+        return 1
+    logger.info(f"{len(results)}/{len(results)} succeeded")
+    return 0
+
+
+def add_fleet_arguments(parser: ArgumentParser, hosts: bool = True) -> None:
+    """Add the arguments to select the docker daemons and stacks to a handler parser.
+
+    Args:
+        parser: The handler parser.
+        hosts: If True, add the arguments to select other docker daemons.
+
+    """
+    if hosts:
+        parser.add_argument(
+            "--docker-host",
+            help="Docker daemon URL to use instead of the local one, e.g. tcp://robot:2375",
+        )
+        parser.add_argument(
+            "--hosts",
+            help="Inventory file with one docker daemon URL per line (optionally preceded by a name), runs the command on all of them",
+        )
+    parser.add_argument(
+        "--all-matching",
+        help="Run the command on every MOV.AI stack (docker compose project with a spawner or ros-master) of the docker daemon, concurrently",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--jobs",
+        help="Maximum number of hosts or stacks handled concurrently with --hosts or --all-matching, defaults to 8",
+        type=int,
+        default=8,
+    )
+
+
+def target_path(path: str, target: Target) -> str:
+    """Return a path or name with the target name inserted before its extension.
+
+    ``report.json`` on ``robot-1/sim-a`` becomes ``report.robot-1-sim-a.json``.
+
+    Args:
+        path: Path or name given for a single target.
+        target: The target.
+
+    Returns:
+        The path of the target.
+
+    """
+    root, ext = os.path.splitext(path.rstrip("/"))
+    name = re.sub(r"[^\w.-]+", "-", target.name)
+    return f"{root}.{name}{ext}"
+
+
+def execute_on_fleet(
+    executor_cls: type, args: Namespace, per_target: typing.Sequence[str] = ()
+) -> int:
+    """Execute a handler executor on every host of the inventory given with --hosts, or on every stack with --all-matching.
+
+    Args:
+        executor_cls: Executor class, a new instance is created per host or stack.
+        args: Parsed handler args.
+        per_target: Names of the args holding a file or name written by the executor, made per host or
+            stack with target_path so that concurrent targets do not overwrite each other.
+
+    Returns:
+        The aggregated exit code.
+
+    """
+    if getattr(args, "hosts", None):
+        targets = read_inventory(args.hosts)
+    else:
+        targets = [Target("local", getattr(args, "docker_host", None))]
+    missing = []
+    if args.all_matching:
+        targets, missing = discover_stacks(targets)
+
+    def operation(target: Target):
+        host_args = Namespace(**vars(args))
+        host_args.docker_host = target.docker_host
+        for name in per_target:
+            if getattr(args, name, None):
+                setattr(host_args, name, target_path(getattr(args, name), target))
+        if target.project:
+            # The stack is selected by its compose project, a pinned container does not apply
+            host_args.project = target.project
+            host_args.container_id = None
+        return executor_cls().execute(host_args)
+
+    exit_code = report_results(run_on_targets(targets, operation, args.jobs))
+    return 1 if missing else exit_code
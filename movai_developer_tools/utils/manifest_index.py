@@ -0,0 +1,204 @@
+"""Module that contains a host-side parser and validator for the manifest.txt files used by the MOV.AI backup tool"""
+from movai_developer_tools.utils import logger
+import fnmatch
+import os
+import re
+import sys
+import typing
+
+# A manifest entry is a metadata type and a name (or a glob pattern), e.g. Flow:my_flow
+ENTRY_REGEX = re.compile(r"^([A-Za-z][A-Za-z0-9_]*):(\S+)$")
+
+
+class ManifestEntry(typing.NamedTuple):
+    """A metadata object listed in a manifest.
+
+    Attributes:
+        type (str): Metadata type, e.g. Flow.
+        name (str): Metadata name, may be a glob pattern.
+
+    """
+
+    type: str
+    name: str
+
+    def __str__(self) -> str:
+        return f"{self.type}:{self.name}"
+
+
+class Manifest:
+    """A parsed manifest file.
+
+    Args:
+        path: Path of the manifest file in the host.
+
+    Attributes:
+        path (str): Path of the manifest file in the host.
+        metadata_dir (str): Metadata directory next to the manifest.
+        entries (tuple): Tuple of ManifestEntry, in file order and without duplicates.
+        errors (list): Problems that prevent the manifest from being used.
+        warnings (list): Problems that do not prevent the manifest from being used.
+
+    """
+
+    __slots__ = ("path", "metadata_dir", "entries", "errors", "warnings", "validated")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.metadata_dir = os.path.join(os.path.dirname(path), "metadata")
+        self.errors = []
+        self.warnings = []
+        self.validated = False
+        self.entries = self._parse()
+
+    def _parse(self) -> tuple:
+        """Parse the manifest file, recording malformed lines as errors."""
+        entries = {}
+        try:
+            with open(self.path) as file:
+                lines = file.read().splitlines()
+        except OSError as e:
+            self.errors.append(f"cannot be read: {e}")
+            return ()
+        for lineno, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            match = ENTRY_REGEX.match(line)
+            if not match:
+                self.errors.append(f"line {lineno} is not a Type:name entry: {line}")
+                continue
+            # Types repeat across thousands of entries, share a single string per type
+            entry = ManifestEntry(sys.intern(match.group(1)), match.group(2))
+            entries.setdefault(entry, None)
+        if not entries and not self.errors:
+            self.warnings.append("has no entries")
+        return tuple(entries)
+
+    def metadata_names(self) -> dict:
+        """Return the names of the metadata files per type found in the metadata directory.
+
+        Returns:
+            A dictionary of type to a set of file names without extension.
+
+        """
+        names = {}
+        with os.scandir(self.metadata_dir) as types:
+            for type_dir in types:
+                if not type_dir.is_dir():
+                    continue
+                with os.scandir(type_dir.path) as files:
+                    names[type_dir.name] = {
+                        os.path.splitext(file.name)[0]
+                        for file in files
+                        if file.is_file()
+                    }
+        return names
+
+    def validate(self, command: str) -> None:
+        """Validate the entries against the files in the metadata directory.
+
+        Only import needs the metadata files to exist, export creates them and
+        remove does not use them.
+
+        Args:
+            command: Backup tool action the manifest is going to be used for.
+
+        """
+        if self.validated or command != "import" or self.errors or not self.entries:
+            return
+        self.validated = True
+        if not os.path.isdir(self.metadata_dir):
+            self.errors.append(f"metadata directory {self.metadata_dir} is missing")
+            return
+        names = self.metadata_names()
+        for entry in self.entries:
+            available = names.get(entry.type, ())
+            if entry.name in available:
+                continue
+            if any(c in entry.name for c in "*?[") and fnmatch.filter(
+                available, entry.name
+            ):
+                continue
+            self.warnings.append(f"{entry} has no file in {self.metadata_dir}")
+
+    @property
+    def usable(self) -> bool:
+        """True if the manifest can be dispatched to the backup tool."""
+        return not self.errors and bool(self.entries)
+
+
+class ManifestIndex:
+    """All the manifests found under a directory, parsed once in the host.
+
+    Args:
+        manifest_paths: Paths of the manifest files in the host.
+
+    Attributes:
+        manifests (list): A list of Manifest objects, sorted by path.
+
+    """
+
+    def __init__(self, manifest_paths: typing.Iterable[str]) -> None:
+        self.manifests = [Manifest(path) for path in sorted(manifest_paths)]
+        self._owners = None
+
+    def __iter__(self) -> typing.Iterator[Manifest]:
+        return iter(self.manifests)
+
+    def __len__(self) -> int:
+        return len(self.manifests)
+
+    def entries(self) -> dict:
+        """Return all the entries of the usable manifests, deduplicated and in discovery order.
+
+        Returns:
+            A dictionary of ManifestEntry to the path of the first manifest listing it.
+
+        """
+        entries = {}
+        for manifest in self.usable():
+            for entry in manifest.entries:
+                entries.setdefault(entry, manifest.path)
+        return entries
+
+    def owners(self, entry: ManifestEntry) -> list:
+        """Return the paths of the manifests that list an entry.
+
+        Args:
+            entry: The entry to look for.
+
+        Returns:
+            A list of manifest paths.
+
+        """
+        if self._owners is None:
+            self._owners = {}
+            for manifest in self.manifests:
+                for _entry in manifest.entries:
+                    self._owners.setdefault(_entry, []).append(manifest.path)
+        return self._owners.get(entry, [])
+
+    def usable(self) -> list:
+        """Return the manifests that can be dispatched to the backup tool."""
+        return [manifest for manifest in self.manifests if manifest.usable]
+
+    def validate(self, command: str) -> bool:
+        """Validate every manifest for a command, logging errors and warnings.
+
+        Args:
+            command: Backup tool action the manifests are going to be used for.
+
+        Returns:
+            The return value. True if no manifest has errors, False otherwise.
+
+        """
+        valid = True
+        for manifest in self.manifests:
+            manifest.validate(command)
+            for warning in manifest.warnings:
+                logger.warning(f"{manifest.path} {warning}")
+            for error in manifest.errors:
+                logger.error(f"{manifest.path} {error}")
+                valid = False
+        return valid
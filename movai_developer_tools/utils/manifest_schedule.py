@@ -0,0 +1,115 @@
+"""Module that contains the duration history used to order manifest runs longest first and to split them into shards"""
+from movai_developer_tools.utils.tree_diff import atomic_write
+import json
+import os
+import pathlib
+import typing
+
+# Weight of the latest run in the recorded duration of a manifest
+SMOOTHING = 0.5
+
+
+class DurationHistory:
+    """Durations of the previous backup tool runs per manifest, stored as JSON.
+
+    Args:
+        path: Path of the history file. Defaults to ``~/.cache/movai-developer-tools/durations.json``.
+
+    Attributes:
+        path (Path): Path of the history file.
+        durations (dict): Smoothed duration in seconds per manifest path in the spawner.
+
+    """
+
+    def __init__(self, path: typing.Optional[str] = None) -> None:
+        self.path = pathlib.Path(path or self.default_path())
+        try:
+            with open(self.path) as file:
+                self.durations = json.load(file)
+        except (OSError, ValueError):
+            self.durations = {}
+
+    @staticmethod
+    def default_path() -> str:
+        """Return the path of the history file used when none is given."""
+        cache_home = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+        return os.path.join(cache_home, "movai-developer-tools", "durations.json")
+
+    def estimate(self, manifest: str) -> float:
+        """Return the expected duration of a manifest, the mean of the known ones if it never ran."""
+        if manifest in self.durations:
+            return self.durations[manifest]
+        if self.durations:
+            return sum(self.durations.values()) / len(self.durations)
+        return 1.0
+
+    def record(self, manifest: str, seconds: float) -> None:
+        """Record the duration of a run, smoothed with the previous ones."""
+        previous = self.durations.get(manifest)
+        if previous is not None:
+            seconds = SMOOTHING * seconds + (1 - SMOOTHING) * previous
+        self.durations[manifest] = round(seconds, 3)
+
+    def save(self) -> None:
+        """Write the history file."""
+        atomic_write(
+            self.path, json.dumps(self.durations, indent=1, sort_keys=True).encode()
+        )
+
+
+def parse_shard(shard: str) -> typing.Tuple[int, int]:
+    """Parse a ``i/N`` shard specification, i counts from 1.
+
+    Args:
+        shard: Shard specification, e.g. ``2/4``.
+
+    Returns:
+        A tuple of (index, count).
+
+    Raises:
+        ValueError: If the specification is malformed or out of range.
+
+    """
+    index, _, count = shard.partition("/")
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {shard} is not in the form i/N with 1 <= i <= N")
+    return index, count
+
+
+def longest_first(manifests: typing.Iterable[str], history: DurationHistory) -> list:
+    """Order manifests by decreasing expected duration, so no long manifest runs last.
+
+    Ties keep the path order, so every caller gets the same order from the same history.
+
+    Args:
+        manifests: Manifest paths in the spawner.
+        history: Duration history.
+
+    Returns:
+        The sorted list of manifest paths.
+
+    """
+    return sorted(sorted(manifests), key=history.estimate, reverse=True)
+
+
+def shards(
+    manifests: typing.Iterable[str], history: DurationHistory, count: int
+) -> list:
+    """Split manifests into shards, each ordered longest first.
+
+    The sorted paths are dealt round-robin, so the shards only depend on the manifests. Jobs
+    with different histories, e.g. per-runner caches or a history another shard already
+    updated, still split them the same way and every manifest runs exactly once.
+
+    Args:
+        manifests: Manifest paths in the spawner.
+        history: Duration history, only used to order the manifests of a shard.
+        count: Number of shards.
+
+    Returns:
+        A list of count lists of manifest paths, each in longest first order.
+
+    """
+    ordered = sorted(manifests)
+    return [longest_first(ordered[index::count], history) for index in range(count)]
@@ -0,0 +1,332 @@
+"""Module that contains a persistent index of the metadata objects of the userspace, the manifests listing them and the references between them"""
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.manifest_index import (
+    ENTRY_REGEX,
+    Manifest,
+    ManifestEntry,
+)
+import json
+import os
+import sqlite3
+import typing
+
+# Bumped when the tables change, an index of another version is rebuilt
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE files (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER);
+CREATE TABLE entries (manifest TEXT, type TEXT, name TEXT);
+CREATE TABLE objects (path TEXT PRIMARY KEY, type TEXT, name TEXT, manifest TEXT);
+CREATE TABLE refs (path TEXT, type TEXT, name TEXT);
+CREATE INDEX entries_object ON entries (type, name);
+CREATE INDEX entries_manifest ON entries (manifest);
+CREATE INDEX objects_object ON objects (type, name);
+CREATE INDEX refs_object ON refs (type, name);
+CREATE INDEX refs_path ON refs (path);
+"""
+# Attributes whose value is the name of another object, by the type of that object
+REFERENCE_ATTRIBUTES = {"ContainerFlow": "Flow", "Callback": "Callback"}
+# Instances whose Template is the name of another object, by the attribute holding them
+TEMPLATE_ATTRIBUTES = {"NodeInst": "Node", "PortsInst": "Ports"}
+
+
+class IndexedObject(typing.NamedTuple):
+    """A metadata file of the userspace.
+
+    Attributes:
+        type (str): Metadata type, e.g. Flow.
+        name (str): Metadata name.
+        path (str): Path of the metadata file in the host.
+        manifest (str): Path of the manifest of the package holding the file.
+
+    """
+
+    type: str
+    name: str
+    path: str
+    manifest: str
+
+    def __str__(self) -> str:
+        return f"{self.type}:{self.name}"
+
+
+def parse_object(text: str) -> ManifestEntry:
+    """Parse a TYPE:NAME argument, the name may be a glob pattern.
+
+    Args:
+        text: The argument.
+
+    Returns:
+        A ManifestEntry.
+
+    Raises:
+        ValueError: If text is not a Type:name entry.
+
+    """
+    match = ENTRY_REGEX.match(text.strip())
+    if not match:
+        raise ValueError(f"{text} is not a Type:name object")
+    return ManifestEntry(match.group(1), match.group(2))
+
+
+def references(data: dict) -> set:
+    """Return the objects a metadata object refers to.
+
+    Args:
+        data: Attributes of the object.
+
+    Returns:
+        A set of (type, name).
+
+    """
+    found = set()
+
+    def walk(node: dict, path: tuple) -> None:
+        for key, value in node.items():
+            if isinstance(value, dict):
+                walk(value, path + (key,))
+            elif not isinstance(value, str) or not value:
+                continue
+            elif key in REFERENCE_ATTRIBUTES:
+                found.add((REFERENCE_ATTRIBUTES[key], value))
+            elif key == "Template" and len(path) >= 2:
+                if path[-2] in TEMPLATE_ATTRIBUTES:
+                    found.add((TEMPLATE_ATTRIBUTES[path[-2]], value))
+
+    walk(data, ())
+    return found
+
+
+def _under(root: str, column: str = "path") -> tuple:
+    """Return the SQL condition and parameters selecting the paths below root, using the index of the column."""
+    prefix = root.rstrip(os.sep) + os.sep
+    # "0" follows "/", the range holds every path starting with prefix
+    return f"{column} >= ? AND {column} < ?", (prefix, prefix[:-1] + "0")
+
+
+def scan_userspace(root: str, manifest_name: str = "manifest.txt") -> dict:
+    """Return the manifests under root and the files of their metadata directories, with their mtime and size.
+
+    Args:
+        root: Directory to search.
+        manifest_name: Manifest file name.
+
+    Returns:
+        A dictionary of path to (mtime_ns, size, manifest path).
+
+    """
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Hidden directories (.git, .cache...) never hold packages
+        dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+        if manifest_name not in filenames:
+            continue
+        manifest = os.path.join(dirpath, manifest_name)
+        stat = os.stat(manifest)
+        files[manifest] = (stat.st_mtime_ns, stat.st_size, manifest)
+        if "metadata" not in dirnames:
+            continue
+        dirnames.remove("metadata")
+        with os.scandir(os.path.join(dirpath, "metadata")) as types:
+            type_dirs = [entry.path for entry in types if entry.is_dir()]
+        for type_dir in type_dirs:
+            with os.scandir(type_dir) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_mtime_ns, stat.st_size, manifest)
+    return files
+
+
+class MetadataIndex:
+    """Index of the metadata objects of the userspace, stored in SQLite and updated from file mtimes.
+
+    Maps object names to the metadata file defining them and to the manifests listing them, and
+    the objects to the ones they refer to (NodeInst templates, ContainerFlow, Callback...).
+
+    Args:
+        path: Path of the index. Defaults to ``~/.cache/movai-developer-tools/metadata-index.sqlite``.
+
+    Attributes:
+        path (str): Path of the index.
+
+    """
+
+    def __init__(self, path: typing.Optional[str] = None) -> None:
+        if path is None:
+            cache_home = os.environ.get(
+                "XDG_CACHE_HOME", os.path.expanduser("~/.cache")
+            )
+            path = os.path.join(
+                cache_home, "movai-developer-tools", "metadata-index.sqlite"
+            )
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._create()
+
+    def _create(self) -> None:
+        """Drop the tables and create the current schema."""
+        with self.db:
+            for (table,) in self.db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            ).fetchall():
+                self.db.execute(f"DROP TABLE {table}")
+            self.db.executescript(SCHEMA)
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        """Close the index."""
+        self.db.close()
+
+    def update(self, root: str) -> int:
+        """Re-index the files under root that were added, changed or removed since the last update.
+
+        Args:
+            root: Directory to index.
+
+        Returns:
+            The number of files re-indexed.
+
+        """
+        root = os.path.abspath(root)
+        files = scan_userspace(root)
+        condition, params = _under(root)
+        known = {
+            path: (mtime_ns, size)
+            for path, mtime_ns, size in self.db.execute(
+                f"SELECT path, mtime_ns, size FROM files WHERE {condition}", params
+            )
+        }
+        changed = [path for path, info in files.items() if known.get(path) != info[:2]]
+        removed = [path for path in known if path not in files]
+        with self.db:
+            for path in changed + removed:
+                self._forget(path)
+            for path in changed:
+                self._add(path, *files[path])
+        if changed or removed:
+            logger.debug(f"Re-indexed {len(changed) + len(removed)} files of {root}")
+        return len(changed) + len(removed)
+
+    def _forget(self, path: str) -> None:
+        """Remove a file from the index."""
+        for statement in (
+            "DELETE FROM files WHERE path = ?",
+            "DELETE FROM entries WHERE manifest = ?",
+            "DELETE FROM objects WHERE path = ?",
+            "DELETE FROM refs WHERE path = ?",
+        ):
+            self.db.execute(statement, (path,))
+
+    def _add(self, path: str, mtime_ns: int, size: int, manifest: str) -> None:
+        """Index a manifest or a metadata file."""
+        self.db.execute("INSERT INTO files VALUES (?, ?, ?)", (path, mtime_ns, size))
+        if path == manifest:
+            self.db.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?)",
+                ((path, entry.type, entry.name) for entry in Manifest(path).entries),
+            )
+            return
+        type_name = os.path.basename(os.path.dirname(path))
+        name, extension = os.path.splitext(os.path.basename(path))
+        self.db.execute(
+            "INSERT INTO objects VALUES (?, ?, ?, ?)", (path, type_name, name, manifest)
+        )
+        if extension != ".json":
+            return
+        try:
+            with open(path) as file:
+                data = json.load(file)[type_name][name]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug(f"No references read from {path}: {e}")
+            return
+        if isinstance(data, dict):
+            self.db.executemany(
+                "INSERT INTO refs VALUES (?, ?, ?)",
+                ((path, *reference) for reference in sorted(references(data))),
+            )
+
+    def find(self, entry: ManifestEntry, root: str) -> list:
+        """Return the metadata files under root defining an object.
+
+        Args:
+            entry: Type and name, the name may be a glob pattern.
+            root: Directory to search.
+
+        Returns:
+            A list of IndexedObject.
+
+        """
+        condition, params = _under(os.path.abspath(root))
+        rows = self.db.execute(
+            "SELECT type, name, path, manifest FROM objects"
+            f" WHERE type = ? AND name GLOB ? AND {condition} ORDER BY path",
+            (entry.type, entry.name, *params),
+        )
+        return [IndexedObject(*row) for row in rows]
+
+    def manifests(self, entries: typing.Iterable[ManifestEntry], root: str) -> list:
+        """Return the manifests under root listing any of the objects, also through a glob entry.
+
+        Args:
+            entries: Types and names, the names may be glob patterns.
+            root: Directory to search.
+
+        Returns:
+            A sorted list of manifest paths.
+
+        """
+        condition, params = _under(os.path.abspath(root), "manifest")
+        found = set()
+        for entry in entries:
+            found.update(
+                manifest
+                for (manifest,) in self.db.execute(
+                    "SELECT manifest FROM entries WHERE type = ?"
+                    f" AND (name GLOB ? OR ? GLOB name) AND {condition}",
+                    (entry.type, entry.name, entry.name, *params),
+                )
+            )
+        return sorted(found)
+
+    def referenced_by(self, entry: ManifestEntry, root: str) -> list:
+        """Return the objects under root referring to an object.
+
+        Args:
+            entry: Type and name, the name may be a glob pattern.
+            root: Directory to search.
+
+        Returns:
+            A list of IndexedObject.
+
+        """
+        condition, params = _under(os.path.abspath(root), "objects.path")
+        rows = self.db.execute(
+            "SELECT DISTINCT objects.type, objects.name, objects.path, objects.manifest"
+            " FROM refs JOIN objects ON objects.path = refs.path"
+            f" WHERE refs.type = ? AND refs.name GLOB ? AND {condition}"
+            " ORDER BY objects.path",
+            (entry.type, entry.name, *params),
+        )
+        return [IndexedObject(*row) for row in rows]
+
+    def references(self, entry: ManifestEntry, root: str) -> list:
+        """Return the objects an object under root refers to.
+
+        Args:
+            entry: Type and name, the name may be a glob pattern.
+            root: Directory to search.
+
+        Returns:
+            A sorted list of ManifestEntry.
+
+        """
+        condition, params = _under(os.path.abspath(root), "objects.path")
+        rows = self.db.execute(
+            "SELECT DISTINCT refs.type, refs.name"
+            " FROM objects JOIN refs ON refs.path = objects.path"
+            f" WHERE objects.type = ? AND objects.name GLOB ? AND {condition}",
+            (entry.type, entry.name, *params),
+        )
+        return sorted(ManifestEntry(*row) for row in rows)
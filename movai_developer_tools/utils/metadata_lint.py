@@ -0,0 +1,219 @@
+"""Module that contains the host-side validation of the metadata files of the userspace, parallel across CPU cores"""
+from movai_developer_tools.utils.metadata_index import references, scan_userspace
+from movai_developer_tools.utils.tree_diff import atomic_write, file_digest
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import pathlib
+import typing
+
+# Below this number of files to parse, starting worker processes costs more than it saves
+MIN_PARALLEL_FILES = 64
+# Files sent to a worker at a time
+CHUNK_SIZE = 32
+# Types provided by the platform, references to them are not expected in the userspace
+PLATFORM_TYPES = {"Ports"}
+# Bumped when the checks change, results cached by another version are discarded
+CACHE_VERSION = 1
+
+
+class Problem(typing.NamedTuple):
+    """A problem found in a metadata file.
+
+    Attributes:
+        path (str): Path of the metadata file in the host.
+        level (str): ``error`` or ``warning``.
+        message (str): Description of the problem.
+
+    """
+
+    path: str
+    level: str
+    message: str
+
+
+def lint_file(path: str) -> typing.Tuple[list, list]:
+    """Parse a metadata file and check it describes the object its path names.
+
+    Runs in the worker processes, so only plain data is returned.
+
+    Args:
+        path: Path of ``metadata/<Type>/<name>.json``.
+
+    Returns:
+        A tuple of the problems as (level, message) and the references as (type, name).
+
+    """
+    type_name = os.path.basename(os.path.dirname(path))
+    name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        with open(path, "rb") as file:
+            content = json.loads(file.read())
+    except (OSError, ValueError) as e:
+        return [("error", f"is not valid JSON: {e}")], []
+    if (
+        not isinstance(content, dict)
+        or list(content) != [type_name]
+        or not isinstance(content[type_name], dict)
+        or list(content[type_name]) != [name]
+    ):
+        return [("error", f"does not describe only {type_name}:{name}")], []
+    data = content[type_name][name]
+    if not isinstance(data, dict):
+        return [("error", f"attributes of {type_name}:{name} are not an object")], []
+    problems = []
+    for attribute in ("NodeInst", "PortsInst"):
+        instances = data.get(attribute) or {}
+        if not isinstance(instances, dict):
+            problems.append(("error", f"{attribute} is not an object"))
+            continue
+        for instance, value in instances.items():
+            if not isinstance(value, dict) or not value.get("Template"):
+                problems.append(("error", f"{attribute} {instance} has no Template"))
+    return problems, sorted(references(data))
+
+
+def _lint_chunk(paths: list) -> list:
+    """Lint a chunk of files in a worker process."""
+    return [lint_file(path) for path in paths]
+
+
+class LintCache:
+    """Results of the previous lints, keyed by the path-derived object and the sha256 of the file.
+
+    Saving keeps only the files of the last lint, so every linted directory has its own default
+    cache file and alternating directories does not evict the results of the other.
+
+    Args:
+        path: Path of the cache file. Defaults to ``~/.cache/movai-developer-tools/lint-cache-<root digest>.json``.
+        root: Directory linted with this cache, selects the default cache file.
+
+    Attributes:
+        path (Path): Path of the cache file.
+        results (dict): Problems and references per key.
+
+    """
+
+    def __init__(
+        self, path: typing.Optional[str] = None, root: typing.Optional[str] = None
+    ) -> None:
+        if path is None:
+            cache_home = os.environ.get(
+                "XDG_CACHE_HOME", os.path.expanduser("~/.cache")
+            )
+            root_digest = hashlib.sha256(str(root).encode()).hexdigest()[:16]
+            path = os.path.join(
+                cache_home, "movai-developer-tools", f"lint-cache-{root_digest}.json"
+            )
+        self.path = pathlib.Path(path)
+        try:
+            with open(self.path) as file:
+                content = json.load(file)
+            self.results = (
+                content["results"] if content["version"] == CACHE_VERSION else {}
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            self.results = {}
+
+    @staticmethod
+    def key(path: str) -> str:
+        """Return the cache key of a metadata file, its Type/name and content digest."""
+        type_dir, file_name = os.path.split(path)
+        return f"{os.path.basename(type_dir)}/{file_name}:{file_digest(path)}"
+
+    def save(self, keys: typing.Iterable[str]) -> None:
+        """Write the cache, keeping only the results of the given keys."""
+        results = {key: self.results[key] for key in keys if key in self.results}
+        atomic_write(
+            self.path,
+            json.dumps({"version": CACHE_VERSION, "results": results}).encode(),
+        )
+
+
+def lint_metadata(
+    root: str,
+    jobs: typing.Optional[int] = None,
+    cache: typing.Optional[LintCache] = None,
+) -> typing.Tuple[list, int]:
+    """Validate the metadata files of the manifests under root.
+
+    Every file not in the cache is parsed once, by a pool of processes. The references between
+    objects and the objects defined by several packages are checked at the end, on the merged results.
+
+    Args:
+        root: Directory to search.
+        jobs: Number of worker processes, defaults to the number of CPUs.
+        cache: Results of the previous lints, not used if None.
+
+    Returns:
+        A tuple of the sorted list of Problem and the number of files linted.
+
+    """
+    paths = sorted(
+        path
+        for path, (_, _, manifest) in scan_userspace(root).items()
+        if path != manifest and path.endswith(".json")
+    )
+    results = cache.results if cache is not None else {}
+    keys = {path: LintCache.key(path) for path in paths}
+    todo = [path for path in paths if keys[path] not in results]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(todo) >= MIN_PARALLEL_FILES:
+        chunks = [todo[i : i + CHUNK_SIZE] for i in range(0, len(todo), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            linted = [
+                result for chunk in pool.map(_lint_chunk, chunks) for result in chunk
+            ]
+    else:
+        linted = _lint_chunk(todo)
+    for path, (problems, refs) in zip(todo, linted):
+        results[keys[path]] = [problems, refs]
+    if cache is not None:
+        cache.save(keys.values())
+    return merge_results(paths, [results[keys[path]] for path in paths]), len(paths)
+
+
+def merge_results(paths: list, results: list) -> list:
+    """Return the problems of every file and the ones found across objects.
+
+    Args:
+        paths: Paths of the metadata files.
+        results: Problems and references of every file, as returned by lint_file.
+
+    Returns:
+        A sorted list of Problem.
+
+    """
+    problems = []
+    defined = {}
+    for path in paths:
+        obj = (
+            os.path.basename(os.path.dirname(path)),
+            os.path.splitext(os.path.basename(path))[0],
+        )
+        defined.setdefault(obj, []).append(path)
+    for path, (file_problems, _) in zip(paths, results):
+        problems.extend(
+            Problem(path, level, message) for level, message in file_problems
+        )
+    for (type_name, name), obj_paths in defined.items():
+        if len(obj_paths) > 1:
+            for path in obj_paths:
+                others = ", ".join(other for other in obj_paths if other != path)
+                problems.append(
+                    Problem(
+                        path, "error", f"{type_name}:{name} is also defined by {others}"
+                    )
+                )
+    for path, (_, refs) in zip(paths, results):
+        for type_name, name in refs:
+            if type_name not in PLATFORM_TYPES and (type_name, name) not in defined:
+                problems.append(
+                    Problem(
+                        path,
+                        "warning",
+                        f"refers to {type_name}:{name}, not in the userspace",
+                    )
+                )
+    return sorted(problems)
@@ -0,0 +1,150 @@
+"""Module that contains the comparison of the metadata files in the userspace with the metadata installed in the platform"""
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.manifest_index import Manifest
+import fnmatch
+import hashlib
+import inspect
+import json
+import os
+import typing
+
+# Statuses of an object, in the order they are printed
+STATUSES = (
+    "export-failed",
+    "modified",
+    "missing-on-disk",
+    "missing-on-platform",
+    "in-sync",
+)
+
+
+def canonical_digest(data):
+    """Return the sha256 of a metadata file, ignoring JSON formatting and key order."""
+    try:
+        data = json.dumps(
+            json.loads(data.decode("utf-8")),
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        ).encode("utf-8")
+    except ValueError:
+        pass
+    return hashlib.sha256(data).hexdigest()
+
+
+# Script run in the spawner over a staging directory with one exported metadata
+# directory per manifest. Prints {"<i>": {"<Type>/<name>": digest}} as JSON.
+HASH_SCRIPT = (
+    "import hashlib, json, os, sys\n" + inspect.getsource(canonical_digest) + """
+root = sys.argv[1]
+result = {}
+for index in os.listdir(root):
+    metadata_dir = os.path.join(root, index, "metadata")
+    if not os.path.isdir(metadata_dir):
+        continue
+    digests = result[index] = {}
+    for type_name in os.listdir(metadata_dir):
+        type_dir = os.path.join(metadata_dir, type_name)
+        if not os.path.isdir(type_dir):
+            continue
+        for name in os.listdir(type_dir):
+            path = os.path.join(type_dir, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as file:
+                digests[type_name + "/" + os.path.splitext(name)[0]] = canonical_digest(file.read())
+print(json.dumps(result))
+"""
+)
+
+
+class ObjectStatus(typing.NamedTuple):
+    """Status of a metadata object of a manifest.
+
+    Attributes:
+        manifest (str): Path of the manifest in the host.
+        key (str): ``<Type>/<name>`` of the object.
+        status (str): One of STATUSES.
+
+    """
+
+    manifest: str
+    key: str
+    status: str
+
+
+def disk_digests(manifest: Manifest) -> dict:
+    """Return the canonical digests of the metadata files of a manifest that are listed in it.
+
+    Args:
+        manifest: The manifest.
+
+    Returns:
+        A dictionary of ``<Type>/<name>`` to digest.
+
+    """
+    if not os.path.isdir(manifest.metadata_dir):
+        return {}
+    digests = {}
+    patterns = {}
+    for entry in manifest.entries:
+        patterns.setdefault(entry.type, []).append(entry.name)
+    for type_name, names in patterns.items():
+        type_dir = os.path.join(manifest.metadata_dir, type_name)
+        if not os.path.isdir(type_dir):
+            continue
+        for file_name in os.listdir(type_dir):
+            name = os.path.splitext(file_name)[0]
+            path = os.path.join(type_dir, file_name)
+            if not any(
+                fnmatch.fnmatchcase(name, pattern) for pattern in names
+            ) or not os.path.isfile(path):
+                continue
+            with open(path, "rb") as file:
+                digests[f"{type_name}/{name}"] = canonical_digest(file.read())
+    return digests
+
+
+def compare(manifest: str, disk: dict, platform: dict) -> list:
+    """Compare the digests of the objects of a manifest on disk and in the platform.
+
+    Args:
+        manifest: Path of the manifest.
+        disk: Digests of the files in the userspace, see disk_digests.
+        platform: Digests of the objects exported from the platform.
+
+    Returns:
+        A list of ObjectStatus, sorted by key.
+
+    """
+    statuses = []
+    for key in sorted(disk.keys() | platform.keys()):
+        if key not in disk:
+            status = "missing-on-disk"
+        elif key not in platform:
+            status = "missing-on-platform"
+        elif disk[key] != platform[key]:
+            status = "modified"
+        else:
+            status = "in-sync"
+        statuses.append(ObjectStatus(manifest, key, status))
+    return statuses
+
+
+def log_statuses(statuses: list, show_in_sync: bool = True) -> None:
+    """Print the objects grouped by status, followed by a summary.
+
+    Args:
+        statuses: A list of ObjectStatus.
+        show_in_sync: If False, objects in sync are only counted.
+
+    """
+    counts = dict.fromkeys(STATUSES, 0)
+    for status in STATUSES:
+        for item in statuses:
+            if item.status != status:
+                continue
+            counts[status] += 1
+            if status != "in-sync" or show_in_sync:
+                print(f"  {status:<20} {item.key:<50} {item.manifest}")
+    logger.info(", ".join(f"{count} {status}" for status, count in counts.items()))
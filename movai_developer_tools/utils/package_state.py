@@ -0,0 +1,137 @@
+"""Module that contains the mapping of installed manifests to their Debian packages and the record of the package versions imported in the platform"""
+import json
+import shlex
+import typing
+
+# Separates the sections of the output of the query command
+SECTION = "--movai-developer-tools--"
+# Package versions last imported in the platform, kept in the spawner so it follows its platform
+STATE_DIR = "$HOME/.cache/movai-developer-tools"
+STATE_FILE = STATE_DIR + "/imported-packages.json"
+
+
+class InstalledManifests(typing.NamedTuple):
+    """Installed manifests, their owning packages and the package versions imported before.
+
+    Attributes:
+        owners (dict): Owning package per manifest path in the spawner, None if no package owns it.
+        versions (dict): Installed version per package.
+        imported (dict): Version per package when it was last imported in the platform.
+
+    """
+
+    owners: dict
+    versions: dict
+    imported: dict
+
+    def changed(self) -> list:
+        """Return the manifests of packages that were added or upgraded since they were last imported.
+
+        Manifests not owned by any package are always returned.
+
+        """
+        return [
+            manifest
+            for manifest, package in sorted(self.owners.items())
+            if package is None
+            or self.imported.get(package) != self.versions.get(package)
+        ]
+
+    def updated(self, manifests: typing.Iterable[str], failed: set) -> dict:
+        """Return the imported package versions after a run.
+
+        A package is recorded at its installed version only if all of its manifests were imported
+        in the run without failure. Packages that are no longer installed are forgotten.
+
+        Args:
+            manifests: Manifests imported in the run.
+            failed: Manifests whose import failed.
+
+        Returns:
+            A dictionary of package to version.
+
+        """
+        state = {
+            package: version
+            for package, version in self.imported.items()
+            if package in self.versions
+        }
+        run = set(manifests)
+        packages = {}
+        for manifest, package in self.owners.items():
+            if package is not None:
+                packages.setdefault(package, []).append(manifest)
+        for package, package_manifests in packages.items():
+            if all(m in run and m not in failed for m in package_manifests):
+                state[package] = self.versions[package]
+        return state
+
+
+def query_command(install_dir: str, manifest_name: str = "manifest.txt") -> str:
+    """Return the shell command listing the installed manifests, their owners, the package versions and the state.
+
+    The manifests are resolved to packages with a single dpkg -S and the versions with a single
+    dpkg-query, whatever the number of manifests.
+
+    Args:
+        install_dir: Metadata install location in the spawner.
+        manifest_name: Manifest file name.
+
+    Returns:
+        The command, to be run by bash in the spawner, see parse_query.
+
+    """
+    return (
+        f"manifests=$(find {install_dir} -name {manifest_name}); "
+        f'printf "%s\\n" "$manifests"; echo {SECTION}; '
+        f'printf "%s\\n" "$manifests" | xargs -r -d \'\\n\' dpkg -S 2>/dev/null; echo {SECTION}; '
+        "dpkg-query -W -f='${Package} ${Version}\\n'; "
+        f"echo {SECTION}; cat {STATE_FILE} 2>/dev/null; true"
+    )
+
+
+def parse_query(output: str) -> InstalledManifests:
+    """Parse the output of the query command.
+
+    Args:
+        output: Standard output of query_command.
+
+    Returns:
+        An InstalledManifests.
+
+    Raises:
+        ValueError: If the output is not the one of query_command.
+
+    """
+    sections = output.split(SECTION + "\n")
+    if len(sections) != 4:
+        raise ValueError("unexpected output of the installed packages query")
+    manifests, owners_output, versions_output, state = sections
+    owners = dict.fromkeys(filter(None, manifests.splitlines()))
+    for line in owners_output.splitlines():
+        # "pkg[:arch][, other]: /path", diversion lines do not match a listed manifest
+        packages, _, path = line.partition(": ")
+        if path in owners:
+            owners[path] = packages.split(", ")[0].split(":")[0]
+    versions = dict(
+        line.split(" ", 1) for line in versions_output.splitlines() if " " in line
+    )
+    try:
+        imported = json.loads(state) if state.strip() else {}
+    except ValueError:
+        imported = {}
+    return InstalledManifests(owners, versions, imported)
+
+
+def save_command(state: dict) -> str:
+    """Return the shell command writing the imported package versions in the spawner.
+
+    Args:
+        state: A dictionary of package to version, see InstalledManifests.updated.
+
+    Returns:
+        The command, to be run by bash in the spawner.
+
+    """
+    data = shlex.quote(json.dumps(state, indent=1, sort_keys=True))
+    return f"mkdir -p {STATE_DIR} && printf %s {data} > {STATE_FILE}"
@@ -0,0 +1,139 @@
+"""Module that contains the tools to profile the backup tool inside the spawner and report the merged profiles in the host"""
+from movai_developer_tools.utils.tree_diff import ChunkStream
+import collections
+import io
+import os
+import pathlib
+import pstats
+import tarfile
+import typing
+
+# Runner copied into the spawner. Runs a module under cProfile, like ``python3 -m cProfile -o``,
+# but keeps the exit code of the module and always writes the profile.
+RUNNER = """import cProfile, os, runpy, sys
+output, module = sys.argv[1], sys.argv[2]
+sys.argv = [module] + sys.argv[3:]
+sys.path.insert(0, os.getcwd())
+profile = cProfile.Profile()
+code = 0
+try:
+    profile.runcall(runpy.run_module, module, run_name="__main__", alter_sys=True)
+except SystemExit as e:
+    code = e.code
+finally:
+    profile.dump_stats(output)
+sys.exit(code)
+"""
+# Stacks whose time is below this many seconds are not expanded further
+MIN_STACK_TIME = 1e-5
+MAX_STACK_DEPTH = 64
+
+
+def extract_profiles(
+    chunks: typing.Iterable[bytes], dest_dir: typing.Union[str, pathlib.Path]
+) -> list:
+    """Write the profiles of a streamed tar archive, e.g. the one returned by get_archive, to a directory.
+
+    Args:
+        chunks: Iterable of tar data.
+        dest_dir: Directory where the ``.prof`` files are written.
+
+    Returns:
+        A sorted list of paths of the written profiles.
+
+    """
+    dest_dir = pathlib.Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    with tarfile.open(fileobj=ChunkStream(chunks), mode="r|") as tar:
+        for member in tar:
+            if not member.isfile() or not member.name.endswith(".prof"):
+                continue
+            path = dest_dir / os.path.basename(member.name)
+            path.write_bytes(tar.extractfile(member).read())
+            paths.append(path)
+    return sorted(paths)
+
+
+def merge_profiles(paths: typing.Iterable) -> pstats.Stats:
+    """Merge profiles into a single Stats object."""
+    return pstats.Stats(*map(str, paths), stream=io.StringIO())
+
+
+def hotspots(stats: pstats.Stats, top: int = 25) -> str:
+    """Return the functions where most time was spent, excluding the time of the functions they call.
+
+    Args:
+        stats: Merged profiles.
+        top: Number of functions.
+
+    Returns:
+        The pstats report as text.
+
+    """
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats("tottime").print_stats(top)
+    return stream.getvalue()
+
+
+def _label(func: tuple) -> str:
+    """Return the frame name of a pstats function key."""
+    filename, line, name = func
+    if filename == "~":
+        return name.replace(";", ":")
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ":")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> dict:
+    """Rebuild approximate call stacks from the caller/callee graph of a profile.
+
+    cProfile only records caller/callee pairs, so the time of a function is split across its
+    callers in proportion to the time each caller spent in it.
+
+    Args:
+        stats: Merged profiles.
+
+    Returns:
+        A dictionary of ``;`` separated stacks, root first, to their own time in seconds.
+
+    """
+    callees = collections.defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, edge_time) in callers.items():
+            callees[caller][func] = edge_time
+    roots = [func for func, entry in stats.stats.items() if not entry[4]]
+    stacks = collections.defaultdict(float)
+
+    def walk(func: tuple, path: tuple, scale: float) -> None:
+        _, _, own_time, total_time, _ = stats.stats[func]
+        path = path + (func,)
+        if own_time * scale > 0:
+            stacks[";".join(map(_label, path))] += own_time * scale
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_time in callees[func].items():
+            callee_time = stats.stats[callee][3]
+            # Skip recursion and negligible branches
+            if callee in path or not callee_time or edge_time * scale < MIN_STACK_TIME:
+                continue
+            walk(callee, path, scale * edge_time / callee_time)
+
+    for root in roots:
+        walk(root, (), 1.0)
+    return dict(stacks)
+
+
+def write_collapsed(stacks: dict, path: typing.Union[str, pathlib.Path]) -> None:
+    """Write stacks in the collapsed format read by flamegraph.pl and speedscope, with microsecond weights.
+
+    Args:
+        stacks: Stacks returned by collapsed_stacks.
+        path: Output file.
+
+    """
+    with open(path, "w") as file:
+        for stack, seconds in sorted(stacks.items()):
+            weight = round(seconds * 1e6)
+            if weight:
+                file.write(f"{stack} {weight}\n")
@@ -0,0 +1,123 @@
+"""Module that contains a minimal pipelined Redis client, used to read and write the MOV.AI database from the host"""
+import socket
+import typing
+
+
+class RedisError(Exception):
+    """Raised when Redis replies with an error or the connection fails."""
+
+
+def encode_command(*args) -> bytes:
+    """Encode a command in the Redis protocol (RESP).
+
+    Args:
+        args: Command name and arguments, str or bytes.
+
+    Returns:
+        The encoded command.
+
+    """
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+class RedisClient:
+    """Pipelined Redis client: a batch of commands is sent at once and all the replies read back.
+
+    Args:
+        host: Redis host.
+        port: Redis port.
+        timeout: Socket timeout in seconds.
+
+    Attributes:
+        round_trips (int): Number of pipelines sent.
+
+    """
+
+    def __init__(self, host: str, port: int = 6379, timeout: float = 30.0) -> None:
+        try:
+            self._socket = socket.create_connection((host, port), timeout=timeout)
+        except OSError as e:
+            raise RedisError(f"Could not connect to Redis at {host}:{port}: {e}")
+        self._file = self._socket.makefile("rb")
+        self.round_trips = 0
+
+    def _read_reply(self):
+        """Read one reply, errors are returned as RedisError objects."""
+        line = self._file.readline()
+        if not line.endswith(b"\r\n"):
+            raise RedisError("Connection closed by Redis")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            return RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply from Redis: {line!r}")
+
+    def pipeline(self, commands: typing.Sequence[tuple]) -> list:
+        """Send commands in one write and read their replies.
+
+        Args:
+            commands: Tuples of command name and arguments.
+
+        Returns:
+            The list of replies, in order.
+
+        Raises:
+            RedisError: If any command failed, after all the replies were read.
+
+        """
+        if not commands:
+            return []
+        try:
+            self._socket.sendall(b"".join(encode_command(*cmd) for cmd in commands))
+            self.round_trips += 1
+            replies = [self._read_reply() for _ in commands]
+        except OSError as e:
+            raise RedisError(f"Redis connection failed: {e}")
+        for command, reply in zip(commands, replies):
+            if isinstance(reply, RedisError):
+                raise RedisError(f"{command[0]} failed: {reply}")
+        return replies
+
+    def execute(self, *args):
+        """Send a single command and return its reply."""
+        return self.pipeline([args])[0]
+
+    def scan(self, match: str, count: int = 10000) -> list:
+        """Return the keys matching a glob pattern, without blocking Redis like KEYS would.
+
+        Args:
+            match: Glob pattern of the keys.
+            count: Number of keys Redis looks at per call.
+
+        Returns:
+            A list of keys, as str.
+
+        """
+        keys, cursor = set(), b"0"
+        while True:
+            cursor, batch = self.execute("SCAN", cursor, "MATCH", match, "COUNT", count)
+            keys.update(key.decode() for key in batch)
+            if cursor == b"0":
+                return sorted(keys)
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._file.close()
+        self._socket.close()
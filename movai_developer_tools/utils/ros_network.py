@@ -0,0 +1,297 @@
+"""Module that contains a minimal ROS master/slave XML-RPC client and latency measurement tools, no ROS installation required"""
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import math
+import socket
+import time
+import typing
+import urllib.parse
+import xmlrpc.client
+
+# Caller ID used by the host tools when talking to the ROS master and nodes
+CALLER_ID = "/movai_developer_tools"
+
+
+class _TimeoutTransport(xmlrpc.client.Transport):
+    """XML-RPC transport with a connection timeout."""
+
+    def __init__(self, timeout: float) -> None:
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class RosApiError(Exception):
+    """Raised when a ROS XML-RPC call returns an error code."""
+
+
+def ros_call(uri: str, method: str, *args, timeout: float = 2.0):
+    """Call a ROS master or slave API method.
+
+    Args:
+        uri: XML-RPC URI of the master or node.
+        method: Method name, e.g. ``getSystemState``.
+        args: Method arguments, the caller ID is prepended.
+        timeout: Socket timeout in seconds.
+
+    Returns:
+        The value of the [code, status message, value] reply.
+
+    Raises:
+        RosApiError: If the reply code is not 1, or the reply is an XML-RPC fault, an HTTP error or malformed.
+        OSError: On network errors.
+
+    """
+    proxy = xmlrpc.client.ServerProxy(uri, transport=_TimeoutTransport(timeout))
+    try:
+        code, message, value = getattr(proxy, method)(CALLER_ID, *args)
+    except (xmlrpc.client.Error, http.client.HTTPException) as e:
+        raise RosApiError(f"{method} on {uri} failed: {e}") from e
+    except (TypeError, ValueError) as e:
+        raise RosApiError(f"{method} on {uri} returned a malformed reply: {e}") from e
+    if code != 1:
+        raise RosApiError(f"{method} on {uri} failed: {message}")
+    return value
+
+
+class RosMasterClient:
+    """Client of the ROS master API.
+
+    Args:
+        master_uri: URI of the ROS master, e.g. ``http://172.18.0.2:11311/``.
+        timeout: Socket timeout in seconds.
+
+    Attributes:
+        master_uri (str): URI of the ROS master.
+        timeout (float): Socket timeout in seconds.
+
+    """
+
+    def __init__(self, master_uri: str, timeout: float = 2.0) -> None:
+        self.master_uri = master_uri
+        self.timeout = timeout
+
+    def call(self, method: str, *args):
+        """Call a master API method, see ros_call."""
+        return ros_call(self.master_uri, method, *args, timeout=self.timeout)
+
+    def publishers(self) -> dict:
+        """Return the publisher node names of every published topic.
+
+        Returns:
+            A dictionary of topic name to a list of node names.
+
+        """
+        published, _, _ = self.call("getSystemState")
+        return {topic: nodes for topic, nodes in published}
+
+    def topic_types(self) -> dict:
+        """Return the type of every published topic."""
+        return dict(self.call("getTopicTypes"))
+
+    def lookup_node(self, node: str) -> str:
+        """Return the XML-RPC URI of a node."""
+        return self.call("lookupNode", node)
+
+
+def request_tcpros(node_uri: str, topic: str, timeout: float = 2.0) -> tuple:
+    """Ask a publisher node for the TCPROS endpoint of a topic.
+
+    Args:
+        node_uri: XML-RPC URI of the publisher node.
+        topic: Topic name.
+        timeout: Socket timeout in seconds.
+
+    Returns:
+        A tuple of (host, port).
+
+    """
+    protocol = ros_call(node_uri, "requestTopic", topic, [["TCPROS"]], timeout=timeout)
+    _, host, port = protocol
+    return host, int(port)
+
+
+def uri_endpoint(uri: str) -> tuple:
+    """Return the (host, port) of an http URI."""
+    parsed = urllib.parse.urlparse(uri)
+    return parsed.hostname, parsed.port
+
+
+class LatencyHistogram:
+    """Latency samples with percentiles and a log-scale text histogram.
+
+    Attributes:
+        samples (list): Latencies in seconds.
+        errors (list): Error messages of the failed attempts.
+
+    """
+
+    # Bucket upper bounds in milliseconds
+    buckets = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, math.inf)
+
+    def __init__(self) -> None:
+        self.samples = []
+        self.errors = []
+
+    def add(self, seconds: float) -> None:
+        """Add a sample in seconds."""
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        """Return the p-th percentile (0-100) in milliseconds, nearest rank."""
+        if not self.samples:
+            return math.nan
+        ordered = sorted(self.samples)
+        rank = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+        return ordered[rank] * 1000
+
+    def summary(self) -> str:
+        """Return a one line summary of the percentiles."""
+        if not self.samples:
+            return f"no samples, {len(self.errors)} errors"
+        return (
+            f"n={len(self.samples)} p50={self.percentile(50):.2f}ms "
+            f"p90={self.percentile(90):.2f}ms p99={self.percentile(99):.2f}ms "
+            f"max={max(self.samples) * 1000:.2f}ms errors={len(self.errors)}"
+        )
+
+    def render(self, width: int = 40) -> str:
+        """Return the histogram as text, one line per non empty bucket."""
+        counts = [0] * len(self.buckets)
+        for sample in self.samples:
+            ms = sample * 1000
+            counts[next(i for i, b in enumerate(self.buckets) if ms <= b)] += 1
+        peak = max(counts) if self.samples else 1
+        lines = []
+        for bound, count in zip(self.buckets, counts):
+            if count:
+                label = "inf" if bound == math.inf else f"{bound:g}"
+                bar = "#" * max(1, round(count / peak * width))
+                lines.append(f"  <= {label:>5} ms {count:>5} {bar}")
+        return "\n".join(lines)
+
+
+def measure(
+    operation: typing.Callable[[], typing.Any], samples: int
+) -> LatencyHistogram:
+    """Time an operation several times, recording failures as errors.
+
+    Args:
+        operation: Callable to time.
+        samples: Number of attempts.
+
+    Returns:
+        A LatencyHistogram.
+
+    """
+    histogram = LatencyHistogram()
+    for _ in range(samples):
+        start = time.perf_counter()
+        try:
+            operation()
+        except (OSError, RosApiError, http.client.HTTPException) as e:
+            histogram.errors.append(f"{type(e).__name__}: {e}")
+            continue
+        histogram.add(time.perf_counter() - start)
+    return histogram
+
+
+def tcp_connect(host: str, port: int, timeout: float) -> None:
+    """Open and close a TCP connection."""
+    with socket.create_connection((host, port), timeout=timeout):
+        pass
+
+
+class ProbeResult(typing.NamedTuple):
+    """Latency of an endpoint.
+
+    Attributes:
+        kind (str): master, xmlrpc (node API) or tcpros.
+        name (str): Node name, or topic for tcpros.
+        endpoint (str): host:port of the endpoint.
+        histogram (LatencyHistogram): Round trip times.
+
+    """
+
+    kind: str
+    name: str
+    endpoint: str
+    histogram: LatencyHistogram
+
+
+def probe_network(
+    master_uri: str, samples: int = 20, timeout: float = 2.0, jobs: int = 16
+) -> list:
+    """Measure the round trip latency to the master, to every publisher node API and to their TCPROS endpoints.
+
+    Args:
+        master_uri: URI of the ROS master.
+        samples: Number of samples per endpoint.
+        timeout: Socket timeout in seconds.
+        jobs: Number of endpoints probed concurrently.
+
+    Returns:
+        A list of ProbeResult, the master first.
+
+    Raises:
+        OSError: If the master is not reachable.
+
+    """
+    master = RosMasterClient(master_uri, timeout)
+    results = [
+        ProbeResult(
+            "master",
+            "master",
+            "%s:%s" % uri_endpoint(master_uri),
+            measure(lambda: master.call("getPid"), samples),
+        )
+    ]
+    publishers = master.publishers()
+
+    # One topic per node is enough to find its TCPROS server
+    node_topics = {}
+    for topic, nodes in sorted(publishers.items()):
+        for node in nodes:
+            node_topics.setdefault(node, topic)
+
+    def probe_node(node: str) -> list:
+        try:
+            node_uri = master.lookup_node(node)
+        except (OSError, RosApiError) as e:
+            histogram = LatencyHistogram()
+            histogram.errors.append(str(e))
+            return [ProbeResult("xmlrpc", node, "unknown", histogram)]
+        node_results = [
+            ProbeResult(
+                "xmlrpc",
+                node,
+                "%s:%s" % uri_endpoint(node_uri),
+                measure(lambda: ros_call(node_uri, "getPid", timeout=timeout), samples),
+            )
+        ]
+        topic = node_topics[node]
+        try:
+            host, port = request_tcpros(node_uri, topic, timeout)
+        except (OSError, RosApiError, ValueError) as e:
+            histogram = LatencyHistogram()
+            histogram.errors.append(f"{type(e).__name__}: {e}")
+            node_results.append(ProbeResult("tcpros", topic, "unknown", histogram))
+            return node_results
+        node_results.append(
+            ProbeResult(
+                "tcpros",
+                topic,
+                f"{host}:{port}",
+                measure(lambda: tcp_connect(host, port, timeout), samples),
+            )
+        )
+        return node_results
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for node_results in pool.map(probe_node, sorted(node_topics)):
+            results.extend(node_results)
+    return results
@@ -0,0 +1,371 @@
+"""Module that contains a host-side asyncio relay of the ROS master, node APIs and TCPROS connections of a MOV.AI stack"""
+from movai_developer_tools.utils import logger
+from xml.parsers.expat import ExpatError
+import asyncio
+import docker
+import functools
+import re
+import typing
+import xmlrpc.client
+
+# Advertised endpoints rewritten in the XML-RPC responses, node APIs (http) and services (rosrpc)
+URI_REGEX = re.compile(r"^(http|rosrpc)://([^:/\s]+):(\d+)/?$")
+CONTENT_LENGTH_REGEX = re.compile(rb"(?im)^content-length:[ \t]*(\d+)")
+
+
+async def read_http_message(
+    reader: asyncio.StreamReader, body_until_eof: bool = False
+) -> typing.Optional[typing.Tuple[bytes, bytes]]:
+    """Read an HTTP request or response.
+
+    Args:
+        reader: Stream to read from.
+        body_until_eof: If True and there is no Content-Length, the body is read until the end of the stream.
+
+    Returns:
+        A tuple of (head, body), the head includes the empty line. None at the end of the stream.
+
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise
+        return None
+    match = CONTENT_LENGTH_REGEX.search(head)
+    if match:
+        return head, await reader.readexactly(int(match.group(1)))
+    return head, await reader.read() if body_until_eof else b""
+
+
+def set_content_length(head: bytes, length: int) -> bytes:
+    """Return an HTTP head with its Content-Length replaced."""
+    header = b"Content-Length: %d" % length
+    if CONTENT_LENGTH_REGEX.search(head):
+        return CONTENT_LENGTH_REGEX.sub(header, head, count=1)
+    return head[:-2] + header + b"\r\n\r\n"
+
+
+def xmlrpc_method(body: bytes) -> typing.Optional[str]:
+    """Return the method name of an XML-RPC request, None if it is not one."""
+    try:
+        return xmlrpc.client.loads(body)[1]
+    except (ExpatError, ValueError, xmlrpc.client.Fault):
+        return None
+
+
+class _Forward(asyncio.Protocol):
+    """One side of a TCP forwarding, data received is written as is to the transport of the peer.
+
+    No data is copied in user space, and reading pauses while the peer cannot keep up.
+
+    """
+
+    def __init__(self) -> None:
+        self.transport = None
+        self.peer = None
+        self._pending = []
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def link(self, peer: "_Forward") -> None:
+        """Start forwarding to peer, flushing what was received before."""
+        self.peer = peer
+        for data in self._pending:
+            peer.transport.write(data)
+        self._pending = []
+
+    def data_received(self, data: bytes) -> None:
+        if self.peer is None:
+            self._pending.append(data)
+        else:
+            self.peer.transport.write(data)
+
+    def eof_received(self) -> bool:
+        if self.peer and self.peer.transport.can_write_eof():
+            self.peer.transport.write_eof()
+            return True
+        return False
+
+    def pause_writing(self) -> None:
+        if self.peer:
+            self.peer.transport.pause_reading()
+
+    def resume_writing(self) -> None:
+        if self.peer:
+            self.peer.transport.resume_reading()
+
+    def connection_lost(self, exc) -> None:
+        if self.peer:
+            self.peer.transport.close()
+
+
+class _ForwardClient(_Forward):
+    """Accepted side of a TCP forwarding, connects to the target when a client connects.
+
+    Args:
+        target: (host, port) of the target.
+
+    """
+
+    def __init__(self, target: tuple) -> None:
+        super().__init__()
+        self.target = target
+
+    def connection_made(self, transport) -> None:
+        super().connection_made(transport)
+        asyncio.ensure_future(self._connect())
+
+    async def _connect(self) -> None:
+        loop = asyncio.get_event_loop()
+        try:
+            _, upstream = await loop.create_connection(_Forward, *self.target)
+        except OSError as e:
+            logger.warning(f"Relay could not connect to {self.target}: {e}")
+            self.transport.close()
+            return
+        upstream.link(self)
+        self.link(upstream)
+
+
+class RosRelay:
+    """Relay of the ROS master of a stack to the host, with every advertised endpoint relayed as well.
+
+    Host ROS tools use the relay as their master. The URIs of the node APIs and services and the
+    TCPROS endpoints in the XML-RPC responses are replaced on the fly by relay endpoints, created
+    on demand, so the containers are reached through the relay with no change inside them.
+
+    The publisherUpdate calls pushed by the master to host subscribers do not go through the
+    relay, publishers that appear after a host node subscribed are only seen after it re-subscribes.
+
+    Args:
+        master: (host, port) of the ROS master.
+        listen_host: Address the relay listens on.
+        master_port: Port of the relayed master, 0 for any.
+        host_map: Dictionary of advertised host names to reachable addresses, e.g. container hostnames to IPs.
+        advertise_host: Host written in the rewritten URIs, defaults to listen_host.
+
+    Attributes:
+        endpoints (dict): Relay port per (kind, advertised host, advertised port).
+
+    """
+
+    def __init__(
+        self,
+        master: tuple,
+        listen_host: str = "127.0.0.1",
+        master_port: int = 11311,
+        host_map: typing.Optional[dict] = None,
+        advertise_host: typing.Optional[str] = None,
+    ) -> None:
+        self.master = master
+        self.listen_host = listen_host
+        self.master_port = master_port
+        self.host_map = host_map or {}
+        self.advertise_host = advertise_host or listen_host
+        self.endpoints = {}
+        self._servers = []
+        self._lock = None
+
+    def resolve(self, host: str, port: int) -> tuple:
+        """Return the reachable address of an advertised endpoint."""
+        return self.host_map.get(host, host), port
+
+    async def start(self) -> int:
+        """Start relaying the master.
+
+        Returns:
+            The port of the relayed master.
+
+        """
+        self._lock = asyncio.Lock()
+        server = await asyncio.start_server(
+            functools.partial(self._handle_xmlrpc, self.master),
+            self.listen_host,
+            self.master_port,
+        )
+        self._servers.append(server)
+        self.master_port = server.sockets[0].getsockname()[1]
+        self.endpoints[("xmlrpc",) + tuple(self.master)] = self.master_port
+        return self.master_port
+
+    async def endpoint(self, kind: str, host: str, port: int) -> int:
+        """Return the relay port of an advertised endpoint, starting to relay it if needed.
+
+        Args:
+            kind: ``xmlrpc`` for node APIs, ``tcp`` for TCPROS and services.
+            host: Advertised host.
+            port: Advertised port.
+
+        Returns:
+            The relay port.
+
+        """
+        key = (kind, host, port)
+        async with self._lock:
+            if key not in self.endpoints:
+                target = self.resolve(host, port)
+                if kind == "xmlrpc":
+                    server = await asyncio.start_server(
+                        functools.partial(self._handle_xmlrpc, target),
+                        self.listen_host,
+                        0,
+                    )
+                else:
+                    loop = asyncio.get_event_loop()
+                    server = await loop.create_server(
+                        functools.partial(_ForwardClient, target), self.listen_host, 0
+                    )
+                self._servers.append(server)
+                self.endpoints[key] = server.sockets[0].getsockname()[1]
+                logger.info(
+                    f"Relaying {kind} {host}:{port} on {self.listen_host}:{self.endpoints[key]}"
+                )
+        return self.endpoints[key]
+
+    async def rewrite_value(self, value):
+        """Replace the advertised URIs in an XML-RPC value by relay URIs."""
+        if isinstance(value, list):
+            return [await self.rewrite_value(item) for item in value]
+        if isinstance(value, str):
+            match = URI_REGEX.match(value)
+            if match:
+                scheme, host, port = match.groups()
+                kind = "xmlrpc" if scheme == "http" else "tcp"
+                relay_port = await self.endpoint(kind, host, int(port))
+                return f"{scheme}://{self.advertise_host}:{relay_port}/"
+        return value
+
+    async def rewrite_response(
+        self, method: typing.Optional[str], body: bytes
+    ) -> bytes:
+        """Rewrite the body of a ROS XML-RPC response so every advertised endpoint goes through the relay.
+
+        Args:
+            method: Method of the request.
+            body: Body of the response.
+
+        Returns:
+            The rewritten body, unchanged if it is not a ROS API response.
+
+        """
+        try:
+            (response,), _ = xmlrpc.client.loads(body)
+        except (ExpatError, ValueError, xmlrpc.client.Fault):
+            return body
+        if not isinstance(response, list) or len(response) != 3:
+            return body
+        value = response[2]
+        if (
+            method == "requestTopic"
+            and isinstance(value, list)
+            and len(value) >= 3
+            and value[0] == "TCPROS"
+        ):
+            port = await self.endpoint("tcp", value[1], int(value[2]))
+            response[2] = ["TCPROS", self.advertise_host, port] + value[3:]
+        else:
+            response[2] = await self.rewrite_value(value)
+        return xmlrpc.client.dumps(
+            (response,), methodresponse=True, allow_none=True
+        ).encode()
+
+    async def _handle_xmlrpc(
+        self,
+        target: tuple,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Relay the XML-RPC requests of a client connection, one upstream connection per request."""
+        try:
+            while True:
+                request = await read_http_message(reader)
+                if request is None:
+                    break
+                head, body = request
+                upstream_reader, upstream_writer = await asyncio.open_connection(
+                    *self.resolve(*target)
+                )
+                upstream_writer.write(head + body)
+                await upstream_writer.drain()
+                response = await read_http_message(upstream_reader, body_until_eof=True)
+                upstream_writer.close()
+                if response is None:
+                    break
+                response_head, response_body = response
+                response_body = await self.rewrite_response(
+                    xmlrpc_method(body), response_body
+                )
+                writer.write(
+                    set_content_length(response_head, len(response_body))
+                    + response_body
+                )
+                await writer.drain()
+                # HTTP/1.0 servers close the connection after the response
+                if not re.search(rb"(?i)^HTTP/1\.1", response_head) or re.search(
+                    rb"(?im)^connection:\s*close", response_head
+                ):
+                    break
+        except (OSError, asyncio.IncompleteReadError) as e:
+            logger.debug(f"Relay of {target} closed: {e}")
+        finally:
+            writer.close()
+
+    def close(self) -> None:
+        """Stop every relay server."""
+        for server in self._servers:
+            server.close()
+
+
+def network_host_map(container) -> dict:
+    """Return the addresses of the containers on the first network of a container, by every name they advertise.
+
+    ROS nodes advertise their hostname, which defaults to the short container ID, unless ROS_IP or
+    ROS_HOSTNAME is set, so names, hostnames and IDs are all mapped.
+
+    Args:
+        container: A docker container, e.g. the ros-master.
+
+    Returns:
+        A dictionary of name to IP.
+
+    """
+    network_name = next(iter(container.attrs["NetworkSettings"]["Networks"]))
+    try:
+        network = container.client.networks.get(network_name)
+    except docker.errors.DockerException as e:
+        logger.warning(f"Could not inspect network {network_name}: {e}")
+        return {}
+    host_map = {}
+    for container_id, endpoint in (network.attrs.get("Containers") or {}).items():
+        ip = endpoint["IPv4Address"].split("/")[0]
+        host_map[endpoint["Name"]] = ip
+        host_map[container_id[:12]] = ip
+        try:
+            attrs = container.client.containers.get(container_id).attrs
+        except docker.errors.DockerException:
+            continue
+        host_map[attrs["Config"]["Hostname"]] = ip
+    return host_map
+
+
+def run_relay(relay: RosRelay) -> None:
+    """Run a relay until interrupted.
+
+    Args:
+        relay: The relay to run.
+
+    """
+
+    async def main():
+        await relay.start()
+        while True:
+            await asyncio.sleep(3600)
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Recieved keyboard interrupt, exiting.")
+    finally:
+        relay.close()
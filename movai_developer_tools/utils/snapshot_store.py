@@ -0,0 +1,117 @@
+"""Module that contains a content-addressed store of compressed metadata objects used by movbkp snapshots"""
+from movai_developer_tools.utils.tree_diff import atomic_write
+import hashlib
+import json
+import os
+import pathlib
+import time
+import typing
+import zlib
+
+
+class SnapshotStore:
+    """Content-addressed store of metadata snapshots.
+
+    Every file is stored once, zlib compressed, under the sha256 of its content. A snapshot
+    only records the digests of its files, so successive snapshots only add the objects
+    that changed.
+
+    Args:
+        root: Root directory of the store. Defaults to ``~/.local/share/movai-developer-tools/snapshots``.
+
+    Attributes:
+        root (Path): Root directory of the store.
+        objects_dir (Path): Directory of the compressed objects.
+        snapshots_dir (Path): Directory of the snapshot descriptions.
+
+    """
+
+    def __init__(self, root: typing.Optional[str] = None) -> None:
+        if root is None:
+            data_home = os.environ.get(
+                "XDG_DATA_HOME", os.path.expanduser("~/.local/share")
+            )
+            root = os.path.join(data_home, "movai-developer-tools", "snapshots")
+        self.root = pathlib.Path(root)
+        self.objects_dir = self.root / "objects"
+        self.snapshots_dir = self.root / "snapshots"
+
+    def _object_path(self, digest: str) -> pathlib.Path:
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def put(self, data: bytes) -> typing.Tuple[str, int]:
+        """Store data if it is not stored yet.
+
+        Args:
+            data: Content to store.
+
+        Returns:
+            A tuple with the digest of the data and the number of bytes written (0 if it was already stored).
+
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if path.exists():
+            return digest, 0
+        compressed = zlib.compress(data, 6)
+        atomic_write(path, compressed)
+        return digest, len(compressed)
+
+    def get(self, digest: str) -> bytes:
+        """Return the content of a stored object.
+
+        Args:
+            digest: Digest returned by put.
+
+        Returns:
+            The uncompressed content.
+
+        """
+        return zlib.decompress(self._object_path(digest).read_bytes())
+
+    def save_snapshot(self, name: str, manifests: list) -> pathlib.Path:
+        """Save a snapshot description.
+
+        Args:
+            name: Name of the snapshot.
+            manifests: A list of dictionaries with the manifest ``path`` (relative to the userspace),
+                the ``manifest`` digest and the ``files`` dictionary of relative metadata paths to digests.
+
+        Returns:
+            The path of the snapshot description.
+
+        """
+        path = self.snapshots_dir / f"{name}.json"
+        snapshot = {"name": name, "created": time.time(), "manifests": manifests}
+        atomic_write(path, json.dumps(snapshot, indent=1, sort_keys=True).encode())
+        return path
+
+    def list_snapshots(self) -> list:
+        """Return the names of the snapshots, oldest first."""
+        if not self.snapshots_dir.is_dir():
+            return []
+        paths = sorted(
+            self.snapshots_dir.glob("*.json"), key=lambda path: path.stat().st_mtime
+        )
+        return [path.stem for path in paths]
+
+    def load_snapshot(self, name: typing.Optional[str] = None) -> dict:
+        """Load a snapshot description.
+
+        Args:
+            name: Name of the snapshot, the latest one if not given.
+
+        Returns:
+            The snapshot description, see save_snapshot.
+
+        Raises:
+            FileNotFoundError: If the snapshot does not exist.
+
+        """
+        if name is None:
+            snapshots = self.list_snapshots()
+            if not snapshots:
+                raise FileNotFoundError(f"No snapshots in {self.snapshots_dir}")
+            name = snapshots[-1]
+        with open(self.snapshots_dir / f"{name}.json") as file:
+            return json.load(file)
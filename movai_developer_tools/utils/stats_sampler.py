@@ -0,0 +1,289 @@
+"""Module that contains a low overhead sampler of the docker stats of MOV.AI containers"""
+from movai_developer_tools.utils import logger
+from argparse import ArgumentParser, Namespace
+from array import array
+import docker
+import math
+import struct
+import sys
+import threading
+import time
+import typing
+
+# Fields of every sample, in ring buffer and output file order
+FIELDS = ("time", "cpu_percent", "mem_bytes", "mem_percent")
+# Binary output record: container index followed by the fields as doubles
+RECORD = struct.Struct("<B" + "d" * len(FIELDS))
+# Binary output header, followed by the newline separated container names
+MAGIC = b"MOVSTAT1"
+
+
+class RingBuffer:
+    """Fixed-size buffer of samples stored in a flat array of doubles, the oldest samples are overwritten.
+
+    Args:
+        capacity: Maximum number of samples.
+        fields: Number of fields per sample.
+
+    """
+
+    def __init__(self, capacity: int, fields: int = len(FIELDS)) -> None:
+        self.capacity = capacity
+        self.fields = fields
+        self._data = array("d", bytes(8 * capacity * fields))
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, sample: typing.Sequence[float]) -> None:
+        """Add a sample, overwriting the oldest one if the buffer is full."""
+        offset = self._next * self.fields
+        self._data[offset : offset + self.fields] = array("d", sample)
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def column(self, field: int) -> list:
+        """Return the values of a field, oldest first."""
+        start = (self._next - self._size) % self.capacity
+        return [
+            self._data[((start + i) % self.capacity) * self.fields + field]
+            for i in range(self._size)
+        ]
+
+
+def percentile(values: typing.Sequence[float], p: float) -> float:
+    """Return the p-th percentile (0-100) of values, nearest rank."""
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def parse_stats(stats: dict) -> tuple:
+    """Compute CPU and memory usage from a docker stats entry, like ``docker stats`` does.
+
+    Args:
+        stats: Decoded entry of the docker stats stream.
+
+    Returns:
+        A tuple of (cpu_percent, mem_bytes, mem_percent).
+
+    """
+    cpu, precpu = stats.get("cpu_stats", {}), stats.get("precpu_stats", {})
+    cpu_delta = cpu.get("cpu_usage", {}).get("total_usage", 0) - precpu.get(
+        "cpu_usage", {}
+    ).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    online_cpus = cpu.get("online_cpus") or len(
+        cpu.get("cpu_usage", {}).get("percpu_usage") or [1]
+    )
+    cpu_percent = 0.0
+    if cpu_delta > 0 and system_delta > 0:
+        cpu_percent = cpu_delta / system_delta * online_cpus * 100
+
+    memory = stats.get("memory_stats", {})
+    details = memory.get("stats", {})
+    # Page cache is not memory pressure, cgroup v1 reports cache, v2 inactive_file
+    cache = details.get("cache", details.get("inactive_file", 0))
+    mem_bytes = max(0, memory.get("usage", 0) - cache)
+    limit = memory.get("limit", 0)
+    mem_percent = mem_bytes / limit * 100 if limit else 0.0
+    return cpu_percent, float(mem_bytes), mem_percent
+
+
+class StatsSampler:
+    """Stream the docker stats of containers into ring buffers, optionally writing every sample to a file.
+
+    Args:
+        containers: A dictionary of name to docker Container object.
+        capacity: Number of samples kept in memory per container.
+        output: Path of the file where samples are written, optional.
+        output_format: ``csv`` or ``bin`` (packed doubles, see RECORD).
+
+    Attributes:
+        buffers (dict): RingBuffer per container name.
+
+    """
+
+    def __init__(
+        self,
+        containers: dict,
+        capacity: int = 300,
+        output: typing.Optional[str] = None,
+        output_format: str = "csv",
+    ) -> None:
+        self.containers = containers
+        self.buffers = {name: RingBuffer(capacity) for name in containers}
+        self._names = list(containers)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._file = None
+        self._format = output_format
+        if output:
+            self._open_output(output)
+
+    def _open_output(self, output: str) -> None:
+        if self._format == "bin":
+            self._file = open(output, "wb")
+            self._file.write(MAGIC + "\n".join(self._names).encode() + b"\0")
+        else:
+            self._file = open(output, "w")
+            self._file.write("container," + ",".join(FIELDS) + "\n")
+
+    def _write(self, index: int, sample: tuple) -> None:
+        if self._format == "bin":
+            self._file.write(RECORD.pack(index, *sample))
+        else:
+            values = ",".join(f"{value:.3f}" for value in sample)
+            self._file.write(f"{self._names[index]},{values}\n")
+
+    def _sample(self, index: int, name: str) -> None:
+        try:
+            for stats in self.containers[name].stats(stream=True, decode=True):
+                if self._stop.is_set():
+                    return
+                sample = (time.time(),) + parse_stats(stats)
+                with self._lock:
+                    self.buffers[name].append(sample)
+                    if self._file:
+                        self._write(index, sample)
+        except Exception as e:
+            if not self._stop.is_set():
+                logger.warning(f"Stats stream of {name} stopped: {e}")
+
+    def start(self) -> "StatsSampler":
+        """Start one sampling thread per container."""
+        for index, name in enumerate(self._names):
+            thread = threading.Thread(target=self._sample, args=(index, name))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        """Stop sampling and close the output file."""
+        self._stop.set()
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def column(self, name: str, field: str) -> list:
+        """Return the values of a field of a container, oldest first."""
+        with self._lock:
+            return self.buffers[name].column(FIELDS.index(field))
+
+    def window(self, name: str, start: float, end: float) -> dict:
+        """Summarize the load of a container between two unix timestamps.
+
+        Args:
+            name: Container name.
+            start: Start of the window.
+            end: End of the window.
+
+        Returns:
+            A dictionary with the number of samples, mean and max CPU and max memory.
+
+        """
+        with self._lock:
+            buffer = self.buffers[name]
+            rows = zip(*(buffer.column(i) for i in range(len(FIELDS))))
+            rows = [row for row in rows if start <= row[0] <= end]
+        cpu = [row[1] for row in rows]
+        return {
+            "samples": len(rows),
+            "cpu_mean": round(sum(cpu) / len(cpu), 1) if cpu else None,
+            "cpu_max": round(max(cpu), 1) if cpu else None,
+            "mem_max_mb": (
+                round(max(row[2] for row in rows) / 2**20, 1) if rows else None
+            ),
+        }
+
+    def summary(self, name: str) -> str:
+        """Return rolling percentiles of the samples of a container."""
+        cpu = self.column(name, "cpu_percent")
+        mem = [value / 2**20 for value in self.column(name, "mem_bytes")]
+        if not cpu:
+            return f"{name}: no samples"
+        return (
+            f"{name}: n={len(cpu)} "
+            f"cpu% p50={percentile(cpu, 50):.1f} p90={percentile(cpu, 90):.1f} p99={percentile(cpu, 99):.1f} | "
+            f"mem MiB p50={percentile(mem, 50):.1f} p90={percentile(mem, 90):.1f} max={max(mem):.1f}"
+        )
+
+
+def add_stats_arguments(parser: ArgumentParser) -> None:
+    """Add the arguments of the stats sub-command to a handler parser.
+
+    Args:
+        parser: The handler parser.
+
+    """
+    parser.add_argument(
+        "--stats-also",
+        help="Name or ID of another container sampled together with the selected one (stats), can be repeated",
+        action="append",
+        default=[],
+    )
+    parser.add_argument(
+        "--stats-file",
+        help="Write every sample to this file (stats)",
+    )
+    parser.add_argument(
+        "--stats-format",
+        help="Format of the stats file, csv or bin (stats), defaults to csv",
+        choices=("csv", "bin"),
+        default="csv",
+    )
+    parser.add_argument(
+        "--stats-window",
+        help="Number of samples used for the rolling percentiles (stats), defaults to 300",
+        type=int,
+        default=300,
+    )
+    parser.add_argument(
+        "--stats-duration",
+        help="Stop sampling after this many seconds (stats), runs until interrupted by default",
+        type=float,
+    )
+
+
+def run_stats(container_tools, args: Namespace, interval: float = 5.0) -> None:
+    """Sample the selected container, and the ones given with --stats-also, printing rolling percentiles.
+
+    Args:
+        container_tools: ContainerTools object of the selected container.
+        args: A set of parsed args.
+        interval: Seconds between printed summaries.
+
+    """
+    containers = {container_tools.name(): container_tools.container}
+    for other in args.stats_also:
+        try:
+            container = container_tools.client.containers.get(other)
+        except docker.errors.NotFound:
+            logger.error(f"Container {other} of --stats-also not found")
+            sys.exit(1)
+        containers[container.name] = container
+    sampler = StatsSampler(
+        containers, args.stats_window, args.stats_file, args.stats_format
+    ).start()
+    deadline = time.monotonic() + args.stats_duration if args.stats_duration else None
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            time.sleep(
+                interval
+                if deadline is None
+                else max(0, min(interval, deadline - time.monotonic()))
+            )
+            for name in containers:
+                print(sampler.summary(name))
+    except KeyboardInterrupt:
+        logger.info("Recieved keyboard interrupt, exiting.")
+    finally:
+        sampler.stop()
+        if args.stats_file:
+            logger.info(f"Samples written to {args.stats_file}")
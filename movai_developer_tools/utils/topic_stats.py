@@ -0,0 +1,390 @@
+"""Module that contains a TCPROS subscriber measuring the rate, bandwidth and jitter of topics without deserializing them, no ROS installation required"""
+from movai_developer_tools.utils.ros_network import (
+    CALLER_ID,
+    RosApiError,
+    RosMasterClient,
+    request_tcpros,
+)
+from concurrent.futures import ThreadPoolExecutor
+import math
+import selectors
+import socket
+import struct
+import time
+import typing
+
+# Size of the receive buffer of every connection, larger messages are skipped without buffering
+BUFFER_SIZE = 1 << 16
+_LENGTH = struct.Struct("<I")
+
+
+class TopicStats:
+    """Arrival statistics of the messages of a topic, from all its publishers.
+
+    The inter-arrival times are accumulated with Welford's algorithm, nothing is stored per message.
+
+    Args:
+        topic: Topic name.
+        topic_type: Message type.
+
+    Attributes:
+        topic (str): Topic name.
+        topic_type (str): Message type.
+        connections (int): Number of publishers connected.
+        errors (list): Connection errors.
+        messages (int): Number of messages received.
+        bytes (int): Total size of the received messages.
+
+    """
+
+    __slots__ = (
+        "topic",
+        "topic_type",
+        "connections",
+        "errors",
+        "messages",
+        "bytes",
+        "start",
+        "last",
+        "max_gap",
+        "_mean",
+        "_m2",
+    )
+
+    def __init__(self, topic: str, topic_type: str = "*") -> None:
+        self.topic = topic
+        self.topic_type = topic_type
+        self.connections = 0
+        self.errors = []
+        self.messages = 0
+        self.bytes = 0
+        self.start = None
+        self.last = None
+        self.max_gap = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, now: float, size: int) -> None:
+        """Record a message received at now."""
+        self.messages += 1
+        self.bytes += size
+        if self.last is None:
+            self.start = now
+        else:
+            gap = now - self.last
+            if gap > self.max_gap:
+                self.max_gap = gap
+            count = self.messages - 1
+            delta = gap - self._mean
+            self._mean += delta / count
+            self._m2 += delta * (gap - self._mean)
+        self.last = now
+
+    def hz(self) -> float:
+        """Return the mean rate between the first and the last message."""
+        if self.messages < 2 or self.last == self.start:
+            return math.nan
+        return (self.messages - 1) / (self.last - self.start)
+
+    def bandwidth(self, duration: float) -> float:
+        """Return the received bytes per second over a measurement duration."""
+        return self.bytes / duration if duration > 0 else math.nan
+
+    def jitter(self) -> float:
+        """Return the standard deviation of the inter-arrival times in seconds."""
+        if self.messages < 3:
+            return math.nan
+        return math.sqrt(self._m2 / (self.messages - 2))
+
+    def summary(self, duration: float) -> str:
+        """Return a one line summary of the topic."""
+        if not self.messages:
+            return f"no messages, {self.connections} publishers"
+        return (
+            f"{self.hz():.2f}Hz {self.bandwidth(duration) / 1024:.1f}KB/s "
+            f"size={self.bytes / self.messages:.0f}B jitter={self.jitter() * 1000:.2f}ms "
+            f"max_gap={self.max_gap * 1000:.1f}ms n={self.messages} publishers={self.connections}"
+        )
+
+
+def encode_header(fields: dict) -> bytes:
+    """Encode a TCPROS connection header.
+
+    Args:
+        fields: Header fields.
+
+    Returns:
+        The length-prefixed header.
+
+    """
+    data = b"".join(
+        _LENGTH.pack(len(field)) + field
+        for field in (f"{key}={value}".encode() for key, value in fields.items())
+    )
+    return _LENGTH.pack(len(data)) + data
+
+
+def decode_header(data: typing.Union[bytes, memoryview]) -> dict:
+    """Decode the fields of a TCPROS connection header, without its length prefix.
+
+    Args:
+        data: Header fields.
+
+    Returns:
+        A dictionary of field to value.
+
+    Raises:
+        ValueError: If the header is malformed.
+
+    """
+    fields, pos = {}, 0
+    while pos < len(data):
+        if pos + 4 > len(data):
+            raise ValueError("truncated connection header")
+        (length,) = _LENGTH.unpack_from(data, pos)
+        field = bytes(data[pos + 4 : pos + 4 + length]).decode(errors="replace")
+        if length > len(data) - pos - 4 or "=" not in field:
+            raise ValueError("malformed connection header")
+        key, value = field.split("=", 1)
+        fields[key] = value
+        pos += 4 + length
+    return fields
+
+
+class TcprosConnection:
+    """A subscriber connection counting the messages of a publisher, framed in a preallocated buffer.
+
+    Only the length prefixes are read, payloads are never copied nor deserialized. Payloads
+    longer than the buffer are received into it and discarded.
+
+    Args:
+        sock: Connected socket, the subscriber header already sent.
+        stats: Statistics of the topic.
+        buffer_size: Size of the receive buffer.
+
+    """
+
+    def __init__(
+        self, sock: socket.socket, stats: TopicStats, buffer_size: int = BUFFER_SIZE
+    ) -> None:
+        self.sock = sock
+        self.stats = stats
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.filled = 0
+        # Bytes of the current payload still to be received, and its size
+        self.skip = 0
+        self.pending = 0
+        self.header = None
+
+    def on_readable(self, now: float) -> bool:
+        """Receive what is available and account the completed messages.
+
+        Args:
+            now: Time of the read.
+
+        Returns:
+            False once the connection is closed or failed.
+
+        """
+        try:
+            if self.skip:
+                received = self.sock.recv_into(
+                    self.view[: min(self.skip, len(self.buffer))]
+                )
+                self.skip -= received
+                if received and not self.skip:
+                    self.stats.add(now, self.pending)
+                return received > 0
+            received = self.sock.recv_into(self.view[self.filled :])
+        except BlockingIOError:
+            return True
+        except OSError as e:
+            self.stats.errors.append(f"{type(e).__name__}: {e}")
+            return False
+        if not received:
+            return False
+        self.filled += received
+        if self.header is None and not self._read_header():
+            return self.header is None or "error" not in self.header
+        self._read_messages(now)
+        return True
+
+    def _read_header(self) -> bool:
+        """Parse the publisher header once complete, returning True if messages may follow."""
+        if self.filled < 4:
+            return False
+        (length,) = _LENGTH.unpack_from(self.buffer, 0)
+        if 4 + length > len(self.buffer):
+            # Headers are small, grow the buffer once for an unusual one
+            self.view.release()
+            self.buffer.extend(bytes(4 + length - len(self.buffer)))
+            self.view = memoryview(self.buffer)
+        if self.filled < 4 + length:
+            return False
+        try:
+            self.header = decode_header(self.view[4 : 4 + length])
+        except ValueError as e:
+            self.header = {"error": str(e)}
+        if "error" in self.header:
+            self.stats.errors.append(self.header["error"])
+            return False
+        self._shift(4 + length)
+        return True
+
+    def _read_messages(self, now: float) -> None:
+        """Account the complete messages in the buffer and keep the incomplete rest."""
+        pos, end = 0, self.filled
+        while pos + 4 <= end:
+            (length,) = _LENGTH.unpack_from(self.buffer, pos)
+            if pos + 4 + length <= end:
+                self.stats.add(now, length)
+                pos += 4 + length
+                continue
+            if 4 + length > len(self.buffer):
+                # The payload does not fit, skip the rest of it in the next reads
+                self.skip = pos + 4 + length - end
+                self.pending = length
+                pos = end
+            break
+        self._shift(pos)
+
+    def _shift(self, pos: int) -> None:
+        """Move the unread bytes from pos to the start of the buffer."""
+        rest = self.filled - pos
+        if rest and pos:
+            self.buffer[:rest] = self.view[pos : self.filled]
+        self.filled = rest
+
+    def close(self) -> None:
+        """Close the connection."""
+        self.sock.close()
+
+
+def subscribe(
+    host: str, port: int, topic: str, topic_type: str = "*", timeout: float = 2.0
+) -> socket.socket:
+    """Connect to a TCPROS publisher and send the subscriber header.
+
+    Any message definition is accepted (md5sum ``*``), as the payloads are not deserialized.
+
+    Args:
+        host: Publisher host.
+        port: Publisher TCPROS port.
+        topic: Topic name.
+        topic_type: Message type.
+        timeout: Connection timeout in seconds.
+
+    Returns:
+        A non-blocking socket.
+
+    """
+    sock = socket.create_connection((host, port), timeout=timeout)
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.sendall(
+            encode_header(
+                {
+                    "callerid": CALLER_ID,
+                    "topic": topic,
+                    "type": topic_type,
+                    "md5sum": "*",
+                    "tcp_nodelay": "1",
+                }
+            )
+        )
+    except OSError:
+        sock.close()
+        raise
+    sock.setblocking(False)
+    return sock
+
+
+def serve(selector: selectors.BaseSelector, duration: float) -> None:
+    """Read the TcprosConnection registered in a selector for a duration, then close them.
+
+    Args:
+        selector: Selector with a TcprosConnection as the data of every socket.
+        duration: Duration in seconds.
+
+    """
+    deadline = time.monotonic() + duration
+    try:
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            events = selector.select(remaining)
+            now = time.monotonic()
+            for key, _ in events:
+                if not key.data.on_readable(now):
+                    selector.unregister(key.fileobj)
+                    key.data.close()
+    finally:
+        for key in list(selector.get_map().values()):
+            key.data.close()
+        selector.close()
+
+
+def monitor_topics(
+    master_uri: str,
+    topics: typing.Optional[typing.Iterable[str]] = None,
+    duration: float = 5.0,
+    timeout: float = 2.0,
+    buffer_size: int = BUFFER_SIZE,
+    jobs: int = 16,
+) -> list:
+    """Subscribe to topics from every publisher and measure their messages for a duration.
+
+    Publishers are resolved through the master and node XML-RPC APIs, concurrently. All the
+    connections are then served by a single thread with a selector.
+
+    Args:
+        master_uri: URI of the ROS master.
+        topics: Topic names, defaults to every published topic.
+        duration: Measurement duration in seconds.
+        timeout: Network timeout in seconds.
+        buffer_size: Receive buffer size of every connection.
+        jobs: Number of publishers resolved concurrently.
+
+    Returns:
+        A list of TopicStats, sorted by topic.
+
+    Raises:
+        OSError: If the master is not reachable.
+
+    """
+    master = RosMasterClient(master_uri, timeout)
+    publishers = master.publishers()
+    types = master.topic_types()
+    stats = {
+        topic: TopicStats(topic, types.get(topic, "*"))
+        for topic in (publishers if topics is None else topics)
+    }
+    for topic in stats.keys() - publishers.keys():
+        stats[topic].errors.append("no publishers")
+
+    def connect(target: tuple) -> tuple:
+        topic, node = target
+        try:
+            host, port = request_tcpros(master.lookup_node(node), topic, timeout)
+            return topic, subscribe(host, port, topic, stats[topic].topic_type, timeout)
+        except (OSError, RosApiError, ValueError) as e:
+            return topic, f"{node}: {type(e).__name__}: {e}"
+
+    targets = [(topic, node) for topic in stats for node in publishers.get(topic, ())]
+    selector = selectors.DefaultSelector()
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for topic, result in pool.map(connect, targets):
+            if isinstance(result, str):
+                stats[topic].errors.append(result)
+                continue
+            stats[topic].connections += 1
+            selector.register(
+                result,
+                selectors.EVENT_READ,
+                TcprosConnection(result, stats[topic], buffer_size),
+            )
+
+    serve(selector, duration)
+    return [stats[topic] for topic in sorted(stats)]
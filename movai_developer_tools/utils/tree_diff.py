@@ -0,0 +1,197 @@
+"""Module that contains functions to compare a streamed tar archive against a directory tree and only write what changed."""
+from movai_developer_tools.utils import logger
+import hashlib
+import io
+import os
+import pathlib
+import tarfile
+import tempfile
+import typing
+
+
+class TreeChanges(typing.NamedTuple):
+    """Relative paths of the files that changed in a directory tree.
+
+    Attributes:
+        added (list): Files that did not exist in the tree.
+        modified (list): Files whose content changed.
+        removed (list): Files that exist in the tree but not in the archive.
+
+    """
+
+    added: list
+    modified: list
+    removed: list
+
+    def is_empty(self) -> bool:
+        """Return True if nothing changed."""
+        return not (self.added or self.modified or self.removed)
+
+    def log(self, title: str) -> None:
+        """Log the changes in a git status like format.
+
+        Args:
+            title: Title printed before the changes.
+
+        """
+        if self.is_empty():
+            logger.info(f"{title}: no changes")
+            return
+        logger.info(
+            f"{title}: {len(self.added)} added, {len(self.modified)} modified, {len(self.removed)} removed"
+        )
+        for flag, paths in (
+            ("A", self.added),
+            ("M", self.modified),
+            ("D", self.removed),
+        ):
+            for path in paths:
+                print(f"  {flag} {path}")
+
+
+class ChunkStream(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks, e.g. the stream returned by get_archive.
+
+    Args:
+        chunks: Iterable of bytes.
+
+    """
+
+    def __init__(self, chunks: typing.Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def file_digest(
+    path: typing.Union[str, pathlib.Path], chunk_size: int = 1 << 16
+) -> str:
+    """Return the sha256 hex digest of a file.
+
+    Args:
+        path: Path of the file.
+        chunk_size: Size of the blocks read from the file.
+
+    Returns:
+        The hex digest of the file content.
+
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def tree_files(root: typing.Union[str, pathlib.Path]) -> set:
+    """Return the set of relative posix paths of all regular files under root.
+
+    Args:
+        root: Root directory of the tree.
+
+    Returns:
+        A set of relative paths, empty if root does not exist.
+
+    """
+    root = pathlib.Path(root)
+    if not root.is_dir():
+        return set()
+    return {
+        path.relative_to(root).as_posix() for path in root.rglob("*") if path.is_file()
+    }
+
+
+def atomic_write(path: pathlib.Path, data: bytes) -> None:
+    """Write data to a temporary file next to path and rename it over path.
+
+    Args:
+        path: Destination file.
+        data: Content of the file.
+
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+        # Keep the permissions of the file being replaced, default umask otherwise
+        mode = path.stat().st_mode if path.exists() else 0o666 & ~_umask()
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def _umask() -> int:
+    """Return the current process umask."""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def apply_tar_stream(
+    chunks: typing.Iterable[bytes],
+    dest_dir: typing.Union[str, pathlib.Path],
+    strip_components: int = 1,
+    dry_run: bool = False,
+) -> TreeChanges:
+    """Make dest_dir mirror the files of a streamed tar archive, only touching files whose content differs.
+
+    The archive is read sequentially, so memory use is bounded by the largest file in it.
+
+    Args:
+        chunks: Iterable of tar data, e.g. the stream returned by get_archive.
+        dest_dir: Directory to update.
+        strip_components: Number of leading path components removed from member names.
+        dry_run: If True, only compute the changes.
+
+    Returns:
+        The changes between dest_dir and the archive.
+
+    """
+    dest_dir = pathlib.Path(dest_dir)
+    existing = tree_files(dest_dir)
+    seen = set()
+    added, modified = [], []
+
+    with tarfile.open(fileobj=ChunkStream(chunks), mode="r|") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            parts = pathlib.PurePosixPath(member.name).parts[strip_components:]
+            # Never write outside of dest_dir
+            if not parts or ".." in parts:
+                continue
+            rel_path = "/".join(parts)
+            seen.add(rel_path)
+            data = tar.extractfile(member).read()
+            path = dest_dir / rel_path
+            if rel_path in existing:
+                if hashlib.sha256(data).hexdigest() == file_digest(path):
+                    continue
+                modified.append(rel_path)
+            else:
+                added.append(rel_path)
+            if not dry_run:
+                atomic_write(path, data)
+
+    removed = sorted(existing - seen)
+    if not dry_run:
+        for rel_path in removed:
+            (dest_dir / rel_path).unlink()
+
+    return TreeChanges(sorted(added), sorted(modified), removed)
@@ -21,6 +21,7 @@ setuptools.setup(
             "movros = movai_developer_tools.movros.handler:handle",
             "movcontainer = movai_developer_tools.movcontainer.handler:handle",
             "movbkp = movai_developer_tools.movbkp.handler:handle",
+            "movcompletion = movai_developer_tools.movcompletion.handler:handle",
         ]
     },
 )
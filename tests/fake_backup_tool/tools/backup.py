@@ -0,0 +1,108 @@
+"""Fake MOV.AI backup tool storing the platform metadata as files in $FAKE_PLATFORM_DIR/<Type>/<name>.json.
+
+Every run is appended to $FAKE_PLATFORM_DIR/runs.log as ``<action> <manifest>``.
+
+With $FAKE_REDIS_PORT, import and export use the Redis at that port instead, with the keys of
+fast_backup.flatten. $FAKE_REDIS_LAYOUT=raw stores the string values without JSON encoding,
+as a tool with another key layout would.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import shutil
+import sys
+
+
+def entries(manifest):
+    with open(manifest) as file:
+        for line in file.read().splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line.split(":", 1)
+
+
+def redis_run(args, port):
+    from movai_developer_tools.utils.fast_backup import flatten, unflatten
+    from movai_developer_tools.utils.redis_client import RedisClient
+
+    raw = os.environ.get("FAKE_REDIS_LAYOUT") == "raw"
+    client = RedisClient("127.0.0.1", int(port))
+    for type_name, pattern in entries(args.manifest):
+        if args.action == "import":
+            type_dir = os.path.join(args.project, type_name)
+            for file_name in sorted(os.listdir(type_dir)):
+                name = os.path.splitext(file_name)[0]
+                if not fnmatch.fnmatchcase(name, pattern):
+                    continue
+                with open(os.path.join(type_dir, file_name)) as file:
+                    data = json.load(file)[type_name][name]
+                keys = flatten(type_name, name, data)
+                if raw:
+                    keys = {
+                        key: value[1:-1] if value.startswith('"') else value
+                        for key, value in keys.items()
+                    }
+                client.execute(
+                    "MSET", *(item for pair in keys.items() for item in pair)
+                )
+                print(f"Imported {type_name}:{name}")
+            continue
+        keys = client.scan(f"{type_name}:{pattern},*")
+        values = client.execute("MGET", *keys) if keys else []
+        objects = unflatten(zip(keys, values)).get(type_name, {})
+        for name, data in objects.items():
+            path = os.path.join(args.project, type_name, f"{name}.json")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as file:
+                json.dump({type_name: {name: data}}, file)
+            print(f"Exported {type_name}:{name}")
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p", dest="project", required=True)
+    parser.add_argument("-a", dest="action", required=True)
+    parser.add_argument("-m", dest="manifest", required=True)
+    for flag in ("-i", "-c", "-f"):
+        parser.add_argument(flag, action="store_true")
+    args = parser.parse_args()
+    if "FAKE_REDIS_PORT" in os.environ:
+        return redis_run(args, os.environ["FAKE_REDIS_PORT"])
+    platform = os.environ["FAKE_PLATFORM_DIR"]
+    with open(os.path.join(platform, "runs.log"), "a") as log:
+        log.write(f"{args.action} {args.manifest}\n")
+    failed = False
+    for type_name, pattern in entries(args.manifest):
+        source_dir = os.path.join(
+            platform if args.action != "import" else args.project, type_name
+        )
+        names = [
+            name
+            for name in sorted(
+                os.listdir(source_dir) if os.path.isdir(source_dir) else []
+            )
+            if fnmatch.fnmatchcase(os.path.splitext(name)[0], pattern)
+        ]
+        if not names:
+            print(f"ERROR: {type_name}:{pattern} not found")
+            failed = True
+        for name in names:
+            source = os.path.join(source_dir, name)
+            if args.action == "remove":
+                os.remove(source)
+                print(f"Removed {type_name}:{name}")
+                continue
+            target_dir = os.path.join(
+                args.project if args.action == "export" else platform, type_name
+            )
+            os.makedirs(target_dir, exist_ok=True)
+            shutil.copyfile(source, os.path.join(target_dir, name))
+            print(f"{args.action.capitalize()}ed {type_name}:{name}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
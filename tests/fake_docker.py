@@ -0,0 +1,252 @@
+"""Minimal fake docker daemon listening on a unix socket and container running its execs locally, used to test the docker related tools without docker."""
+import hashlib
+import io
+import json
+import os
+import re
+import requests
+import socketserver
+import subprocess
+import tarfile
+import tempfile
+import threading
+import urllib.parse
+from docker.models.containers import ExecResult
+from movai_developer_tools.utils.container_tools import ContainerTools
+from http.server import BaseHTTPRequestHandler
+
+# Directory holding the fake tools.backup module, see LocalContainer
+FAKE_BACKUP_TOOL = os.path.join(os.path.dirname(__file__), "fake_backup_tool")
+# Root of the repository, the fake backup tool uses the Redis client of the package
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_container(name: str, ip: str, labels: dict = None, binds: list = None):
+    """Return the inspect data of a fake running container."""
+    return {
+        "Id": hashlib.sha256(name.encode()).hexdigest(),
+        "Name": "/" + name,
+        "State": {"Status": "running", "Running": True},
+        "Config": {"Labels": labels or {}},
+        "HostConfig": {"Binds": binds or []},
+        "NetworkSettings": {
+            "Networks": {"bridge": {"IPAddress": ip, "Gateway": "172.17.0.1"}}
+        },
+    }
+
+
+class FakeDockerDaemon:
+    """Fake docker daemon serving a list of containers on a unix socket.
+
+    Args:
+        containers: Inspect data of the containers, see make_container.
+
+    Attributes:
+        url (str): Docker host URL of the daemon.
+        requests (list): Paths requested to the daemon.
+
+    """
+
+    def __init__(self, containers: list) -> None:
+        self.containers = containers
+        self.requests = []
+        self._dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self._dir.name, "docker.sock")
+        self.url = "unix://" + path
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                daemon.requests.append(url.path)
+                query = urllib.parse.parse_qs(url.query)
+                path = re.sub(r"^/v[\d.]+", "", url.path)
+                if path == "/version":
+                    return self.reply({"ApiVersion": "1.41", "Version": "20.10.0"})
+                if path == "/containers/json":
+                    filters = json.loads(query.get("filters", ["{}"])[0])
+                    return self.reply(daemon.list(filters))
+                match = re.match(r"^/containers/([^/]+)/json$", path)
+                if match:
+                    container = daemon.get(match.group(1))
+                    if container:
+                        return self.reply(container)
+                return self.reply({"message": "not found"}, 404)
+
+            def reply(self, data, status=200):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = socketserver.ThreadingUnixStreamServer(path, Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def get(self, id_or_name: str):
+        """Return a container by id, id prefix or name."""
+        for container in self.containers:
+            if container["Id"].startswith(id_or_name) or container["Name"] == (
+                "/" + id_or_name
+            ):
+                return container
+        return None
+
+    def list(self, filters: dict) -> list:
+        """Return the list summaries of the containers matching the filters."""
+        result = []
+        for container in self.containers:
+            labels = container["Config"]["Labels"]
+            name = container["Name"]
+            if not all(re.search(regex, name[1:]) for regex in filters.get("name", [])):
+                continue
+            if not all(container["Id"].startswith(i) for i in filters.get("id", [])):
+                continue
+            if not all(
+                self.has_label(labels, label) for label in filters.get("label", [])
+            ):
+                continue
+            result.append(
+                {
+                    "Id": container["Id"],
+                    "Names": [name],
+                    "Labels": labels,
+                    "State": container["State"]["Status"],
+                }
+            )
+        return result
+
+    @staticmethod
+    def has_label(labels: dict, label: str) -> bool:
+        """Return True if labels match a key or key=value label filter."""
+        key, _, value = label.partition("=")
+        return key in labels and (not value or labels[key] == value)
+
+    def close(self) -> None:
+        """Stop the daemon."""
+        self.server.shutdown()
+        self.server.server_close()
+        self._dir.cleanup()
+
+
+class LocalExecApi:
+    """Docker exec API running the commands locally, optionally breaking the stream after some bytes.
+
+    Args:
+        break_after: Number of output bytes after which the first stream raises a connection error.
+
+    """
+
+    def __init__(self, break_after=None):
+        self.break_after = break_after
+        self.commands = []
+        self.users = []
+        self.exit_codes = {}
+
+    def exec_create(self, container, cmd, user):
+        self.commands.append(cmd[-1])
+        self.users.append(user)
+        return {"Id": len(self.commands) - 1}
+
+    def exec_start(self, exec_id, stream, demux):
+        process = subprocess.Popen(
+            ["bash", "-c", self.commands[exec_id]],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        sent = 0
+        for chunk in iter(lambda: process.stdout.read(4096), b""):
+            if self.break_after is not None and sent + len(chunk) > self.break_after:
+                self.break_after = None
+                process.kill()
+                process.wait()
+                raise requests.exceptions.ConnectionError("connection reset")
+            sent += len(chunk)
+            yield chunk, None
+        self.exit_codes[exec_id] = process.wait()
+        yield None, process.stderr.read()
+
+    def exec_inspect(self, exec_id):
+        return {"ExitCode": self.exit_codes[exec_id]}
+
+
+class LocalContainer:
+    """Container whose exec and archive APIs run locally, container paths are host paths.
+
+    The execs find the fake tools.backup module, which stores the platform metadata in the
+    directory given as platform_dir, or in Redis, see tests/fake_backup_tool/tools/backup.py.
+
+    Args:
+        break_after: See LocalExecApi.
+        binds: Binds of the container, ``host:container``.
+        platform_dir: Directory of the metadata of the fake platform.
+
+    Attributes:
+        environment (dict): Variables added to the environment of exec_run.
+        execs (list): Commands run with exec_run.
+        archives (list): Sizes of the archives put.
+
+    """
+
+    def __init__(self, break_after=None, binds=None, platform_dir=None):
+        self.id = "local"
+        self.name = "local"
+        self.attrs = {"HostConfig": {"Binds": binds or []}}
+        self.client = type("Client", (), {})()
+        self.client.api = LocalExecApi(break_after)
+        self.platform_dir = platform_dir
+        self.environment = {}
+        self.execs = []
+        self.archives = []
+
+    def exec_run(self, cmd, user=None, environment=None, demux=False):
+        """Run a command locally, with the environment given as a dictionary or a list."""
+        self.execs.append(cmd[-1])
+        env = dict(os.environ)
+        if isinstance(environment, dict):
+            env.update(environment)
+        else:
+            env.update(variable.split("=", 1) for variable in environment or [])
+        env["PYTHONPATH"] = FAKE_BACKUP_TOOL + os.pathsep + REPOSITORY
+        if self.platform_dir:
+            env["FAKE_PLATFORM_DIR"] = self.platform_dir
+        env.update(self.environment)
+        process = subprocess.run(cmd, env=env, capture_output=True)
+        output = (process.stdout, process.stderr)
+        return ExecResult(process.returncode, output if demux else b"".join(output))
+
+    def get_archive(self, path):
+        """Return a tar archive of a path as a chunk iterator, like the docker API."""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            tar.add(path, arcname=os.path.basename(path.rstrip("/")))
+        data = buffer.getvalue()
+        return iter([data[i : i + 4096] for i in range(0, len(data), 4096)]), {}
+
+    def put_archive(self, path, data):
+        """Extract a tar archive, given as bytes or as an iterable of chunks, recording its size."""
+        if not isinstance(data, bytes):
+            data = b"".join(data)
+        self.archives.append(len(data))
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            tar.extractall(path)
+        return True
+
+
+def local_container_tools(container, userspace_bind_dir="/opt/mov.ai/user"):
+    """Return a ContainerTools over a LocalContainer, without a docker daemon."""
+    tools = ContainerTools.__new__(ContainerTools)
+    tools.userspace_bind_dir = userspace_bind_dir
+    tools.docker_host = None
+    tools.client = container.client
+    tools.container = container
+    tools.session = None
+    return tools
@@ -0,0 +1,100 @@
+"""Minimal fake Redis server speaking RESP, used to test the fast backup without Redis."""
+import fnmatch
+import socketserver
+import threading
+
+
+class _Error(str):
+    pass
+
+
+def _encode(reply) -> bytes:
+    if isinstance(reply, _Error):
+        return b"-%s\r\n" % reply.encode()
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # Commands queued by MULTI on this connection, run together by EXEC
+        queue = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            name = args[0].decode().upper()
+            if name == "MULTI":
+                with self.server.lock:
+                    self.server.commands.append(name)
+                queue, reply = [], "OK"
+            elif name == "EXEC":
+                with self.server.lock:
+                    self.server.commands.append(name)
+                    reply = [self.server.command(queued) for queued in queue]
+                queue = None
+            elif queue is not None:
+                queue.append(args)
+                reply = "QUEUED"
+            else:
+                reply = self.server.command(args)
+            self.wfile.write(_encode(reply))
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """Fake Redis with the commands used by the fast backup, keys are kept in ``data``.
+
+    MULTI and EXEC run the queued commands of a connection together, under the lock.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.data = {}
+        self.commands = []
+        self.lock = threading.RLock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def command(self, args: list):
+        name, args = args[0].decode().upper(), args[1:]
+        with self.lock:
+            self.commands.append(name)
+            if name == "PING":
+                return "PONG"
+            if name == "MSET":
+                self.data.update(zip(args[::2], args[1::2]))
+                return "OK"
+            if name == "MGET":
+                return [self.data.get(key) for key in args]
+            if name == "DEL":
+                return sum(self.data.pop(key, None) is not None for key in args)
+            if name == "SCAN":
+                pattern = args[args.index(b"MATCH") + 1].decode()
+                keys = [
+                    key
+                    for key in self.data
+                    if fnmatch.fnmatchcase(key.decode(), pattern)
+                ]
+                return [b"0", keys]
+            return _Error(f"ERR unknown command '{name}'")
+
+    def close(self) -> None:
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,187 @@
+"""Minimal fake ROS master and publisher node, used to test the ROS network tools without ROS."""
+import socket
+import struct
+import threading
+import time
+from xmlrpc.server import SimpleXMLRPCServer
+
+
+class _Server(SimpleXMLRPCServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), logRequests=False, allow_none=True)
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def uri(self) -> str:
+        return "http://127.0.0.1:%d/" % self.server_address[1]
+
+    def close(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class FakePublisher(_Server):
+    """Fake publisher node with an XML-RPC API and a TCPROS server.
+
+    Args:
+        name: Node name.
+        topics: Dictionary of topic name to type.
+        tcpros_host: Host advertised for TCPROS, defaults to the listening address.
+
+    """
+
+    def __init__(self, name: str, topics: dict, tcpros_host: str = None) -> None:
+        super().__init__()
+        self.name = name
+        self.topics = topics
+        self.tcpros = socket.socket()
+        self.tcpros.bind(("127.0.0.1", 0))
+        self.tcpros.listen(16)
+        self.tcpros_host = tcpros_host or "127.0.0.1"
+        self.connections = []
+        self.register_function(lambda caller: [1, "", 1234], "getPid")
+        self.register_function(self.request_topic, "requestTopic")
+        self.accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self.accept_thread.start()
+
+    @property
+    def tcpros_port(self) -> int:
+        return self.tcpros.getsockname()[1]
+
+    def request_topic(self, caller, topic, protocols):
+        if topic not in self.topics:
+            return [-1, "unknown topic", []]
+        return [1, "", ["TCPROS", self.tcpros_host, self.tcpros_port]]
+
+    def on_connection(self, connection: socket.socket) -> None:
+        """Called for every TCPROS connection, closes it by default."""
+        connection.close()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                connection, _ = self.tcpros.accept()
+            except OSError:
+                return
+            self.connections.append(connection)
+            threading.Thread(
+                target=self.on_connection, args=(connection,), daemon=True
+            ).start()
+
+    def close(self) -> None:
+        super().close()
+        self.tcpros.close()
+
+
+def _read_exact(connection: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise OSError("connection closed")
+        data += chunk
+    return data
+
+
+def _encode_header(fields: dict) -> bytes:
+    data = b"".join(
+        struct.pack("<I", len(field)) + field
+        for field in (f"{key}={value}".encode() for key, value in fields.items())
+    )
+    return struct.pack("<I", len(data)) + data
+
+
+class StreamingPublisher(FakePublisher):
+    """Fake publisher answering the TCPROS handshake and streaming messages.
+
+    Args:
+        name: Node name.
+        streams: Dictionary of topic name to (rate in Hz, message size in bytes).
+
+    Attributes:
+        headers (list): Subscriber headers received, as bytes.
+
+    """
+
+    def __init__(self, name: str, streams: dict) -> None:
+        super().__init__(name, {topic: "std_msgs/String" for topic in streams})
+        self.streams = streams
+        self.headers = []
+
+    def on_connection(self, connection: socket.socket) -> None:
+        try:
+            (length,) = struct.unpack("<I", _read_exact(connection, 4))
+            header = _read_exact(connection, length)
+            self.headers.append(header)
+            topic = next(
+                (t for t in self.streams if b"topic=" + t.encode() in header), None
+            )
+            if topic is None:
+                connection.sendall(_encode_header({"error": "unknown topic"}))
+                return
+            connection.sendall(
+                _encode_header({"callerid": self.name, "topic": topic, "md5sum": "*"})
+            )
+            rate, size = self.streams[topic]
+            message = struct.pack("<I", size) + bytes(size)
+            start = time.monotonic()
+            for index in range(1_000_000):
+                delay = start + index / rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                connection.sendall(message)
+        except OSError:
+            pass
+        finally:
+            connection.close()
+
+
+class FakeMaster(_Server):
+    """Fake ROS master knowing a set of publishers.
+
+    Args:
+        publishers: List of FakePublisher.
+        node_uris: Optional dictionary of node name to advertised URI, defaults to the publisher URI.
+
+    """
+
+    def __init__(self, publishers: list, node_uris: dict = None) -> None:
+        super().__init__()
+        self.publishers = {publisher.name: publisher for publisher in publishers}
+        self.node_uris = node_uris or {}
+        self.register_function(lambda caller: [1, "", 4321], "getPid")
+        self.register_function(lambda caller: [1, "", self.uri], "getUri")
+        self.register_function(self.get_system_state, "getSystemState")
+        self.register_function(self.get_topic_types, "getTopicTypes")
+        self.register_function(self.lookup_node, "lookupNode")
+        self.register_function(self.register_subscriber, "registerSubscriber")
+
+    def node_uri(self, name: str) -> str:
+        return self.node_uris.get(name, self.publishers[name].uri)
+
+    def get_system_state(self, caller):
+        topics = {}
+        for publisher in self.publishers.values():
+            for topic in publisher.topics:
+                topics.setdefault(topic, []).append(publisher.name)
+        return [1, "", [[[t, n] for t, n in topics.items()], [], []]]
+
+    def get_topic_types(self, caller):
+        types = {}
+        for publisher in self.publishers.values():
+            types.update(publisher.topics)
+        return [1, "", [[t, ty] for t, ty in types.items()]]
+
+    def lookup_node(self, caller, name):
+        if name not in self.publishers:
+            return [-1, "unknown node", ""]
+        return [1, "", self.node_uri(name)]
+
+    def register_subscriber(self, caller, topic, topic_type, caller_api):
+        uris = [
+            self.node_uri(publisher.name)
+            for publisher in self.publishers.values()
+            if topic in publisher.topics
+        ]
+        return [1, "", uris]
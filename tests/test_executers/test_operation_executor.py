@@ -1,7 +1,11 @@
 import unittest
+from argparse import Namespace
+from unittest import mock
 from movai_developer_tools.movros.expose_network.operation_executer import (
     ExposeNetwork,
 )
+from movai_developer_tools.movcontainer.spawner.operation_executer import Spawner
+from tests.fake_docker import FakeDockerDaemon, make_container
 
 
 class TestOperationExecutor(unittest.TestCase):
@@ -16,3 +20,19 @@ class TestOperationExecutor(unittest.TestCase):
         with self.assertRaises(SystemExit) as se:
             ExposeNetwork().execute()
         self.assertEqual(se.exception.code, 1)
+
+    def test_sub_command_errors(self):
+        """Test errors raised by a sub-command are not reported as an invalid sub-command."""
+        daemon = FakeDockerDaemon([make_container("spawner-test", "10.0.0.2")])
+        self.addCleanup(daemon.close)
+        with mock.patch(
+            "movai_developer_tools.movcontainer.spawner.operation_executer.run_stats",
+            side_effect=KeyError("cpu_stats"),
+        ):
+            with self.assertRaises(KeyError):
+                Spawner().execute(
+                    Namespace(sub_command="stats", docker_host=daemon.url)
+                )
+        with self.assertRaises(SystemExit) as se:
+            Spawner().execute(Namespace(sub_command="nope", docker_host=daemon.url))
+        self.assertEqual(se.exception.code, 1)
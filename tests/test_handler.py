@@ -1,10 +1,27 @@
 import unittest
 import mock
+from movai_developer_tools.movbkp.handler import handle as movbkp_handle
 from movai_developer_tools.movros.handler import handle as movros_handle
 import argparse
 
-
 movros_handle_bad_argument = argparse.Namespace(command="does-not-exist")
+movbkp_handle_unused_objects = argparse.Namespace(
+    command="restore", objects=["Flow:my_flow"], hosts=None, all_matching=False
+)
+
+movbkp_handle_fleet_export = argparse.Namespace(
+    command="export", objects=[], hosts=None, all_matching=True
+)
+
+movbkp_handle_ignored_options = [
+    argparse.Namespace(command="remove", objects=[], fast=True),
+    argparse.Namespace(command="re-install", objects=[], fast=True),
+    argparse.Namespace(command="import", objects=[], fast=True, report="r.json"),
+    argparse.Namespace(command="export", objects=[], diff=True, shard="1/2"),
+    argparse.Namespace(command="export", objects=[], fast=True, diff=True),
+    argparse.Namespace(command="import", objects=[], bulk=True),
+    argparse.Namespace(command="remove", objects=[], bulk=True, stats="s.csv"),
+]
 
 
 class TestHandler(unittest.TestCase):
@@ -31,3 +48,79 @@ class TestHandler(unittest.TestCase):
             movros_handle()
         self.assertEqual(se.exception.code, 1)
         mock_run_executor.assert_not_called()
+
+    @mock.patch(
+        "movai_developer_tools.movbkp.restore_metadata.operation_executer.Restorer.execute"
+    )
+    @mock.patch(
+        "argparse.ArgumentParser.parse_args",
+        return_value=movbkp_handle_unused_objects,
+    )
+    def test_movbkp_handler_unused_objects(
+        self, mock_argparse: argparse.Namespace, mock_run_executor
+    ) -> None:
+        """Test objects given to a movbkp command that does not use them.
+
+        Args:
+            mock_argparse: Mock argparse with objects for restore.
+            mock_run_executor: Mock the execute function inside the handler.
+
+        """
+        with self.assertRaises(SystemExit) as se:
+            movbkp_handle()
+        self.assertEqual(se.exception.code, 1)
+        mock_run_executor.assert_not_called()
+
+    @mock.patch("movai_developer_tools.movbkp.handler.execute_on_fleet")
+    @mock.patch(
+        "argparse.ArgumentParser.parse_args",
+        return_value=movbkp_handle_fleet_export,
+    )
+    def test_movbkp_handler_fleet_export(
+        self, mock_argparse: argparse.Namespace, mock_fleet
+    ) -> None:
+        """Test export is rejected on several stacks, as they would write the same files.
+
+        Args:
+            mock_argparse: Mock argparse with export and --all-matching.
+            mock_fleet: Mock the fleet execution inside the handler.
+
+        """
+        with self.assertRaises(SystemExit) as se:
+            movbkp_handle()
+        self.assertEqual(se.exception.code, 1)
+        mock_fleet.assert_not_called()
+
+    @mock.patch("movai_developer_tools.movbkp.handler.Remover.execute")
+    @mock.patch("movai_developer_tools.movbkp.handler.Exporter.execute")
+    @mock.patch("movai_developer_tools.movbkp.handler.Importer.execute")
+    @mock.patch("movai_developer_tools.movbkp.handler.ReInstaller.execute")
+    @mock.patch("argparse.ArgumentParser.parse_args")
+    def test_movbkp_handler_ignored_options(self, mock_argparse, *mock_executors):
+        """Test --fast, --diff and --bulk are rejected where they or other options would be ignored.
+
+        Args:
+            mock_argparse: Mock argparse, returning every rejected combination.
+            mock_executors: Mock the execute functions inside the handler.
+
+        """
+        for args in movbkp_handle_ignored_options:
+            mock_argparse.return_value = argparse.Namespace(
+                hosts=None, all_matching=False, **vars(args)
+            )
+            with self.assertRaises(SystemExit) as se:
+                movbkp_handle()
+            self.assertEqual(se.exception.code, 1, args)
+        for mock_run_executor in mock_executors:
+            mock_run_executor.assert_not_called()
+        # --bulk writes the --report
+        mock_argparse.return_value = argparse.Namespace(
+            command="remove",
+            objects=[],
+            bulk=True,
+            report="r.json",
+            hosts=None,
+            all_matching=False,
+        )
+        movbkp_handle()
+        mock_executors[3].assert_called_once()
@@ -0,0 +1,274 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from movai_developer_tools.utils.backup_helper import BackupHelper
+from movai_developer_tools.utils.fast_backup import flatten
+from movai_developer_tools.utils.redis_client import RedisClient
+from movai_developer_tools.utils.snapshot_store import SnapshotStore
+from tests.fake_docker import LocalContainer, local_container_tools
+from tests.fake_redis import FakeRedis
+
+
+class BackupHelperTestCase(unittest.TestCase):
+    """Run the backup helper against a local spawner and the fake backup tool."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.userspace = os.path.join(self.tmp.name, "userspace")
+        self.platform = os.path.join(self.tmp.name, "platform")
+        os.makedirs(self.platform)
+        self.container = LocalContainer(
+            binds=[f"{self.userspace}:{self.userspace}"], platform_dir=self.platform
+        )
+        tools = local_container_tools(self.container, self.userspace)
+        with mock.patch(
+            "movai_developer_tools.utils.backup_helper.ContainerTools",
+            return_value=tools,
+        ):
+            self.helper = BackupHelper(userspace_bind_dir=self.userspace)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, content, root=None):
+        path = os.path.join(root or self.userspace, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
+
+    def write_platform(self, type_name, name, content=None):
+        self.write(
+            os.path.join(type_name, f"{name}.json"),
+            content or f'{{"{type_name}": {{"{name}": {{}}}}}}',
+            self.platform,
+        )
+
+    def runs(self):
+        try:
+            with open(os.path.join(self.platform, "runs.log")) as file:
+                return file.read().splitlines()
+        except FileNotFoundError:
+            return []
+
+
+class TestBulkRemove(BackupHelperTestCase):
+    """Test the removal of all the manifests with a single backup tool execution."""
+
+    def setUp(self):
+        super().setUp()
+        self.write("a/manifest.txt", "Flow:shared\nNode:a\n")
+        self.write("b/manifest.txt", "Node:b\nFlow:shared\n")
+        for type_name, name in (("Flow", "shared"), ("Node", "a"), ("Node", "b")):
+            self.write_platform(type_name, name)
+        self.write_platform("Node", "kept")
+
+    def test_merged_single_exec(self):
+        """The entries of every manifest are merged once and removed by one execution."""
+        self.helper.bulk_remove_action(self.userspace)
+        runs = self.runs()
+        self.assertEqual(len(runs), 1)
+        self.assertTrue(runs[0].startswith("remove /tmp/movbkp-remove-"))
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.platform, "Node"))), ["kept.json"]
+        )
+        self.assertEqual(os.listdir(os.path.join(self.platform, "Flow")), [])
+        backup_execs = [cmd for cmd in self.container.execs if "tools.backup" in cmd]
+        self.assertEqual(len(backup_execs), 1)
+        # The staging directory holding the merged manifest is removed
+        self.assertFalse(os.path.exists(runs[0].split()[1]))
+
+    def test_dry_run(self):
+        """A dry run prints the merged entries without executing anything."""
+        self.helper.dry_run = True
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.helper.bulk_remove_action(self.userspace)
+        entries = output.getvalue().splitlines()
+        self.assertEqual(sorted(entries), ["Flow:shared", "Node:a", "Node:b"])
+        self.assertEqual(self.runs(), [])
+        self.assertEqual(self.container.execs, [])
+
+    def test_failure_exits(self):
+        """A failed removal exits with an error."""
+        os.remove(os.path.join(self.platform, "Node", "b.json"))
+        with self.assertRaises(SystemExit) as raised:
+            self.helper.bulk_remove_action(self.userspace)
+        self.assertEqual(raised.exception.code, 1)
+
+
+class TestRemoteUserspace(BackupHelperTestCase):
+    """Test the commands reading the manifests in the host against a remote spawner."""
+
+    def test_userspace_not_in_host(self):
+        """The manifests are not searched when the userspace of the spawner is not in this host."""
+        self.helper.docker_host = "tcp://robot-1:2375"
+        # Nothing was written, the userspace of the spawner does not exist here
+        with self.assertRaises(SystemExit) as raised:
+            self.helper.bulk_remove_action(self.userspace)
+        self.assertEqual(raised.exception.code, 1)
+        self.assertEqual(self.container.execs, [])
+
+
+class TestSnapshot(BackupHelperTestCase):
+    """Test the snapshot of the platform metadata and its restore."""
+
+    def setUp(self):
+        super().setUp()
+        self.write("a/manifest.txt", "Flow:*\n")
+        self.write("b/manifest.txt", "Node:b\n")
+        self.write_platform("Flow", "one", '{"Flow": {"one": {"Label": "1"}}}')
+        self.write_platform("Flow", "two", '{"Flow": {"two": {"Label": "2"}}}')
+        self.write_platform("Node", "b")
+        self.store = SnapshotStore(os.path.join(self.tmp.name, "store"))
+
+    def read_platform(self, type_name, name):
+        with open(os.path.join(self.platform, type_name, f"{name}.json")) as file:
+            return file.read()
+
+    def test_snapshot_restore(self):
+        """A restore imports the objects as they were when the snapshot was taken."""
+        self.helper.snapshot_action(self.userspace, "first", self.store)
+        snapshot = self.store.load_snapshot("first")
+        self.assertEqual(
+            {entry["path"]: sorted(entry["files"]) for entry in snapshot["manifests"]},
+            {
+                "a/manifest.txt": ["Flow/one.json", "Flow/two.json"],
+                "b/manifest.txt": ["Node/b.json"],
+            },
+        )
+        self.write_platform("Flow", "one", '{"Flow": {"one": {"Label": "changed"}}}')
+        os.remove(os.path.join(self.platform, "Node", "b.json"))
+        self.helper.restore_action("first", self.store)
+        self.assertIn('"1"', self.read_platform("Flow", "one"))
+        self.assertTrue(os.path.exists(os.path.join(self.platform, "Node", "b.json")))
+        # One exec exported every manifest and one imported them back
+        self.assertEqual(
+            [
+                cmd.count("tools.backup")
+                for cmd in self.container.execs
+                if "tools.backup" in cmd
+            ],
+            [2, 2],
+        )
+
+    def test_incremental(self):
+        """Only the changed objects are stored by the next snapshot."""
+        self.helper.snapshot_action(self.userspace, "first", self.store)
+        objects = set(self.store.objects_dir.rglob("*"))
+        self.write_platform("Flow", "two", '{"Flow": {"two": {"Label": "3"}}}')
+        self.helper.snapshot_action(self.userspace, "second", self.store)
+        added = [
+            path
+            for path in self.store.objects_dir.rglob("*")
+            if path not in objects and path.is_file()
+        ]
+        self.assertEqual(len(added), 1)
+
+    def test_failed_export(self):
+        """No snapshot is saved if an export fails."""
+        os.remove(os.path.join(self.platform, "Node", "b.json"))
+        with self.assertRaises(SystemExit):
+            self.helper.snapshot_action(self.userspace, "first", self.store)
+        self.assertEqual(self.store.list_snapshots(), [])
+
+    def test_noisy_shell(self):
+        """Output of the shell startup files is not taken for exit codes."""
+        bash_env = os.path.join(self.tmp.name, "bash_env")
+        with open(bash_env, "w") as file:
+            file.write("echo 'Welcome 2'; echo 3 >&2\n")
+        self.helper.backup_env["BASH_ENV"] = bash_env
+        staging_dir = self.helper.make_staging_dir("test")
+        self.addCleanup(shutil.rmtree, staging_dir)
+        exit_codes = self.helper.run_staged_backup(
+            "export",
+            staging_dir,
+            [os.path.join(self.userspace, "a", "manifest.txt")],
+        )
+        self.assertEqual(exit_codes, [0])
+
+
+class TestStatus(BackupHelperTestCase):
+    """Test the comparison of the userspace and the platform."""
+
+    def setUp(self):
+        super().setUp()
+        self.write("a/manifest.txt", "Flow:*\n")
+        self.write("a/metadata/Flow/same.json", '{"Flow": {"same": {"a": 1}}}')
+        self.write("a/metadata/Flow/changed.json", '{"Flow": {"changed": {}}}')
+        self.write("b/manifest.txt", "Node:b\n")
+        self.write("b/metadata/Node/b.json", '{"Node": {"b": {}}}')
+        self.write_platform("Flow", "same", '{"Flow":{"same":{"a":1}}}')
+        self.write_platform("Flow", "changed", '{"Flow": {"changed": {"a": 2}}}')
+        self.write_platform("Node", "b", '{"Node": {"b": {}}}')
+
+    def test_status(self):
+        """Equivalent JSON is in sync, different content is modified."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            statuses = self.helper.status_action(self.userspace)
+        self.assertEqual(
+            sorted((status.key, status.status) for status in statuses),
+            [
+                ("Flow/changed", "modified"),
+                ("Flow/same", "in-sync"),
+                ("Node/b", "in-sync"),
+            ],
+        )
+
+    def test_failed_export(self):
+        """A manifest whose export failed is reported as such, not as missing on the platform."""
+        os.remove(os.path.join(self.platform, "Node", "b.json"))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), self.assertRaises(SystemExit):
+            self.helper.status_action(self.userspace)
+        self.assertIn("export-failed", output.getvalue())
+        self.assertNotIn("missing-on-platform", output.getvalue())
+
+
+class TestFastBackup(BackupHelperTestCase):
+    """Test the direct Redis import and export, and the check of the key layout before it."""
+
+    def setUp(self):
+        super().setUp()
+        self.redis = FakeRedis()
+        self.addCleanup(self.redis.close)
+        self.container.environment["FAKE_REDIS_PORT"] = str(self.redis.port)
+        self.helper.redis_client = lambda: RedisClient("127.0.0.1", self.redis.port)
+        self.write("a/manifest.txt", "Node:*\n")
+        for name in ("talker", "timer"):
+            self.write(
+                f"a/metadata/Node/{name}.json",
+                f'{{"Node": {{"{name}": {{"Label": "{name}", "Path": ""}}}}}}',
+            )
+
+    def test_import(self):
+        """The backup tool imports one object to check the layout, the rest is written in a transaction."""
+        self.helper.fast_action("import", self.userspace, verify=False)
+        self.assertEqual(self.redis.data[b"Node:timer,Label:"], b'"timer"')
+        self.assertEqual(self.redis.commands.count("MULTI"), 1)
+        backup_execs = [cmd for cmd in self.container.execs if "tools.backup" in cmd]
+        self.assertEqual(len(backup_execs), 1)
+
+    def test_layout_mismatch(self):
+        """Nothing is written when the backup tool stores objects with other keys."""
+        self.container.environment["FAKE_REDIS_LAYOUT"] = "raw"
+        with self.assertRaises(SystemExit):
+            self.helper.fast_action("import", self.userspace, verify=False)
+        self.assertNotIn("MULTI", self.redis.commands)
+        # Only the object imported by the backup tool itself is in Redis
+        self.assertEqual(
+            {key.split(b",")[0] for key in self.redis.data}, {b"Node:talker"}
+        )
+
+    def test_export(self):
+        """The export is checked with the backup tool before the files are written."""
+        for name, label in (("talker", "renamed"), ("timer", "timer")):
+            data = {"Label": label, "Path": ""}
+            for key, value in flatten("Node", name, data).items():
+                self.redis.data[key.encode()] = value.encode()
+        self.helper.fast_action("export", self.userspace, verify=False)
+        with open(os.path.join(self.userspace, "a/metadata/Node/talker.json")) as file:
+            self.assertIn("renamed", file.read())
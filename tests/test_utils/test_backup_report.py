@@ -0,0 +1,71 @@
+import unittest
+from movai_developer_tools.utils.backup_report import (
+    ManifestOutcome,
+    RunReport,
+    parse_backup_output,
+)
+
+stdout = b"""Importing Flow:my_flow
+Importing Node:my_node
+Node:old_node already exists, skipping
+Importing Callback:broken
+"""
+stderr = b"""Error importing Callback:broken: invalid syntax
+"""
+
+
+class TestBackupReport(unittest.TestCase):
+    """Test parsing of the backup tool output."""
+
+    def test_parse_backup_output(self):
+        """Each object gets a single outcome and failures are kept."""
+        outcomes = {
+            f"{obj.type}:{obj.name}": obj
+            for obj in parse_backup_output("import", stdout, stderr)
+        }
+        self.assertEqual(outcomes["Flow:my_flow"].status, "imported")
+        self.assertEqual(outcomes["Node:old_node"].status, "skipped")
+        self.assertEqual(outcomes["Callback:broken"].status, "failed")
+        self.assertIn("invalid syntax", outcomes["Callback:broken"].reason)
+
+    def test_classification(self):
+        """Counters and object names do not make a line a failure or a skip."""
+        output = b"""Imported Node:invalid_node
+Flow:exists_check imported, 0 errors
+Exported Flow:error_flow (no failures)
+ERROR: Node:broken_node could not be imported
+Flow:bad_flow: KeyError: 'NodeInst'
+Failed to import Callback:cb_failed
+Could not read Callback:cb_missing
+Skipping Node:same_node, unchanged
+Node:copy already exists
+"""
+        statuses = {
+            f"{obj.type}:{obj.name}": obj.status
+            for obj in parse_backup_output("import", output, b"")
+        }
+        self.assertEqual(
+            statuses,
+            {
+                "Node:invalid_node": "imported",
+                "Flow:exists_check": "imported",
+                "Flow:error_flow": "imported",
+                "Node:broken_node": "failed",
+                "Flow:bad_flow": "failed",
+                "Callback:cb_failed": "failed",
+                "Callback:cb_missing": "failed",
+                "Node:same_node": "skipped",
+                "Node:copy": "skipped",
+            },
+        )
+
+    def test_run_report(self):
+        """The report aggregates objects and failed manifests."""
+        report = RunReport("import")
+        report.add(ManifestOutcome("/a/manifest.txt", "import", 0, stdout, stderr))
+        report.add(ManifestOutcome("/b/manifest.txt", "import", 1, None, b"boom"))
+        summary = report.to_dict()["summary"]
+        self.assertTrue(report.failed)
+        self.assertEqual(summary["imported"], 2)
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(summary["failed_manifests"], 2)
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from movai_developer_tools.movcontainer import handler as movcontainer_handler
+from movai_developer_tools.utils.completion import (
+    completion_script,
+    manifest_dirs,
+    tool_spec,
+)
+
+
+class TestCompletion(unittest.TestCase):
+    """Test the generated completion script in bash."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        spec = tool_spec(
+            "movcontainer",
+            movcontainer_handler.make_parser(),
+            [movcontainer_handler.executors, movcontainer_handler.sub_commands],
+        )
+        self.script = os.path.join(self.tmp.name, "completion.bash")
+        with open(self.script, "w") as file:
+            file.write(completion_script([spec]))
+        cache = os.path.join(self.tmp.name, "movai-developer-tools", "completion")
+        os.makedirs(cache)
+        with open(os.path.join(cache, "projects"), "w") as file:
+            file.write("robot-a\nrobot-b\nother")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def complete(self, line):
+        """Return the candidates offered for the last word of a command line."""
+        words = line.split(" ")
+        script = (
+            f"source {self.script}; COMP_WORDS=({' '.join(repr(w) for w in words)}); "
+            f"COMP_CWORD={len(words) - 1}; _movai_movcontainer; printf '%s\\n' \"${{COMPREPLY[@]}}\""
+        )
+        env = dict(os.environ, XDG_CACHE_HOME=self.tmp.name)
+        output = subprocess.check_output(["bash", "-c", script], env=env)
+        return sorted(filter(None, output.decode().split("\n")))
+
+    def test_completion(self):
+        """Positionals, options, choices and cached candidates are completed without python."""
+        self.assertEqual(self.complete("movcontainer s"), ["spawner"])
+        self.assertEqual(self.complete("movcontainer spawner u"), ["userspace-dir"])
+        self.assertEqual(self.complete("movcontainer ros-master r"), ["restart"])
+        self.assertEqual(self.complete("movcontainer --jobs 2 spawner st"), ["stats"])
+        self.assertIn("--stats-format", self.complete("movcontainer spawner --st"))
+        self.assertEqual(
+            self.complete("movcontainer spawner stats --stats-format "), ["bin", "csv"]
+        )
+        self.assertEqual(
+            self.complete("movcontainer spawner ip --project rob"),
+            ["robot-a", "robot-b"],
+        )
+
+    def test_manifest_dirs(self):
+        """Directories with manifests below them are --dir candidates."""
+        for path in ("pkg/a/manifest.txt", "pkg/b/manifest.txt", ".git/manifest.txt"):
+            path = os.path.join(self.tmp.name, "user", path)
+            os.makedirs(os.path.dirname(path))
+            open(path, "w").close()
+        os.makedirs(os.path.join(self.tmp.name, "user", "empty"))
+        root = os.path.join(self.tmp.name, "user")
+        self.assertEqual(
+            manifest_dirs(root),
+            {
+                root,
+                os.path.join(root, "pkg"),
+                os.path.join(root, "pkg", "a"),
+                os.path.join(root, "pkg", "b"),
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from movai_developer_tools.utils.container_tools import ContainerTools
+from tests.fake_docker import FakeDockerDaemon, make_container
+
+
+def stack_container(project: str, service: str, ip: str) -> dict:
+    """Return a fake container of a compose stack."""
+    return make_container(
+        f"{service}-{project}",
+        ip,
+        labels={
+            "com.docker.compose.project": project,
+            "com.docker.compose.service": service,
+        },
+    )
+
+
+class TestContainerTools(unittest.TestCase):
+    """Test container resolution."""
+
+    def setUp(self):
+        self.daemon = FakeDockerDaemon(
+            [
+                stack_container("stack-a", "spawner", "10.0.0.2"),
+                stack_container("stack-a", "ros-master", "10.0.0.3"),
+                stack_container("stack-b", "spawner", "10.0.1.2"),
+                stack_container("stack-b", "ros-master", "10.0.1.3"),
+            ]
+        )
+
+    def tearDown(self):
+        self.daemon.close()
+
+    def inspected(self) -> list:
+        """Return the containers inspected by the client."""
+        return [
+            path
+            for path in self.daemon.requests
+            if path.endswith("/json") and "/containers/json" not in path
+        ]
+
+    def test_ambiguous_name(self):
+        """Several containers matching the regex are reported, not guessed."""
+        with self.assertRaises(SystemExit) as se:
+            ContainerTools("^spawner-.*", docker_host=self.daemon.url)
+        self.assertEqual(se.exception.code, 1)
+        self.assertEqual(self.inspected(), [])
+
+    def test_project(self):
+        """Compose labels select a single container which is the only one inspected."""
+        container = ContainerTools(
+            "^ros-master-.*",
+            docker_host=self.daemon.url,
+            project="stack-b",
+            service="ros-master",
+        )
+        self.assertEqual(container.ip(), "10.0.1.3")
+        self.assertEqual(len(self.inspected()), 1)
+
+    def test_project_without_service(self):
+        """Without a service the regex narrows down the project containers."""
+        container = ContainerTools(
+            "^spawner-.*", docker_host=self.daemon.url, project="stack-a"
+        )
+        self.assertEqual(container.name(), "spawner-stack-a")
+
+    def test_address(self):
+        """Published ports are reached through the docker host, others at the container IP locally."""
+        redis = stack_container("stack-a", "redis-master", "10.0.0.4")
+        redis["NetworkSettings"]["Ports"] = {
+            "6379/tcp": [{"HostIp": "0.0.0.0", "HostPort": "16379"}],
+            "8080/tcp": None,
+        }
+        self.daemon.containers.append(redis)
+        container = ContainerTools("^redis-master-.*", docker_host=self.daemon.url)
+        self.assertEqual(container.address(6379), ("127.0.0.1", 16379))
+        self.assertEqual(container.address(8080), ("10.0.0.4", 8080))
+        container.docker_host = "tcp://robot-1:2375"
+        self.assertEqual(container.address(6379), ("robot-1", 16379))
+        with self.assertRaises(ValueError):
+            container.address(8080)
+
+    def test_container_id(self):
+        """A pinned ID takes precedence over the regex."""
+        container_id = self.daemon.containers[2]["Id"][:12]
+        container = ContainerTools(
+            "^ros-master-.*", docker_host=self.daemon.url, container_id=container_id
+        )
+        self.assertEqual(container.ip(), "10.0.1.2")
@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+import unittest
+from movai_developer_tools.utils.container_wait import (
+    WaitError,
+    WaitTimeout,
+    ready_condition,
+    wait_until,
+)
+
+_CLOSED = object()
+
+
+class FakeStream:
+    """Blocking stream of items, closed like a docker CancellableStream."""
+
+    def __init__(self):
+        self.items = queue.Queue()
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = self.items.get()
+        if item is _CLOSED:
+            raise StopIteration
+        return item
+
+    def close(self):
+        self.closed = True
+        self.items.put(_CLOSED)
+
+
+class FakeContainer:
+    """Container whose state changes are pushed as events to the open event streams."""
+
+    def __init__(self, state):
+        self.id = "abc"
+        self.name = "spawner-test"
+        self.state = state
+        self.attrs = {"State": dict(state), "Config": {}}
+        self.reloads = 0
+        self.event_streams = []
+        self.log_streams = []
+        self.client = self
+
+    def events(self, decode, filters):
+        self.event_streams.append(FakeStream())
+        return self.event_streams[-1]
+
+    def logs(self, stream, follow, since):
+        self.since = since
+        self.log_streams.append(FakeStream())
+        return self.log_streams[-1]
+
+    def reload(self):
+        self.reloads += 1
+        self.attrs["State"] = dict(self.state)
+
+    def change(self, status, **state):
+        self.state.update(state)
+        for stream in self.event_streams:
+            stream.items.put({"status": status})
+
+
+def later(delay, function, *args, **kwargs):
+    threading.Timer(delay, function, args, kwargs).start()
+
+
+class TestContainerWait(unittest.TestCase):
+    """Test the waits are woken up by the events and logs, and time out."""
+
+    def test_already_running(self):
+        """A running container does not wait, and the event stream is closed."""
+        container = FakeContainer({"Running": True})
+        self.assertLess(wait_until(container, timeout=5), 1)
+        self.assertTrue(container.event_streams[0].closed)
+
+    def test_wakes_up_on_event(self):
+        """The wait returns on the event that makes the condition hold, not after a poll period."""
+        container = FakeContainer({"Running": False})
+        later(0.2, container.change, "start", Running=True)
+        seconds = wait_until(container, timeout=5)
+        self.assertGreaterEqual(seconds, 0.2)
+        self.assertLess(seconds, 1)
+        # Inspected once before the events, then once per event
+        self.assertEqual(container.reloads, 2)
+
+    def test_healthy(self):
+        container = FakeContainer({"Running": True, "Health": {"Status": "starting"}})
+        later(
+            0.1,
+            container.change,
+            "health_status: healthy",
+            Health={"Status": "healthy"},
+        )
+        self.assertLess(wait_until(container, "healthy", timeout=5), 1)
+        with self.assertRaises(WaitError):
+            wait_until(FakeContainer({"Running": True}), "healthy", timeout=1)
+
+    def test_timeout(self):
+        container = FakeContainer({"Running": False})
+        start = time.monotonic()
+        with self.assertRaises(WaitTimeout):
+            wait_until(container, timeout=0.3)
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_log_match(self):
+        """Lines split across chunks are matched."""
+        container = FakeContainer({"Running": True})
+
+        def log():
+            container.log_streams[0].items.put(b"starting\nmovai ser")
+            container.log_streams[0].items.put(b"ver ready\n")
+
+        later(0.1, log)
+        self.assertLess(wait_until(container, "log", "server ready", timeout=5), 1)
+        with self.assertRaises(WaitTimeout):
+            wait_until(container, "log", "never", timeout=0.3)
+
+    def test_log_since_start(self):
+        """Without since, the logs are matched from the current start of the container."""
+        container = FakeContainer(
+            {"Running": True, "StartedAt": "2024-05-02T10:11:12.123456789Z"}
+        )
+        with self.assertRaises(WaitTimeout):
+            wait_until(container, "log", "ready", timeout=0.2)
+        self.assertEqual(container.since, 1714644672)
+        with self.assertRaises(WaitTimeout):
+            wait_until(container, "log", "ready", timeout=0.2, since=1714644700)
+        self.assertEqual(container.since, 1714644700)
+
+    def test_ready_condition(self):
+        container = FakeContainer({})
+        self.assertEqual(ready_condition(container), "running")
+        container.attrs["Config"]["Healthcheck"] = {"Test": ["CMD", "true"]}
+        self.assertEqual(ready_condition(container), "healthy")
@@ -0,0 +1,113 @@
+import struct
+import subprocess
+import sys
+import threading
+import unittest
+from socket import SHUT_WR, socketpair
+from unittest import mock
+from docker.models.containers import ExecResult
+from movai_developer_tools.utils.backup_helper import BackupHelper
+from movai_developer_tools.utils.exec_session import ExecSession, ExecSessionError
+from tests.fake_docker import local_container_tools
+
+
+class LocalExecContainer:
+    """Container whose exec socket runs the command locally, multiplexed like the docker daemon does."""
+
+    def __init__(self):
+        self.execs = 0
+        self.client = None
+        self.attrs = {"HostConfig": {"Binds": ["/tmp:/opt/mov.ai/user"]}}
+
+    def exec_run(self, cmd, user, stdin, socket):
+        self.execs += 1
+        ours, theirs = socketpair()
+        process = subprocess.Popen(
+            [sys.executable] + cmd[1:],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+        def forward_stdin():
+            while True:
+                data = theirs.recv(65536)
+                if not data:
+                    break
+                process.stdin.write(data)
+                process.stdin.flush()
+            process.stdin.close()
+
+        def forward_output(stream_type, pipe):
+            for data in iter(lambda: pipe.read1(65536), b""):
+                theirs.sendall(struct.pack(">BxxxL", stream_type, len(data)) + data)
+
+        threads = [
+            threading.Thread(target=forward_stdin, daemon=True),
+            threading.Thread(target=forward_output, args=(1, process.stdout)),
+            threading.Thread(target=forward_output, args=(2, process.stderr)),
+        ]
+        for thread in threads:
+            thread.start()
+
+        def close_when_done():
+            for thread in threads[1:]:
+                thread.join()
+            theirs.shutdown(SHUT_WR)
+
+        threading.Thread(target=close_when_done, daemon=True).start()
+        self.process = process
+        return ExecResult(None, ours)
+
+
+class TestExecSession(unittest.TestCase):
+    """Test the persistent exec session against a local worker."""
+
+    def test_many_commands_one_exec(self):
+        """Commands keep their exit code and separate outputs, with a single exec."""
+        container = LocalExecContainer()
+        with ExecSession(container) as session:
+            for i in range(20):
+                self.assertEqual(session.run(f"echo {i}"), (0, f"{i}\n".encode(), b""))
+            self.assertEqual(
+                session.run("echo out; echo err >&2; exit 3"), (3, b"out\n", b"err\n")
+            )
+            self.assertEqual(
+                session.run("echo $NAME", ["NAME=spawner"])[1], b"spawner\n"
+            )
+            # Outputs larger than a single docker frame
+            self.assertEqual(len(session.run("head -c 300000 /dev/zero")[1]), 300000)
+        self.assertEqual(container.execs, 1)
+        self.assertEqual(container.process.wait(5), 0)
+        with self.assertRaises(ExecSessionError):
+            session.run("true")
+
+    def test_worker_exit(self):
+        """A worker that dies raises an error instead of hanging."""
+        container = LocalExecContainer()
+        session = ExecSession(container)
+        container.process.kill()
+        with self.assertRaises(ExecSessionError):
+            session.run("true")
+        session.close()
+
+    def test_backup_helper_closes_session(self):
+        """The session of a backup helper ends with its action, also when the action exits."""
+        container = LocalExecContainer()
+        with mock.patch(
+            "movai_developer_tools.utils.backup_helper.ContainerTools",
+            return_value=local_container_tools(container),
+        ):
+            helper = BackupHelper(session=True)
+        self.assertEqual(container.execs, 0)
+        with self.assertRaises(SystemExit):
+            with helper:
+                self.assertEqual(helper.spawner_cls.exec_run("echo hi")[1], b"hi\n")
+                raise SystemExit(1)
+        self.assertEqual(container.execs, 1)
+        self.assertEqual(container.process.wait(5), 0)
+        self.assertIsNone(helper.spawner_cls.session)
+
+
+if __name__ == "__main__":
+    unittest.main()
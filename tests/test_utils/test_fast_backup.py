@@ -0,0 +1,134 @@
+import json
+import os
+import tempfile
+import unittest
+from movai_developer_tools.utils.fast_backup import (
+    export_manifests,
+    flatten,
+    import_manifests,
+    layout_differences,
+    object_keys,
+    unflatten,
+)
+from movai_developer_tools.utils.manifest_index import Manifest
+from movai_developer_tools.utils.metadata_status import canonical_digest
+from movai_developer_tools.utils.redis_client import RedisClient, RedisError
+from tests.fake_redis import FakeRedis
+
+FLOW = {
+    "Label": "my_flow",
+    "Parameter": {},
+    "Container": {
+        "c1": {"ContainerFlow": "sub_flow", "Position": [1, 2.5]},
+        "c2": {"ContainerFlow": "other", "Parameter": {"rate": {"Value": 10}}},
+    },
+    "NodeInst": {"talker": {"Template": "talker", "Persistent": True}},
+    "Links": {"l1": {"From": "talker/out", "To": "c1/in", "Dependency": 0}},
+}
+
+
+class TestFastBackup(unittest.TestCase):
+    """Test the direct Redis import and export against a fake Redis."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.redis = FakeRedis()
+        self.client = RedisClient("127.0.0.1", self.redis.port)
+        self.manifest_path = os.path.join(self.tmp.name, "pkg", "manifest.txt")
+        self.write("pkg/manifest.txt", "Flow:my_flow\nNode:t*\n")
+        self.write("pkg/metadata/Flow/my_flow.json", {"Flow": {"my_flow": FLOW}})
+        for name in ("talker", "timer"):
+            self.write(
+                f"pkg/metadata/Node/{name}.json",
+                {"Node": {name: {"Label": name, "Path": "", "PortsInst": {}}}},
+            )
+
+    def tearDown(self):
+        self.client.close()
+        self.redis.close()
+        self.tmp.cleanup()
+
+    def write(self, path, data):
+        path = os.path.join(self.tmp.name, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(data if isinstance(data, str) else json.dumps(data))
+
+    def digests(self):
+        metadata = os.path.join(self.tmp.name, "pkg", "metadata")
+        digests = {}
+        for type_name in os.listdir(metadata):
+            for name in os.listdir(os.path.join(metadata, type_name)):
+                with open(os.path.join(metadata, type_name, name), "rb") as file:
+                    digests[f"{type_name}/{name}"] = canonical_digest(file.read())
+        return digests
+
+    def test_flatten(self):
+        keys = flatten("Flow", "my_flow", FLOW)
+        self.assertEqual(
+            json.loads(keys["Flow:my_flow,Container:c1,ContainerFlow:"]), "sub_flow"
+        )
+        self.assertIn("Flow:my_flow,Container:c2,Parameter:rate,Value:", keys)
+        self.assertEqual(unflatten(keys.items()), {"Flow": {"my_flow": FLOW}})
+        with self.assertRaises(ValueError):
+            flatten("Flow", "a,b", {})
+
+    def test_round_trip(self):
+        """An import followed by an export gives back the same files, in few round trips."""
+        before = self.digests()
+        self.redis.data[b"Node:timer,Stale:"] = b"1"
+        self.redis.data[b"Node:other,Label:"] = b'"other"'
+        self.assertEqual(
+            import_manifests(self.client, [Manifest(self.manifest_path)]), 3
+        )
+        self.assertNotIn(b"Node:timer,Stale:", self.redis.data)
+        # The stale keys are deleted and the objects written in one transaction
+        self.assertEqual(
+            [name for name in self.redis.commands if name != "SCAN"],
+            ["MULTI", "EXEC", "DEL", "MSET"],
+        )
+        self.assertIn(b"Node:other,Label:", self.redis.data)
+        self.assertLessEqual(self.client.round_trips, 4)
+
+        # Nothing is rewritten when the platform and the files agree
+        self.assertEqual(
+            export_manifests(self.client, [Manifest(self.manifest_path)]), []
+        )
+        # A change in the platform is exported
+        self.redis.data[b"Node:talker,Label:"] = b'"renamed"'
+        os.remove(
+            os.path.join(self.tmp.name, "pkg", "metadata", "Flow", "my_flow.json")
+        )
+        written = export_manifests(self.client, [Manifest(self.manifest_path)])
+        self.assertEqual(len(written), 2)
+        after = self.digests()
+        self.assertEqual(after["Flow/my_flow.json"], before["Flow/my_flow.json"])
+        self.assertNotEqual(after["Node/talker.json"], before["Node/talker.json"])
+
+    def test_layout_differences(self):
+        """Keys stored by the backup tool are compared by their decoded values."""
+        self.client.execute(
+            "MSET", "Node:talker,Label:", '"talker"', "Node:talker,Path:", '""'
+        )
+        self.client.execute("MSET", "Node:talker,PortsInst:", "{}")
+        stored = object_keys(self.client, "Node", "talker")
+        data = {"Label": "talker", "Path": "", "PortsInst": {}}
+        self.assertEqual(layout_differences("Node", "talker", data, stored), [])
+        stored["Node:talker,Label:"] = b"talker"
+        del stored["Node:talker,Path:"]
+        self.assertEqual(
+            layout_differences("Node", "talker", data, stored),
+            [
+                "Node:talker,Label: is b'talker' instead of '\"talker\"'",
+                "Node:talker,Path: is not stored by the backup tool",
+            ],
+        )
+
+    def test_error(self):
+        with self.assertRaises(RedisError):
+            self.client.execute("FLUSHALL")
+        self.assertEqual(self.client.execute("PING"), "PONG")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+from movai_developer_tools.utils.file_sync import run_sync, sync_to_container
+from movai_developer_tools.utils.tree_diff import file_digest, tree_files
+from tests.fake_docker import LocalContainer, local_container_tools
+
+
+class TestFileSync(unittest.TestCase):
+    """Test the delta sync with a container running its commands locally."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "src")
+        self.dest = os.path.join(self.tmp.name, "container", "user")
+        os.makedirs(os.path.join(self.src, "flows"))
+        self.big = os.path.join(self.src, "maps", "map.pgm")
+        os.makedirs(os.path.dirname(self.big))
+        with open(self.big, "wb") as file:
+            file.write(os.urandom(4 << 20))
+        for index in range(20):
+            with open(
+                os.path.join(self.src, "flows", f"flow{index}.json"), "w"
+            ) as file:
+                file.write(f'{{"flow": {index}}}')
+        self.container = LocalContainer()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sync(self, **kwargs):
+        plan = sync_to_container(self.container, self.src, self.dest, **kwargs)
+        self.assertEqual(tree_files(self.src), tree_files(self.dest))
+        for rel_path in tree_files(self.src):
+            self.assertEqual(
+                file_digest(os.path.join(self.src, rel_path)),
+                file_digest(os.path.join(self.dest, rel_path)),
+            )
+        return plan
+
+    def test_sync(self):
+        """A repeat sync only sends the changed blocks, and removes deleted files."""
+        plan = self.sync()
+        self.assertEqual(len(plan.added), 21)
+        self.assertGreater(self.container.archives[-1], 4 << 20)
+
+        # Nothing to send when nothing changed
+        archives = len(self.container.archives)
+        self.assertTrue(self.sync().is_empty())
+        # Only the scripts archive was sent
+        self.assertEqual(len(self.container.archives), archives + 1)
+
+        # One block of the big file changes, a flow is removed and another added
+        with open(self.big, "r+b") as file:
+            file.seek(1 << 20)
+            file.write(b"changed")
+        os.utime(self.big, (1, 1))
+        os.remove(os.path.join(self.src, "flows", "flow3.json"))
+        with open(os.path.join(self.src, "flows", "new.json"), "w") as file:
+            file.write("{}")
+        plan = self.sync()
+        self.assertEqual(len(plan.patches), 1)
+        self.assertEqual(plan.removed, ["flows/flow3.json"])
+        self.assertEqual(plan.changes().added, ["flows/new.json"])
+        self.assertLess(plan.payload_size(), 100_000)
+        self.assertLess(self.container.archives[-1], 100_000)
+
+    def test_touch_only(self):
+        """Files with the same content and another mtime are not sent."""
+        self.sync()
+        os.utime(self.big, (2, 2))
+        plan = self.sync()
+        self.assertEqual(plan.touched, [["maps/map.pgm", 2]])
+        self.assertEqual(plan.payload_size(), 0)
+        self.assertEqual(
+            int(os.stat(os.path.join(self.dest, "maps/map.pgm")).st_mtime), 2
+        )
+
+    def test_dry_run(self):
+        plan = sync_to_container(self.container, self.src, self.dest, dry_run=True)
+        self.assertEqual(len(plan.whole), 21)
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_sync_user(self):
+        """Files are written as the user the container runs as, unless a user is given."""
+        self.sync()
+        self.assertEqual(set(self.container.client.api.users), {""})
+        container = LocalContainer()
+        run_sync(
+            local_container_tools(container),
+            Namespace(
+                sync_src=self.src,
+                sync_dest=os.path.join(self.tmp.name, "root"),
+                sync_block_size=1 << 16,
+                sync_dry=False,
+                sync_user="root",
+            ),
+        )
+        self.assertEqual(set(container.client.api.users), {"root"})
+        self.assertEqual(
+            tree_files(self.src), tree_files(os.path.join(self.tmp.name, "root"))
+        )
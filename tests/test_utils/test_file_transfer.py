@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+from movai_developer_tools.utils.file_transfer import (
+    TransferError,
+    copy_from_container,
+    download_file,
+    list_remote_files,
+    run_copy,
+)
+from tests.fake_docker import LocalContainer, local_container_tools
+
+
+class TestFileTransfer(unittest.TestCase):
+    """Test the resumable copy with a local exec API."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "src")
+        os.makedirs(os.path.join(self.src, "logs"))
+        self.data = os.urandom(3 * 2**20 + 123)
+        with open(os.path.join(self.src, "run.bag"), "wb") as file:
+            file.write(self.data)
+        with open(os.path.join(self.src, "logs", "empty.log"), "wb"):
+            pass
+        self.dest = os.path.join(self.tmp.name, "dest")
+        os.makedirs(self.dest)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, *parts):
+        with open(os.path.join(self.dest, *parts), "rb") as file:
+            return file.read()
+
+    def test_copy_tree(self):
+        """Directories are copied file by file into an existing destination."""
+        copied = copy_from_container(LocalContainer(), self.src, self.dest)
+        self.assertEqual(len(copied), 2)
+        self.assertEqual(self.read("src", "run.bag"), self.data)
+        self.assertEqual(self.read("src", "logs", "empty.log"), b"")
+
+    def test_exec_user(self):
+        """Files are read as the user the container runs as, unless a user is given."""
+        container = LocalContainer()
+        copy_from_container(container, self.src, self.dest)
+        self.assertEqual(set(container.client.api.users), {""})
+        container = LocalContainer()
+        run_copy(
+            local_container_tools(container),
+            Namespace(
+                cp_src=self.src,
+                cp_dest=os.path.join(self.dest, "root"),
+                cp_compress=False,
+                cp_retries=1,
+                cp_user="root",
+            ),
+        )
+        self.assertEqual(set(container.client.api.users), {"root"})
+
+    def test_resume_after_disconnect(self):
+        """A broken stream resumes with a ranged read from the bytes already written."""
+        for compress in (False, True):
+            container = LocalContainer(break_after=2**20)
+            remote = list_remote_files(container, os.path.join(self.src, "run.bag"))[0]
+            dest = os.path.join(self.dest, f"{compress}.bag")
+            download_file(container, remote, dest, compress=compress, retries=1)
+            self.assertEqual(self.read(f"{compress}.bag"), self.data)
+            ranges = [cmd for cmd in container.client.api.commands if "dd " in cmd]
+            self.assertEqual(len(ranges), 2)
+            self.assertIn("skip=0 ", ranges[0])
+            self.assertNotIn("skip=0 ", ranges[1])
+            self.assertFalse(os.path.exists(dest + ".part"))
+
+    def test_resume_previous_run(self):
+        """A partial file of the same version is resumed, a corrupted one is discarded."""
+        container = LocalContainer()
+        remote = list_remote_files(container, os.path.join(self.src, "run.bag"))[0]
+        dest = os.path.join(self.dest, "run.bag")
+        with open(dest + ".part.json", "w") as file:
+            json.dump(remote._asdict(), file)
+        with open(dest + ".part", "wb") as file:
+            file.write(self.data[:1000])
+        download_file(container, remote, dest)
+        self.assertEqual(self.read("run.bag"), self.data)
+        self.assertIn("skip=1000 ", container.client.api.commands[1])
+
+        with open(dest + ".part.json", "w") as file:
+            json.dump(remote._asdict(), file)
+        with open(dest + ".part", "wb") as file:
+            file.write(b"x" * 1000)
+        with self.assertRaises(TransferError):
+            download_file(container, remote, dest)
+        self.assertFalse(os.path.exists(dest + ".part"))
+
+
+if __name__ == "__main__":
+    unittest.main()
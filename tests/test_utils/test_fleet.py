@@ -0,0 +1,198 @@
+import argparse
+import contextlib
+import io
+import tempfile
+import threading
+import unittest
+from movai_developer_tools.utils import logger
+from movai_developer_tools.utils.container_tools import (
+    COMPOSE_PROJECT_LABEL,
+    COMPOSE_SERVICE_LABEL,
+    ContainerTools,
+    selection_kwargs,
+)
+from movai_developer_tools.utils.fleet import (
+    Target,
+    discover_stacks,
+    execute_on_fleet,
+    read_inventory,
+    report_results,
+    run_on_targets,
+    target_path,
+)
+from tests.fake_docker import FakeDockerDaemon, make_container
+
+
+def stack_container(service, project, ip):
+    return make_container(
+        f"{service}-{project}",
+        ip,
+        {COMPOSE_PROJECT_LABEL: project, COMPOSE_SERVICE_LABEL: service},
+    )
+
+
+class PrintSpawnerIp:
+    """Executor printing the IP of the spawner it selects."""
+
+    def execute(self, args):
+        print(
+            ContainerTools(
+                "^spawner-.*", service="spawner", **selection_kwargs(args)
+            ).ip()
+        )
+
+
+class PrintReport:
+    """Executor printing the report file it was given."""
+
+    def execute(self, args):
+        print(args.report)
+
+
+class TestFleet(unittest.TestCase):
+    """Test running operations against many docker daemons."""
+
+    def setUp(self):
+        self.daemons = [
+            FakeDockerDaemon([make_container(f"spawner-robot-{i}", f"10.0.0.{i}")])
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        for daemon in self.daemons:
+            daemon.close()
+
+    def test_read_inventory(self):
+        """Names are optional and comments are ignored."""
+        with tempfile.NamedTemporaryFile("w") as inventory:
+            inventory.write("# robots\nrobot-1 tcp://10.0.0.1:2375\n\nunix:///sock\n")
+            inventory.flush()
+            self.assertEqual(
+                read_inventory(inventory.name),
+                [
+                    Target("robot-1", "tcp://10.0.0.1:2375"),
+                    Target("unix:///sock", "unix:///sock"),
+                ],
+            )
+
+    def test_run_on_targets(self):
+        """Every daemon is queried and the output is grouped per host."""
+        targets = [Target(f"robot-{i}", d.url) for i, d in enumerate(self.daemons)]
+        targets.append(Target("offline", "unix:///does/not/exist.sock"))
+
+        def operation(target):
+            ip = ContainerTools("^spawner-.*", docker_host=target.docker_host).ip()
+            logger.warning(f"IPAddress: {ip}")
+            print(f"printed {ip}")
+            return ip
+
+        results = run_on_targets(targets, operation, jobs=2)
+        self.assertEqual(
+            [result.value for result in results[:3]],
+            ["10.0.0.0", "10.0.0.1", "10.0.0.2"],
+        )
+        self.assertIn("IPAddress: 10.0.0.1", results[1].output)
+        self.assertIn("printed 10.0.0.1", results[1].output)
+        self.assertNotIn("10.0.0.2", results[1].output)
+        self.assertEqual(results[3].exit_code, 1)
+        self.assertEqual(report_results(results), 1)
+        self.assertEqual(report_results(results[:3]), 0)
+
+    def test_child_thread_output(self):
+        """Threads started by an operation write to the output of its target."""
+        targets = [Target(f"robot-{i}", d.url) for i, d in enumerate(self.daemons)]
+
+        def operation(target):
+            def report():
+                logger.warning(f"logged by {target.name}")
+                print(f"printed by {target.name}")
+
+            thread = threading.Thread(target=report)
+            thread.start()
+            thread.join()
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            results = run_on_targets(targets, operation, jobs=3)
+        self.assertEqual(output.getvalue(), "")
+        for result in results:
+            name = result.target.name
+            self.assertIn(f"logged by {name}", result.output)
+            self.assertIn(f"printed by {name}", result.output)
+            self.assertEqual(result.output.count("by robot-"), 2)
+        self.assertIs(threading.Thread.start, threading.Thread.__dict__["start"])
+
+    def test_all_matching(self):
+        """Every compose stack of the daemon runs the executor, unlabeled containers are skipped."""
+        daemon = FakeDockerDaemon(
+            [
+                stack_container("spawner", "sim-a", "10.1.0.2"),
+                stack_container("ros-master", "sim-a", "10.1.0.3"),
+                stack_container("spawner", "sim-b", "10.2.0.2"),
+                stack_container("ros-master", "sim-b", "10.2.0.3"),
+                make_container("spawner-manual", "10.3.0.2"),
+                stack_container("redis-master", "sim-c", "10.4.0.2"),
+            ]
+        )
+        self.addCleanup(daemon.close)
+        stacks, missing = discover_stacks([Target("local", daemon.url)])
+        self.assertEqual(
+            stacks,
+            [
+                Target("sim-a", daemon.url, "sim-a"),
+                Target("sim-b", daemon.url, "sim-b"),
+            ],
+        )
+        self.assertEqual(missing, [])
+
+        args = argparse.Namespace(
+            hosts=None,
+            docker_host=daemon.url,
+            all_matching=True,
+            jobs=2,
+            project=None,
+            container_id="pinned",
+        )
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(execute_on_fleet(PrintSpawnerIp, args), 0)
+        self.assertIn(f"=== sim-a [{daemon.url}] OK\n10.1.0.2\n", output.getvalue())
+        self.assertIn(f"=== sim-b [{daemon.url}] OK\n10.2.0.2\n", output.getvalue())
+
+        # A daemon without stacks fails the aggregated status
+        empty = FakeDockerDaemon([make_container("spawner-manual", "10.3.0.2")])
+        self.addCleanup(empty.close)
+        args.docker_host = empty.url
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(execute_on_fleet(PrintSpawnerIp, args), 1)
+
+    def test_per_target(self):
+        """Files written by the executor are made per stack, other arguments are shared."""
+        self.assertEqual(
+            target_path("out/report.json", Target("robot-1/sim a", None)),
+            "out/report.robot-1-sim-a.json",
+        )
+        self.assertEqual(
+            target_path("profiles/", Target("sim-a", None)), "profiles.sim-a"
+        )
+        daemon = FakeDockerDaemon(
+            [
+                stack_container("spawner", "sim-a", "10.1.0.2"),
+                stack_container("spawner", "sim-b", "10.2.0.2"),
+            ]
+        )
+        self.addCleanup(daemon.close)
+        args = argparse.Namespace(
+            hosts=None,
+            docker_host=daemon.url,
+            all_matching=True,
+            jobs=2,
+            report="report.json",
+        )
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(execute_on_fleet(PrintReport, args, ("report",)), 0)
+        self.assertIn("=== sim-a [", output.getvalue())
+        self.assertIn("\nreport.sim-a.json\n", output.getvalue())
+        self.assertIn("\nreport.sim-b.json\n", output.getvalue())
+        self.assertEqual(args.report, "report.json")
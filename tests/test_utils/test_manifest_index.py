@@ -0,0 +1,58 @@
+import pathlib
+import tempfile
+import unittest
+from movai_developer_tools.utils.manifest_index import ManifestEntry, ManifestIndex
+
+
+class TestManifestIndex(unittest.TestCase):
+    """Test host-side manifest parsing and validation."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = pathlib.Path(self.tmp.name)
+        self.paths = []
+        for package, content in {
+            "good": "# comment\nFlow:my_flow\nNode:my_node\nFlow:my_flow\n",
+            "other": "Node:my_node\nCallback:cb_*\n",
+            "bad": "Flow:ok\nnot an entry\n",
+            "empty": "\n# nothing here\n",
+        }.items():
+            (root / package).mkdir()
+            (root / package / "manifest.txt").write_text(content)
+            self.paths.append(str(root / package / "manifest.txt"))
+        (root / "good" / "metadata" / "Flow").mkdir(parents=True)
+        (root / "good" / "metadata" / "Flow" / "my_flow.json").write_text("{}")
+        (root / "other" / "metadata" / "Callback").mkdir(parents=True)
+        (root / "other" / "metadata" / "Callback" / "cb_a.py").write_text("")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse(self):
+        """Entries are deduplicated, malformed and empty manifests are not usable."""
+        index = ManifestIndex(self.paths)
+        manifests = {pathlib.Path(m.path).parent.name: m for m in index}
+        self.assertEqual(
+            manifests["good"].entries,
+            (ManifestEntry("Flow", "my_flow"), ManifestEntry("Node", "my_node")),
+        )
+        self.assertTrue(manifests["bad"].errors)
+        self.assertFalse(manifests["empty"].usable)
+        self.assertEqual(len(index.usable()), 2)
+        self.assertEqual(len(index.entries()), 3)
+        self.assertEqual(len(index.owners(ManifestEntry("Node", "my_node"))), 2)
+
+    def test_validate(self):
+        """Missing metadata files are warnings, malformed lines are errors."""
+        index = ManifestIndex(self.paths)
+        self.assertFalse(index.validate("import"))
+        manifests = {pathlib.Path(m.path).parent.name: m for m in index}
+        self.assertEqual(len(manifests["good"].warnings), 1)
+        self.assertIn("Node:my_node", manifests["good"].warnings[0])
+        self.assertEqual(len(manifests["other"].warnings), 1)
+
+    def test_validate_export(self):
+        """Export does not require metadata files."""
+        index = ManifestIndex(self.paths[:2])
+        self.assertTrue(index.validate("export"))
+        self.assertFalse(any(m.warnings for m in index))
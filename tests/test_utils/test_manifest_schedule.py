@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from movai_developer_tools.utils.manifest_schedule import (
+    DurationHistory,
+    longest_first,
+    parse_shard,
+    shards,
+)
+
+
+class TestManifestSchedule(unittest.TestCase):
+    """Test the duration history and the manifest sharding."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "durations.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_history(self):
+        """Durations are smoothed, saved and used to estimate unknown manifests."""
+        history = DurationHistory(self.path)
+        self.assertEqual(history.estimate("a"), 1.0)
+        history.record("a", 10)
+        history.record("a", 20)
+        history.record("b", 5)
+        history.save()
+        history = DurationHistory(self.path)
+        self.assertEqual(history.estimate("a"), 15)
+        self.assertEqual(history.estimate("unknown"), 10)
+        self.assertEqual(
+            longest_first(["b", "unknown", "a"], history), ["a", "unknown", "b"]
+        )
+
+    def test_shards(self):
+        """Shards cover every manifest exactly once whatever the history of each job."""
+        durations = [60, 50, 40, 30, 30, 20, 20, 10, 10, 5, 5, 5, 3, 2]
+        manifests = [f"m{i}" for i in range(len(durations))]
+        first = DurationHistory(self.path)
+        for manifest, seconds in zip(manifests, durations):
+            first.record(manifest, seconds)
+        # The second job sees the history once the first shard recorded other durations
+        second = DurationHistory(os.path.join(self.tmp.name, "other.json"))
+        for manifest, seconds in zip(manifests, reversed(durations)):
+            second.record(manifest, seconds)
+        one = shards(manifests, first, 2)[0]
+        two = shards(reversed(manifests), second, 2)[1]
+        self.assertEqual(set(one) & set(two), set())
+        self.assertEqual(sorted(one + two), sorted(manifests))
+        # The history only orders the manifests of a shard
+        self.assertEqual(one, longest_first(one, first))
+        self.assertEqual(sorted(shards(manifests, second, 2)[0]), sorted(one))
+
+    def test_parse_shard(self):
+        """Shards count from 1."""
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for shard in ("0/4", "5/4", "a/b", "2"):
+            with self.assertRaises(ValueError):
+                parse_shard(shard)
+
+
+if __name__ == "__main__":
+    unittest.main()
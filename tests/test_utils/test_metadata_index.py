@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+import unittest
+from movai_developer_tools.utils.manifest_index import ManifestEntry
+from movai_developer_tools.utils.metadata_index import MetadataIndex, parse_object
+
+
+class TestMetadataIndex(unittest.TestCase):
+    """Test the persistent index of the userspace metadata."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "userspace")
+        self.write("nav/manifest.txt", "Flow:nav_flow\nNode:planner\n")
+        self.write(
+            "nav/metadata/Flow/nav_flow.json",
+            {
+                "Flow": {
+                    "nav_flow": {
+                        "NodeInst": {"p1": {"Template": "planner"}},
+                        "Container": {"c1": {"ContainerFlow": "base_flow"}},
+                    }
+                }
+            },
+        )
+        self.write(
+            "nav/metadata/Node/planner.json",
+            {
+                "Node": {
+                    "planner": {
+                        "PortsInst": {
+                            "in": {
+                                "Template": "ROS1/Subscriber",
+                                "In": {"in": {"Callback": "plan_cb"}},
+                            }
+                        }
+                    }
+                }
+            },
+        )
+        self.write("base/manifest.txt", "Flow:base_flow\nNode:pl*\n")
+        self.write("base/metadata/Flow/base_flow.json", {"Flow": {"base_flow": {}}})
+        self.write(".git/manifest.txt", "Flow:hidden\n")
+        self.index = MetadataIndex(os.path.join(self.tmp.name, "index.sqlite"))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def write(self, path, data):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(data if isinstance(data, str) else json.dumps(data))
+
+    def path(self, path):
+        return os.path.join(self.root, path)
+
+    def test_lookup(self):
+        self.assertEqual(self.index.update(self.root), 5)
+        planner = parse_object("Node:planner")
+        (obj,) = self.index.find(planner, self.root)
+        self.assertEqual(obj.path, self.path("nav/metadata/Node/planner.json"))
+        self.assertEqual(obj.manifest, self.path("nav/manifest.txt"))
+        # Listed directly and through a glob entry
+        self.assertEqual(
+            self.index.manifests([planner], self.root),
+            [self.path("base/manifest.txt"), self.path("nav/manifest.txt")],
+        )
+        self.assertEqual(
+            [str(o) for o in self.index.referenced_by(planner, self.root)],
+            ["Flow:nav_flow"],
+        )
+        self.assertEqual(
+            self.index.references(planner, self.root),
+            [
+                ManifestEntry("Callback", "plan_cb"),
+                ManifestEntry("Ports", "ROS1/Subscriber"),
+            ],
+        )
+        self.assertEqual(
+            [
+                str(o)
+                for o in self.index.referenced_by(
+                    parse_object("Flow:base_*"), self.root
+                )
+            ],
+            ["Flow:nav_flow"],
+        )
+        # Lookups are limited to the directory
+        self.assertEqual(self.index.find(planner, self.path("base")), [])
+        self.assertEqual(
+            self.index.manifests([ManifestEntry("Flow", "hidden")], self.root), []
+        )
+        with self.assertRaises(ValueError):
+            parse_object("planner")
+
+    def test_incremental(self):
+        """Only the changed files are re-indexed, removed files are forgotten."""
+        self.index.update(self.root)
+        self.assertEqual(self.index.update(self.root), 0)
+        self.write("nav/metadata/Flow/nav_flow.json", {"Flow": {"nav_flow": {}}})
+        os.utime(self.path("nav/metadata/Flow/nav_flow.json"), ns=(1, 1))
+        os.remove(self.path("base/metadata/Flow/base_flow.json"))
+        self.assertEqual(self.index.update(self.root), 2)
+        planner = ManifestEntry("Node", "planner")
+        self.assertEqual(self.index.referenced_by(planner, self.root), [])
+        self.assertEqual(
+            self.index.find(ManifestEntry("Flow", "base_flow"), self.root), []
+        )
+        # The index persists
+        self.index.close()
+        self.index = MetadataIndex(os.path.join(self.tmp.name, "index.sqlite"))
+        self.assertEqual(self.index.update(self.root), 0)
+        self.assertEqual(len(self.index.find(planner, self.root)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from argparse import Namespace
+from unittest import mock
+from movai_developer_tools.movbkp.lint_metadata.operation_executer import Lint
+from movai_developer_tools.utils import metadata_lint
+from movai_developer_tools.utils.metadata_lint import LintCache, lint_metadata
+
+
+class TestMetadataLint(unittest.TestCase):
+    """Test the host-side validation of metadata files."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "userspace")
+        self.write("a/manifest.txt", "Flow:*\nNode:*\n")
+        self.write("b/manifest.txt", "Node:*\n")
+        self.write(
+            "a/metadata/Flow/good.json",
+            {
+                "Flow": {
+                    "good": {
+                        "NodeInst": {"n": {"Template": "talker"}},
+                        "Container": {"c": {"ContainerFlow": "missing"}},
+                    }
+                }
+            },
+        )
+        self.write(
+            "a/metadata/Flow/no_template.json",
+            {"Flow": {"no_template": {"NodeInst": {"n": {}}}}},
+        )
+        self.write("a/metadata/Flow/wrong_name.json", {"Flow": {"other": {}}})
+        self.write("a/metadata/Node/talker.json", {"Node": {"talker": {}}})
+        self.write("b/metadata/Node/talker.json", {"Node": {"talker": {}}})
+        self.write("b/metadata/Node/broken.json", '{"Node": ')
+        for index in range(100):
+            self.write(f"b/metadata/Node/n{index}.json", {"Node": {f"n{index}": {}}})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, data):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(data if isinstance(data, str) else json.dumps(data))
+
+    def messages(self, problems):
+        return {
+            (
+                os.path.relpath(problem.path, self.root),
+                problem.level,
+                problem.message.split(",")[0],
+            )
+            for problem in problems
+        }
+
+    def test_lint(self):
+        """Every check is reported, the same with worker processes and inline."""
+        parallel, count = lint_metadata(self.root, jobs=2)
+        self.assertEqual(count, 106)
+        inline, _ = lint_metadata(self.root, jobs=1)
+        self.assertEqual(parallel, inline)
+        talker = "Node:talker is also defined by " + os.path.join(
+            self.root, "{}/metadata/Node/talker.json"
+        )
+        self.assertEqual(
+            self.messages(parallel),
+            {
+                ("a/metadata/Flow/good.json", "warning", "refers to Flow:missing"),
+                (
+                    "a/metadata/Flow/no_template.json",
+                    "error",
+                    "NodeInst n has no Template",
+                ),
+                (
+                    "a/metadata/Flow/wrong_name.json",
+                    "error",
+                    "does not describe only Flow:wrong_name",
+                ),
+                ("a/metadata/Node/talker.json", "error", talker.format("b")),
+                ("b/metadata/Node/talker.json", "error", talker.format("a")),
+                (
+                    "b/metadata/Node/broken.json",
+                    "error",
+                    "is not valid JSON: Expecting value: line 1 column 10 (char 9)",
+                ),
+            },
+        )
+
+    def test_cache(self):
+        """Unchanged files are not parsed again."""
+        cache_file = os.path.join(self.tmp.name, "cache.json")
+        first, _ = lint_metadata(self.root, jobs=1, cache=LintCache(cache_file))
+        with mock.patch.object(
+            metadata_lint, "lint_file", wraps=metadata_lint.lint_file
+        ) as lint_file:
+            self.write("a/metadata/Flow/wrong_name.json", {"Flow": {"wrong_name": {}}})
+            problems, _ = lint_metadata(self.root, jobs=1, cache=LintCache(cache_file))
+            lint_file.assert_called_once()
+        self.assertEqual(len(problems), len(first) - 1)
+
+    def test_cache_per_directory(self):
+        """Linting another directory keeps the cached results of the first one."""
+        other = os.path.join(self.tmp.name, "other")
+        shutil.copytree(self.root, other)
+        self.write("a/metadata/Flow/only_here.json", {"Flow": {"only_here": {}}})
+        args = Namespace(lint_jobs=1, lint_no_cache=False, lint_strict=False)
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self.tmp.name}):
+            for root in (self.root, other):
+                with self.assertRaises(SystemExit):
+                    Lint().execute(Namespace(**vars(args), dir=root))
+            with mock.patch.object(
+                metadata_lint, "lint_file", wraps=metadata_lint.lint_file
+            ) as lint_file:
+                with self.assertRaises(SystemExit):
+                    Lint().execute(Namespace(**vars(args), dir=self.root))
+                lint_file.assert_not_called()
+
+    def test_strict(self):
+        """Warnings only fail the lint command with --lint-strict."""
+        os.remove(os.path.join(self.root, "a/metadata/Flow/no_template.json"))
+        os.remove(os.path.join(self.root, "a/metadata/Flow/wrong_name.json"))
+        os.remove(os.path.join(self.root, "b/metadata/Node/talker.json"))
+        os.remove(os.path.join(self.root, "b/metadata/Node/broken.json"))
+        args = Namespace(dir=self.root, lint_jobs=1, lint_no_cache=True)
+        Lint().execute(Namespace(**vars(args), lint_strict=False))
+        with self.assertRaises(SystemExit) as raised:
+            Lint().execute(Namespace(**vars(args), lint_strict=True))
+        self.assertEqual(raised.exception.code, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
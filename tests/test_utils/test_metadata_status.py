@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from movai_developer_tools.utils.manifest_index import Manifest
+from movai_developer_tools.utils.metadata_status import (
+    HASH_SCRIPT,
+    compare,
+    disk_digests,
+)
+
+
+class TestMetadataStatus(unittest.TestCase):
+    """Test the comparison of userspace and platform metadata."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, data):
+        path = os.path.join(self.tmp.name, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(data)
+
+    def test_status(self):
+        """The container-side and host-side digests agree on equivalent JSON."""
+        self.write(
+            "pkg/manifest.txt", "Flow:same\nFlow:changed\nNode:only_disk\nNode:t*\n"
+        )
+        self.write("pkg/metadata/Flow/same.json", '{\n  "b": 1,\n  "a": [1, 2]\n}\n')
+        self.write("pkg/metadata/Flow/changed.json", '{"a": 1}')
+        self.write("pkg/metadata/Flow/unlisted.json", '{"a": 1}')
+        self.write("pkg/metadata/Node/only_disk.json", "{}")
+        self.write("pkg/metadata/Node/talker.json", "not json")
+        # Platform export, as the backup tool writes it in the staging area
+        self.write("staging/0/metadata/Flow/same.json", '{"a":[1,2],"b":1}')
+        self.write("staging/0/metadata/Flow/changed.json", '{"a": 2}')
+        self.write("staging/0/metadata/Node/talker.json", "not json")
+        self.write("staging/0/metadata/Node/timer.json", "{}")
+
+        output = subprocess.check_output(
+            [sys.executable, "-c", HASH_SCRIPT, os.path.join(self.tmp.name, "staging")]
+        )
+        platform = json.loads(output)["0"]
+        manifest = Manifest(os.path.join(self.tmp.name, "pkg", "manifest.txt"))
+        statuses = {
+            item.key: item.status
+            for item in compare(manifest.path, disk_digests(manifest), platform)
+        }
+        self.assertEqual(
+            statuses,
+            {
+                "Flow/same": "in-sync",
+                "Flow/changed": "modified",
+                "Node/only_disk": "missing-on-platform",
+                "Node/talker": "in-sync",
+                "Node/timer": "missing-on-disk",
+            },
+        )
+
+    def test_non_regular_files(self):
+        """Directories, broken links and files outside the type directories are skipped."""
+        self.write("pkg/manifest.txt", "Flow:*\n")
+        for root in ("pkg/metadata", "staging/0/metadata"):
+            self.write(f"{root}/Flow/a.json", "{}")
+            self.write(f"{root}/Flow/nested.json/b.json", "{}")
+            self.write(f"{root}/README", "")
+            os.symlink("missing", os.path.join(self.tmp.name, root, "Flow", "c.json"))
+        output = subprocess.check_output(
+            [sys.executable, "-c", HASH_SCRIPT, os.path.join(self.tmp.name, "staging")]
+        )
+        manifest = Manifest(os.path.join(self.tmp.name, "pkg", "manifest.txt"))
+        self.assertEqual(list(json.loads(output)["0"]), ["Flow/a"])
+        self.assertEqual(list(disk_digests(manifest)), ["Flow/a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
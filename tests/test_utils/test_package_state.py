@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from movai_developer_tools.utils.package_state import (
+    SECTION,
+    parse_query,
+    query_command,
+    save_command,
+)
+
+SHARE = "/opt/ros/noetic/share"
+OUTPUT = "\n".join(
+    [
+        f"{SHARE}/movai-flows/manifest.txt",
+        f"{SHARE}/movai-flows/extra/manifest.txt",
+        f"{SHARE}/movai-maps/manifest.txt",
+        f"{SHARE}/local/manifest.txt",
+        SECTION,
+        f"movai-flows: {SHARE}/movai-flows/manifest.txt",
+        f"movai-flows: {SHARE}/movai-flows/extra/manifest.txt",
+        f"movai-maps:amd64, movai-maps-extra: {SHARE}/movai-maps/manifest.txt",
+        "diversion by foo from: /etc/bar",
+        SECTION,
+        "movai-flows 1.2.0-3",
+        "movai-maps 2.0.0-1",
+        "bash 5.0-6",
+        SECTION,
+        json.dumps({"movai-flows": "1.2.0-3", "movai-maps": "1.9.0-1", "old": "1"}),
+        "",
+    ]
+)
+
+
+class TestPackageState(unittest.TestCase):
+    """Test the selection of the manifests of upgraded packages."""
+
+    def setUp(self):
+        self.installed = parse_query(OUTPUT)
+
+    def test_parse_query(self):
+        self.assertEqual(
+            self.installed.owners[f"{SHARE}/movai-maps/manifest.txt"], "movai-maps"
+        )
+        self.assertIsNone(self.installed.owners[f"{SHARE}/local/manifest.txt"])
+        self.assertEqual(self.installed.versions["movai-flows"], "1.2.0-3")
+        with self.assertRaises(ValueError):
+            parse_query("garbage")
+
+    def test_changed(self):
+        """Upgraded and unowned manifests are selected, up to date packages are skipped."""
+        self.assertEqual(
+            self.installed.changed(),
+            [f"{SHARE}/local/manifest.txt", f"{SHARE}/movai-maps/manifest.txt"],
+        )
+
+    def test_updated(self):
+        """Only packages with every manifest imported are recorded, uninstalled ones forgotten."""
+        flows = f"{SHARE}/movai-flows/manifest.txt"
+        maps = f"{SHARE}/movai-maps/manifest.txt"
+        state = self.installed.updated([flows, maps], failed=set())
+        self.assertEqual(state, {"movai-flows": "1.2.0-3", "movai-maps": "2.0.0-1"})
+        state = self.installed.updated([maps], failed={maps})
+        self.assertEqual(state, {"movai-flows": "1.2.0-3", "movai-maps": "1.9.0-1"})
+
+    def test_save_command(self):
+        """The state is written with shell quoting and read back unchanged."""
+        state = {"movai-flows": "1.2.0-3", "weird": "1:2.0'~rc"}
+        with tempfile.TemporaryDirectory() as home:
+            subprocess.run(
+                ["bash", "-c", save_command(state)],
+                env=dict(os.environ, HOME=home),
+                check=True,
+            )
+            path = os.path.join(
+                home, ".cache", "movai-developer-tools", "imported-packages.json"
+            )
+            with open(path) as file:
+                self.assertEqual(json.load(file), state)
+
+    @unittest.skipUnless(shutil.which("dpkg-query"), "needs dpkg")
+    def test_query_command(self):
+        """The query resolves the owner of files installed in this system in one run."""
+        with tempfile.TemporaryDirectory() as home:
+            output = subprocess.run(
+                ["bash", "-c", query_command("/usr/share/doc/dpkg", "copyright")],
+                env=dict(os.environ, HOME=home),
+                stdout=subprocess.PIPE,
+                check=True,
+            ).stdout.decode()
+        installed = parse_query(output)
+        self.assertEqual(installed.owners["/usr/share/doc/dpkg/copyright"], "dpkg")
+        self.assertIn("dpkg", installed.versions)
+        self.assertEqual(installed.imported, {})
@@ -0,0 +1,89 @@
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import unittest
+from movai_developer_tools.utils.profile_report import (
+    RUNNER,
+    collapsed_stacks,
+    extract_profiles,
+    hotspots,
+    merge_profiles,
+    write_collapsed,
+)
+
+SAMPLE_TOOL = """import sys
+def inner():
+    return sum(range(300000))
+def outer():
+    return inner()
+outer()
+sys.exit(3)
+"""
+
+
+class TestProfileReport(unittest.TestCase):
+    """Test the profiling runner and the merged profile reports."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, "sample_tool.py"), "w") as file:
+            file.write(SAMPLE_TOOL)
+        with open(os.path.join(self.tmp.name, "runner.py"), "w") as file:
+            file.write(RUNNER)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def profile(self, index):
+        """Run the sample tool under the runner like the spawner does."""
+        output = os.path.join(self.tmp.name, f"{index}.prof")
+        process = subprocess.run(
+            [sys.executable, "runner.py", output, "sample_tool"], cwd=self.tmp.name
+        )
+        return process.returncode, output
+
+    def test_profiles(self):
+        """The runner keeps the exit code and the profiles are merged into hotspots and stacks."""
+        outputs = []
+        for index in range(2):
+            exit_code, output = self.profile(index)
+            self.assertEqual(exit_code, 3)
+            outputs.append(output)
+
+        # Stream the profiles back as get_archive would
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w") as tar:
+            for output in outputs:
+                tar.add(output, arcname="staging/" + os.path.basename(output))
+            tar.add(
+                os.path.join(self.tmp.name, "runner.py"), arcname="staging/runner.py"
+            )
+        data = archive.getvalue()
+        dest = os.path.join(self.tmp.name, "host")
+        paths = extract_profiles(
+            (data[i : i + 1000] for i in range(0, len(data), 1000)), dest
+        )
+        self.assertEqual([path.name for path in paths], ["0.prof", "1.prof"])
+
+        stats = merge_profiles(paths)
+        self.assertIn("builtins.sum", hotspots(stats, 5))
+        stacks = collapsed_stacks(stats)
+        nested = [
+            stack
+            for stack in stacks
+            if "outer (sample_tool.py:4);inner (sample_tool.py:2)" in stack
+        ]
+        self.assertTrue(nested)
+        collapsed = os.path.join(dest, "merged.collapsed")
+        write_collapsed(stacks, collapsed)
+        with open(collapsed) as file:
+            for line in file:
+                stack, weight = line.rsplit(" ", 1)
+                self.assertGreater(int(weight), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
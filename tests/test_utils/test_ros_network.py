@@ -0,0 +1,75 @@
+import unittest
+from movai_developer_tools.utils.ros_network import (
+    LatencyHistogram,
+    RosApiError,
+    RosMasterClient,
+    probe_network,
+    request_tcpros,
+    ros_call,
+)
+from movai_developer_tools.utils.topic_stats import monitor_topics
+from tests.fake_ros import FakeMaster, FakePublisher
+
+
+class TestRosNetwork(unittest.TestCase):
+    """Test the ROS network probe against a fake master."""
+
+    def setUp(self):
+        self.good = FakePublisher("/good", {"/scan": "sensor_msgs/LaserScan"})
+        # Advertises an address that cannot be resolved, as a misconfigured ROS_IP would
+        self.bad = FakePublisher(
+            "/bad", {"/odom": "nav_msgs/Odometry"}, tcpros_host="unresolvable.invalid"
+        )
+        self.master = FakeMaster([self.good, self.bad])
+
+    def tearDown(self):
+        for server in (self.master, self.good, self.bad):
+            server.close()
+
+    def test_master_client(self):
+        """The master client resolves publishers and their TCPROS endpoint."""
+        master = RosMasterClient(self.master.uri)
+        self.assertEqual(master.publishers()["/scan"], ["/good"])
+        node_uri = master.lookup_node("/good")
+        self.assertEqual(
+            request_tcpros(node_uri, "/scan"), ("127.0.0.1", self.good.tcpros_port)
+        )
+
+    def test_probe_network(self):
+        """Reachable endpoints have samples, misconfigured ones only errors."""
+        results = {
+            (r.kind, r.name): r.histogram
+            for r in probe_network(self.master.uri, samples=3, timeout=1)
+        }
+        self.assertEqual(len(results[("master", "master")].samples), 3)
+        self.assertEqual(len(results[("xmlrpc", "/good")].samples), 3)
+        self.assertEqual(len(results[("tcpros", "/scan")].samples), 3)
+        self.assertFalse(results[("tcpros", "/odom")].samples)
+        self.assertEqual(len(results[("tcpros", "/odom")].errors), 3)
+
+    def test_api_errors(self):
+        """Faults, HTTP errors and malformed replies are raised as RosApiError."""
+        self.good.register_function(lambda caller: 1 / 0, "getPid")
+        self.good.register_function(lambda caller: [1, ""], "getUri")
+        with self.assertRaisesRegex(RosApiError, "ZeroDivisionError"):
+            ros_call(self.good.uri, "getPid")
+        with self.assertRaisesRegex(RosApiError, "malformed"):
+            ros_call(self.good.uri, "getUri")
+        with self.assertRaisesRegex(RosApiError, "404"):
+            ros_call(self.good.uri + "missing", "getPid")
+
+    def test_monitor_fault(self):
+        """A publisher failing the topic request is an error of its topic only."""
+        self.good.register_function(lambda *args: 1 / 0, "requestTopic")
+        (stats,) = monitor_topics(self.master.uri, ["/scan"], duration=0.1)
+        self.assertEqual(stats.connections, 0)
+        self.assertIn("RosApiError", stats.errors[0])
+
+    def test_histogram(self):
+        """Percentiles use the nearest rank."""
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.add(ms / 1000)
+        self.assertAlmostEqual(histogram.percentile(50), 50)
+        self.assertAlmostEqual(histogram.percentile(99), 99)
+        self.assertIn("<=   100 ms", histogram.render())
@@ -0,0 +1,81 @@
+import asyncio
+import socket
+import threading
+import unittest
+from movai_developer_tools.utils.ros_network import RosMasterClient, request_tcpros
+from movai_developer_tools.utils.ros_relay import RosRelay
+from tests.fake_ros import FakeMaster, FakePublisher
+
+PAYLOAD = bytes(range(256)) * 4096
+
+
+class StreamingPublisher(FakePublisher):
+    """Publisher that echoes the first line of a connection, then sends PAYLOAD."""
+
+    def on_connection(self, connection):
+        with connection, connection.makefile("rb") as stream:
+            connection.sendall(stream.readline())
+            connection.sendall(PAYLOAD)
+
+
+class TestRosRelay(unittest.TestCase):
+    """Test the relay against a fake master and publisher advertising unreachable host names."""
+
+    def setUp(self):
+        self.publisher = StreamingPublisher(
+            "/talker", {"/chatter": "std_msgs/String"}, tcpros_host="talker-host"
+        )
+        node_port = self.publisher.server_address[1]
+        self.master = FakeMaster(
+            [self.publisher], node_uris={"/talker": f"http://talker-host:{node_port}/"}
+        )
+        self.relay = RosRelay(
+            ("127.0.0.1", self.master.server_address[1]),
+            master_port=0,
+            host_map={"talker-host": "127.0.0.1"},
+        )
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        port = asyncio.run_coroutine_threadsafe(self.relay.start(), self.loop).result()
+        self.relay_uri = f"http://127.0.0.1:{port}/"
+
+    def tearDown(self):
+        self.loop.call_soon_threadsafe(self.relay.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.master.close()
+        self.publisher.close()
+
+    def test_uris_rewritten(self):
+        """Node URIs and TCPROS endpoints handed out by the relay point to the relay."""
+        master = RosMasterClient(self.relay_uri)
+        self.assertEqual(master.publishers()["/chatter"], ["/talker"])
+        self.assertEqual(master.call("getUri"), self.relay_uri)
+        node_uri = master.lookup_node("/talker")
+        self.assertTrue(node_uri.startswith("http://127.0.0.1:"))
+        self.assertEqual(
+            master.call("registerSubscriber", "/chatter", "std_msgs/String", "x"),
+            [node_uri],
+        )
+        host, port = request_tcpros(node_uri, "/chatter")
+        self.assertEqual(host, "127.0.0.1")
+        self.assertIn(
+            ("tcp", "talker-host", self.publisher.tcpros_port), self.relay.endpoints
+        )
+        self.assertEqual(
+            self.relay.endpoints[("tcp", "talker-host", self.publisher.tcpros_port)],
+            port,
+        )
+
+    def test_tcpros_forwarded(self):
+        """Data flows both ways through a relayed TCPROS endpoint, unchanged."""
+        node_uri = RosMasterClient(self.relay_uri).lookup_node("/talker")
+        address = request_tcpros(node_uri, "/chatter")
+        received = bytearray()
+        with socket.create_connection(address, timeout=5) as connection:
+            connection.sendall(b"header\n")
+            while True:
+                data = connection.recv(65536)
+                if not data:
+                    break
+                received += data
+        self.assertEqual(bytes(received), b"header\n" + PAYLOAD)
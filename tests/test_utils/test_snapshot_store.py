@@ -0,0 +1,34 @@
+import tempfile
+import unittest
+from movai_developer_tools.utils.snapshot_store import SnapshotStore
+
+
+class TestSnapshotStore(unittest.TestCase):
+    """Test the content-addressed snapshot store."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_put_deduplicates(self):
+        """The same content is stored once."""
+        digest, size = self.store.put(b'{"Flow": {}}' * 100)
+        self.assertGreater(size, 0)
+        self.assertEqual(self.store.put(b'{"Flow": {}}' * 100), (digest, 0))
+        self.assertEqual(self.store.get(digest), b'{"Flow": {}}' * 100)
+        self.assertEqual(len(list(self.store.objects_dir.rglob("*"))), 2)
+
+    def test_snapshots(self):
+        """The latest snapshot is loaded by default."""
+        with self.assertRaises(FileNotFoundError):
+            self.store.load_snapshot()
+        digest, _ = self.store.put(b"Flow:a\n")
+        manifests = [{"path": "pkg/manifest.txt", "manifest": digest, "files": {}}]
+        self.store.save_snapshot("first", manifests)
+        self.store.save_snapshot("second", [])
+        self.assertEqual(self.store.list_snapshots(), ["first", "second"])
+        self.assertEqual(self.store.load_snapshot()["name"], "second")
+        self.assertEqual(self.store.load_snapshot("first")["manifests"], manifests)
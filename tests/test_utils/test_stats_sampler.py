@@ -0,0 +1,97 @@
+import unittest
+from argparse import Namespace
+from movai_developer_tools.utils.container_tools import ContainerTools
+from movai_developer_tools.utils.stats_sampler import (
+    RingBuffer,
+    StatsSampler,
+    parse_stats,
+    percentile,
+    run_stats,
+)
+from tests.fake_docker import FakeDockerDaemon, make_container
+
+
+def make_stats(cpu, precpu, system, presystem, usage, cache=0, limit=0):
+    """Build a docker stats entry."""
+    return {
+        "cpu_stats": {
+            "cpu_usage": {"total_usage": cpu},
+            "system_cpu_usage": system,
+            "online_cpus": 4,
+        },
+        "precpu_stats": {
+            "cpu_usage": {"total_usage": precpu},
+            "system_cpu_usage": presystem,
+        },
+        "memory_stats": {"usage": usage, "limit": limit, "stats": {"cache": cache}},
+    }
+
+
+class FakeStatsContainer:
+    """Container whose stats stream yields a fixed list of entries."""
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def stats(self, stream, decode):
+        return iter(self.entries)
+
+
+class TestStatsSampler(unittest.TestCase):
+    """Test the docker stats sampler."""
+
+    def test_ring_buffer_wraps(self):
+        """Only the latest samples are kept, oldest first."""
+        buffer = RingBuffer(3, fields=2)
+        for i in range(5):
+            buffer.append((i, i * 10))
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(buffer.column(0), [2, 3, 4])
+        self.assertEqual(buffer.column(1), [20, 30, 40])
+
+    def test_parse_stats(self):
+        """CPU is relative to the system delta times the CPUs, the page cache is not counted."""
+        cpu, mem, mem_percent = parse_stats(
+            make_stats(150, 100, 1100, 100, 600, cache=100, limit=1000)
+        )
+        self.assertAlmostEqual(cpu, 20.0)
+        self.assertEqual(mem, 500.0)
+        self.assertAlmostEqual(mem_percent, 50.0)
+        # The first entry of a stream has no previous sample
+        self.assertEqual(parse_stats({})[0], 0.0)
+
+    def test_percentile(self):
+        """Nearest rank percentiles."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+
+    def test_sampler_window(self):
+        """Samples are collected in the background and summarized over a time window."""
+        entries = [
+            make_stats(100 * i, 100 * (i - 1), 1000 * i, 1000 * (i - 1), 2**20 * i)
+            for i in range(1, 4)
+        ]
+        sampler = StatsSampler({"spawner": FakeStatsContainer(entries)}).start()
+        sampler._threads[0].join(5)
+        sampler.stop()
+        load = sampler.window("spawner", 0, float("inf"))
+        self.assertEqual(load["samples"], 3)
+        self.assertEqual(load["cpu_max"], 40.0)
+        self.assertEqual(load["mem_max_mb"], 3.0)
+        self.assertEqual(sampler.window("spawner", 0, 1)["samples"], 0)
+
+    def test_stats_also_not_found(self):
+        """An unknown --stats-also container exits with an error before sampling."""
+        daemon = FakeDockerDaemon([make_container("spawner-a", "10.0.0.2")])
+        try:
+            spawner = ContainerTools("^spawner-.*", docker_host=daemon.url)
+            with self.assertRaises(SystemExit) as raised:
+                run_stats(spawner, Namespace(stats_also=["missing"]))
+            self.assertEqual(raised.exception.code, 1)
+        finally:
+            daemon.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
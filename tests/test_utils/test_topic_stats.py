@@ -0,0 +1,97 @@
+import contextlib
+import io
+import socket
+import time
+import unittest
+from argparse import Namespace
+from movai_developer_tools.movros.topic_stats.operation_executer import (
+    TopicStatistics,
+)
+from movai_developer_tools.utils.topic_stats import (
+    TcprosConnection,
+    TopicStats,
+    decode_header,
+    encode_header,
+    monitor_topics,
+)
+from tests.fake_docker import FakeDockerDaemon, make_container
+from tests.fake_ros import FakeMaster, FakePublisher, StreamingPublisher
+
+
+class TestTopicStats(unittest.TestCase):
+    """Test the TCPROS topic monitor against fake publishers."""
+
+    def test_framing(self):
+        """Messages split across reads, and larger than the buffer, are all counted."""
+        stats = TopicStats("/t")
+        reader, writer = socket.socketpair()
+        connection = TcprosConnection(reader, stats, buffer_size=64)
+        reader.setblocking(False)
+        # A header longer than the buffer
+        fields = {"callerid": "/pub", "md5sum": "*", "type": "pkg/" + "Long" * 20}
+        header = encode_header(fields)
+        self.assertEqual(decode_header(header[4:]), fields)
+        data = header
+        for size in (0, 10, 100, 30, 1000, 5):
+            data += size.to_bytes(4, "little") + bytes(size)
+        for index in range(0, len(data), 7):
+            writer.sendall(data[index : index + 7])
+            time.sleep(0.001)
+            while connection.on_readable(time.monotonic()):
+                try:
+                    reader.recv(1, socket.MSG_PEEK)
+                except BlockingIOError:
+                    break
+        self.assertEqual(connection.header, fields)
+        self.assertEqual(stats.messages, 6)
+        self.assertEqual(stats.bytes, 1145)
+        writer.close()
+        self.assertFalse(connection.on_readable(time.monotonic()))
+        connection.close()
+
+    def test_monitor(self):
+        fast = StreamingPublisher(
+            "/fast", {"/scan": (200, 2000), "/big": (20, 300_000)}
+        )
+        slow = StreamingPublisher("/slow", {"/odom": (20, 100)})
+        master = FakeMaster([fast, slow])
+        try:
+            results = {
+                stats.topic: stats
+                for stats in monitor_topics(
+                    master.uri, ["/scan", "/big", "/odom", "/none"], duration=1.0
+                )
+            }
+        finally:
+            for server in (master, fast, slow):
+                server.close()
+        self.assertAlmostEqual(results["/scan"].hz(), 200, delta=40)
+        self.assertAlmostEqual(results["/odom"].hz(), 20, delta=4)
+        self.assertAlmostEqual(results["/big"].hz(), 20, delta=4)
+        self.assertEqual(results["/big"].bytes, results["/big"].messages * 300_000)
+        self.assertLess(results["/odom"].jitter(), 0.02)
+        self.assertEqual(results["/none"].errors, ["no publishers"])
+        self.assertEqual(results["/scan"].connections, 1)
+        self.assertIn(b"md5sum=*", fast.headers[0])
+
+    def test_silent_topics(self):
+        """Silent topics only fail the command when they were requested with --topic."""
+        quiet = FakePublisher("/quiet", {"/latched": "std_msgs/String"})
+        master = FakeMaster([quiet])
+        daemon = FakeDockerDaemon([make_container("ros-master-a", "127.0.0.1")])
+        executor = TopicStatistics()
+        executor.ros_master_port = master.server_address[1]
+        args = Namespace(duration=0.1, timeout=1.0, docker_host=daemon.url)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                executor.execute(Namespace(**vars(args), topic=None))
+                with self.assertRaises(SystemExit) as raised:
+                    executor.execute(Namespace(**vars(args), topic=["/latched"]))
+        finally:
+            for server in (master, quiet, daemon):
+                server.close()
+        self.assertEqual(raised.exception.code, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import io
+import pathlib
+import tarfile
+import tempfile
+import unittest
+from movai_developer_tools.utils.tree_diff import apply_tar_stream
+
+
+def make_tar_chunks(files: dict, chunk_size: int = 7) -> list:
+    """Build a tar archive with a top level metadata directory and split it in small chunks."""
+    with io.BytesIO() as buffer:
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            for name, data in files.items():
+                info = tarfile.TarInfo(f"metadata/{name}")
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        data = buffer.getvalue()
+    return [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+class TestTreeDiff(unittest.TestCase):
+    """Test applying a streamed tar archive to a directory tree."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.tmp.name)
+        (self.root / "Flow").mkdir()
+        (self.root / "Flow" / "same.json").write_bytes(b"same")
+        (self.root / "Flow" / "changed.json").write_bytes(b"old")
+        (self.root / "Flow" / "stale.json").write_bytes(b"stale")
+        self.chunks = make_tar_chunks(
+            {
+                "Flow/same.json": b"same",
+                "Flow/changed.json": b"new",
+                "Node/added.json": b"added",
+            }
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_apply_only_changed(self):
+        """Only changed files are written and stale files are removed."""
+        same_mtime = (self.root / "Flow" / "same.json").stat().st_mtime_ns
+        changes = apply_tar_stream(self.chunks, self.root)
+        self.assertEqual(changes.added, ["Node/added.json"])
+        self.assertEqual(changes.modified, ["Flow/changed.json"])
+        self.assertEqual(changes.removed, ["Flow/stale.json"])
+        self.assertEqual((self.root / "Flow" / "changed.json").read_bytes(), b"new")
+        self.assertFalse((self.root / "Flow" / "stale.json").exists())
+        self.assertEqual(
+            (self.root / "Flow" / "same.json").stat().st_mtime_ns, same_mtime
+        )
+
+    def test_dry_run(self):
+        """Dry run reports the changes without touching the tree."""
+        changes = apply_tar_stream(self.chunks, self.root, dry_run=True)
+        self.assertFalse(changes.is_empty())
+        self.assertEqual((self.root / "Flow" / "changed.json").read_bytes(), b"old")
+        self.assertTrue((self.root / "Flow" / "stale.json").exists())
+        self.assertFalse((self.root / "Node").exists())